@@ -0,0 +1,354 @@
+import json
+import logging
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from cell_mapping import resolve_mapping_path
+from device_filter import DeviceFilter
+from records import Device
+from xlsx_template import get_template
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+    'zip': 'application/zip',
+}
+
+# Versión de cada equipo: LASTDATE de hardware y su fila de usuarios (sin bios ni periféricos),
+# una consulta mínima por pedido. Reasignar un equipo en usuarios no cambia LASTDATE.
+VERSIONS_QUERY = """
+    SELECT h.ID as hardware_id, h.LASTDATE as lastdate,
+           u.EMPRESA, u.DEPARTAMENTO, u.NOMBRE, u.CARGO, u.CIUDAD
+    FROM hardware h
+    LEFT JOIN usuarios u ON u.HARDWARE_ID = h.ID
+    WHERE h.NAME IS NOT NULL AND h.NAME != ''
+    """
+
+# Con el directorio de empleados cargado, el empleado sale del directorio y no de usuarios
+VERSIONS_QUERY_DIRECTORY = """
+    SELECT h.ID as hardware_id, h.LASTDATE as lastdate
+    FROM hardware h
+    WHERE h.NAME IS NOT NULL AND h.NAME != ''
+    """
+
+
+class RenderedActaCache:
+    """
+    Caché LRU en memoria de las actas ya generadas (HARDWARE_ID y formato -> bytes).
+    Una entrada vale mientras el equipo tenga la misma versión (hardware.LASTDATE y los
+    datos de su empleado) y no supere max_age, para que la fecha y hora impresas en el
+    acta no queden demasiado viejas.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_age=600):
+        """
+        Args:
+            max_bytes (int): Tamaño máximo de las actas guardadas
+            max_age (float): Segundos de validez de un acta (None = sin vencimiento)
+        """
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, version):
+        """
+        Acta guardada si sigue vigente
+
+        Args:
+            key (tuple): (HARDWARE_ID, formato)
+            version (str): Versión actual del equipo (ActaService.versions)
+
+        Returns:
+            tuple: (nombre del archivo, contenido), o None
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                stored_version, created, name, content = entry
+                expired = self.max_age is not None and time.monotonic() - created > self.max_age
+                if stored_version == version and not expired:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return name, content
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, version, name, content):
+        """Guarda un acta y descarta las usadas hace más tiempo si se supera max_bytes"""
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (version, time.monotonic(), name, content)
+            self.bytes += len(content)
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        self.bytes -= len(self.entries.pop(key)[3])
+
+    def stats(self):
+        """Contadores de la caché para /salud"""
+        return {'actas': len(self.entries), 'bytes': self.bytes, 'aciertos': self.hits, 'fallos': self.misses}
+
+
+class ActaService:
+    """
+    Generación de actas bajo demanda para soporte: mantiene la plantilla parseada, el
+    mapeo compilado y el pool de conexiones abiertos entre pedidos, y guarda las actas
+    generadas en un RenderedActaCache. Cada pedido consulta solo el LASTDATE y el
+    empleado de los equipos pedidos; la extracción (consultas por bloques) y la generación se hacen
+    únicamente para los que no están en la caché o cambiaron.
+    """
+
+    def __init__(self, generator, cache=None):
+        """
+        Args:
+            generator (script.OCSInventoryToExcel): Generador configurado (plantilla,
+                formatos, fuente de datos); su conexión se abre en start y no se cierra
+            cache (RenderedActaCache): Caché de actas (por defecto 64 MB, 10 minutos)
+        """
+        self.generator = generator
+        self.cache = cache if cache is not None else RenderedActaCache()
+        self.source_devices = None
+
+    def start(self):
+        """
+        Conecta la base (o carga los volcados) y deja la plantilla y el mapeo en memoria
+
+        Returns:
+            bool: True si hay de dónde leer los equipos
+        """
+        generator = self.generator
+        if generator.db is None and not generator.connect_database():
+            return False
+        if generator.data_source is not None:
+            # Los volcados no cambian mientras el servicio está activo: se leen una sola vez
+            self.source_devices = generator.get_devices_data()
+        if 'xlsx' in generator.output_formats and generator.render_engine == 'xml':
+            get_template(generator.template_path)
+        generator.get_cell_mapping()
+        logger.info("Plantilla %s y mapeo %s listos", generator.template_path,
+                    resolve_mapping_path(generator.template_path, generator.mapping_path))
+        return True
+
+    def versions(self, device_filter):
+        """
+        Versión de los equipos que cumplen el filtro: su LASTDATE y los datos de su
+        empleado, así reasignar un equipo invalida sus actas en la caché
+
+        Returns:
+            dict: HARDWARE_ID -> versión (texto)
+        """
+        directory = self.generator.employee_directory
+        if self.source_devices is not None:
+            return {device.hardware_id: f"{device.lastdate}|{device.employee}"
+                    for device in self.source_devices if device_filter.matches(device, directory)}
+        conditions, params = self.generator.filter_conditions(device_filter)
+        query = VERSIONS_QUERY if directory is None else VERSIONS_QUERY_DIRECTORY
+        query += ''.join(f"\n    AND {condition}" for condition in conditions)
+        employees = {}
+        lastdates = {}
+        for hardware_id, lastdate, *employee in self.generator._query(query, params, dictionary=False):
+            lastdates[hardware_id] = lastdate
+            # Con varias filas en usuarios, todas forman parte de la versión
+            employees.setdefault(hardware_id, []).append(
+                tuple(employee) if directory is None else directory.employees.get(hardware_id))
+        return {hardware_id: f"{lastdate}|{employees[hardware_id]}" for hardware_id, lastdate in lastdates.items()}
+
+    def extract(self, hardware_ids):
+        """Dispositivos completos (periféricos, empleado, ...) de los HARDWARE_ID indicados"""
+        device_filter = DeviceFilter(hardware_ids=hardware_ids)
+        if self.source_devices is not None:
+            return [device for device in self.source_devices if device_filter.matches(device)]
+        generator = self.generator
+        query, params = generator.devices_query(device_filter)
+        devices = [Device(*row) for row in generator._query(query, params, dictionary=False)]
+        generator.attach_peripherals(devices)
+        return devices
+
+    def actas(self, device_filter, output_format):
+        """
+        Actas de los equipos que cumplen el filtro, desde la caché o generadas
+
+        Args:
+            device_filter (device_filter.DeviceFilter): Equipos pedidos
+            output_format (str): 'xlsx' o 'pdf'
+
+        Returns:
+            list: Pares (nombre del archivo, contenido), ordenados por nombre
+        """
+        versions = self.versions(device_filter)
+        found = {}
+        missing = []
+        for hardware_id, version in versions.items():
+            cached = self.cache.get((hardware_id, output_format), version)
+            if cached is None:
+                missing.append(hardware_id)
+            else:
+                found[hardware_id] = cached
+
+        if missing:
+            for device in self.extract(missing):
+                if device.extraction_error:
+                    raise RuntimeError(f"No se pudo extraer el equipo {device.hardware_id}: "
+                                       f"{device.extraction_error}")
+                name = os.path.basename(self.generator.get_output_path(device, '', create_folders=False))
+                name = f"{os.path.splitext(name)[0]}.{output_format}"
+                [(_, content)] = self.generator.render_acta_contents(device, (output_format,))
+                found[device.hardware_id] = (name, content)
+                self.cache.put((device.hardware_id, output_format), versions[device.hardware_id],
+                               name, content)
+        return sorted(found.values())
+
+    @staticmethod
+    def zip_actas(actas):
+        """Zip en memoria con las actas (nombres repetidos con sufijo _2, _3, ...)"""
+        buffer = BytesIO()
+        used = set()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, content in actas:
+                base, extension = os.path.splitext(name)
+                candidate, suffix = name, 2
+                while candidate in used:
+                    candidate = f"{base}_{suffix}{extension}"
+                    suffix += 1
+                used.add(candidate)
+                # xlsx y pdf ya vienen comprimidos
+                archive.writestr(candidate, content, compress_type=zipfile.ZIP_STORED)
+        return buffer.getvalue()
+
+
+class ActaRequestHandler(BaseHTTPRequestHandler):
+    """
+    Rutas del servicio (GET):
+
+        /actas/<hardware_id>                un acta (?formato=pdf para el PDF)
+        /actas/colaborador/<nombre>         actas del colaborador (usuarios.NOMBRE, admite *);
+                                            un acta si tiene un solo equipo, un zip si tiene varios
+        /actas/equipo/<nombre>              igual, por nombre del equipo (hardware.NAME)
+        /actas/ciudad/<ciudad>.zip          zip con las actas de la ciudad (usuarios.CIUDAD)
+        /salud                              estado del servicio y de la caché
+    """
+
+    server_version = 'ActasFTI08/1.0'
+
+    def do_GET(self):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        query = parse_qs(url.query)
+        service = self.server.service
+        output_format = query.get('formato', [service.generator.output_formats[0]])[0]
+        try:
+            if parts == ['salud']:
+                self._send_json(200, {'estado': 'ok', 'cache': service.cache.stats()})
+                return
+            if output_format not in ('xlsx', 'pdf'):
+                self._send_json(400, {'error': f"Formato no admitido: {output_format}"})
+                return
+            if len(parts) == 2 and parts[0] == 'actas' and parts[1].isdigit():
+                device_filter = DeviceFilter(hardware_ids=[parts[1]])
+            elif len(parts) == 3 and parts[:2] == ['actas', 'colaborador']:
+                device_filter = DeviceFilter(employee_names=[parts[2]])
+            elif len(parts) == 3 and parts[:2] == ['actas', 'equipo']:
+                device_filter = DeviceFilter(hostnames=[parts[2]])
+            elif len(parts) == 3 and parts[:2] == ['actas', 'ciudad'] and parts[2].endswith('.zip'):
+                device_filter = DeviceFilter(cities=[parts[2][:-4]])
+            else:
+                self._send_json(404, {'error': 'Ruta no encontrada'})
+                return
+
+            actas = service.actas(device_filter, output_format)
+            if not actas:
+                self._send_json(404, {'error': 'No hay equipos que cumplan el pedido'})
+            elif len(actas) == 1 and parts[1] != 'ciudad':
+                name, content = actas[0]
+                self._send_file(name, content, output_format)
+            else:
+                label = parts[2][:-4] if parts[1] == 'ciudad' else parts[2]
+                safe_label = "".join(c for c in label if c.isalnum() or c in (' ', '-', '_')).rstrip() or 'actas'
+                self._send_file(f"{safe_label}.zip", service.zip_actas(actas), 'zip')
+        except Exception as err:
+            logger.exception("Error atendiendo %s", self.path)
+            self._send_json(500, {'error': str(err)})
+        finally:
+            logger.info("%s %s (%.0f ms)", self.command, self.path, (time.perf_counter() - started) * 1000)
+
+    def _send_file(self, name, content, file_type):
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[file_type])
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{quote(name, safe='')}")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # El tiempo de cada pedido ya se registra en do_GET
+        pass
+
+
+def create_server(service, host='127.0.0.1', port=8080):
+    """
+    Servidor HTTP del servicio (un hilo por pedido); llamar a serve_forever para atender
+
+    Args:
+        service (ActaService): Servicio ya iniciado con start
+        host (str): Interfaz donde escuchar (por defecto solo local)
+        port (int): Puerto (0 = uno libre)
+
+    Returns:
+        ThreadingHTTPServer: Servidor con el servicio en server.service
+    """
+    server = ThreadingHTTPServer((host, port), ActaRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve(generator, host='127.0.0.1', port=8080, cache_mb=64, max_age=600):
+    """
+    Inicia el servicio y atiende pedidos hasta Ctrl+C
+
+    Returns:
+        bool: False si no se pudo conectar a la base
+    """
+    service = ActaService(generator, RenderedActaCache(cache_mb * 1024 * 1024, max_age))
+    if not service.start():
+        return False
+    server = create_server(service, host, port)
+    logger.info("Servicio de actas en http://%s:%d/ (Ctrl+C para detener)", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if generator.db:
+            generator.db.close()
+    return True
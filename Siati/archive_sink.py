@@ -0,0 +1,111 @@
+import csv
+import hashlib
+import io
+import os
+import zipfile
+
+
+MANIFEST_NAME = 'manifiesto.csv'
+MANIFEST_HEADERS = ['ARCHIVO', 'HARDWARE_ID', 'EQUIPO', 'COLABORADOR', 'EMPRESA', 'DEPARTAMENTO', 'BYTES',
+                    'SHA256']
+
+# Búfer del archivo de cada zip: las actas se acumulan y se escriben en bloques grandes
+WRITE_BUFFER = 4 * 1024 * 1024
+
+
+class _CityArchive:
+    """Zip de una ciudad abierto durante la ejecución, con sus filas del manifiesto"""
+
+    __slots__ = ('path', 'temp_path', 'handle', 'archive', 'manifest', 'names')
+
+    def __init__(self, path):
+        self.path = path
+        # Se escribe en un temporal y se renombra al cerrar: nunca queda un zip a medio escribir
+        self.temp_path = f"{path}.{os.getpid()}.tmp"
+        self.handle = open(self.temp_path, 'wb', buffering=WRITE_BUFFER)
+        self.archive = zipfile.ZipFile(self.handle, 'w')
+        self.manifest = []
+        self.names = set()
+
+
+class ZipArchiveSink:
+    """
+    Destino de las actas en zips por ciudad (<carpeta>/<ciudad>.zip) en lugar de un
+    archivo por acta. Las actas llegan ya generadas en memoria y las escribe un solo
+    proceso, en orden, así que el disco recibe pocas escrituras grandes y secuenciales.
+    Cada zip puede incluir un manifiesto CSV con las actas que contiene.
+    """
+
+    def __init__(self, output_folder, manifest=True):
+        """
+        Args:
+            output_folder (str): Carpeta donde se crean los zips
+            manifest (bool): Agregar manifiesto.csv a cada zip
+        """
+        self.output_folder = output_folder
+        self.manifest = manifest
+        self.archives = {}
+        self.bytes_written = 0
+
+    def add(self, city, name, content, device=None):
+        """
+        Agrega un acta al zip de su ciudad
+
+        Args:
+            city (str): Nombre (ya saneado) de la ciudad; define el zip
+            name (str): Nombre del archivo dentro del zip
+            content (bytes): Contenido del acta
+            device (records.Device): Dispositivo del acta, para el manifiesto
+
+        Returns:
+            str: Ruta del acta, como <zip>/<nombre>
+        """
+        archive = self.archives.get(city)
+        if archive is None:
+            os.makedirs(self.output_folder, exist_ok=True)
+            archive = self.archives[city] = _CityArchive(os.path.join(self.output_folder, f"{city}.zip"))
+        if name in archive.names:
+            raise ValueError(f"El acta {name} ya está en {archive.path}")
+        # xlsx y pdf ya vienen comprimidos: se guardan tal cual, sin volver a comprimir
+        archive.archive.writestr(name, content, compress_type=zipfile.ZIP_STORED)
+        archive.names.add(name)
+        self.bytes_written += len(content)
+        if self.manifest:
+            details = ([device.hardware_id, device.username, device.nombre_completo, device.empresa_usuario,
+                        device.departamento_usuario] if device is not None else [None] * 5)
+            archive.manifest.append([name] + details + [len(content), hashlib.sha256(content).hexdigest()])
+        return f"{archive.path}/{name}"
+
+    def close(self):
+        """
+        Escribe los manifiestos, cierra los zips y los deja en su ruta final
+
+        Returns:
+            list: Rutas de los zips creados
+        """
+        paths = []
+        for archive in self.archives.values():
+            if self.manifest:
+                text = io.StringIO()
+                writer = csv.writer(text, delimiter=';')
+                writer.writerow(MANIFEST_HEADERS)
+                writer.writerows(archive.manifest)
+                archive.archive.writestr(MANIFEST_NAME, text.getvalue().encode('utf-8-sig'),
+                                         compress_type=zipfile.ZIP_DEFLATED)
+            archive.archive.close()
+            archive.handle.close()
+            os.replace(archive.temp_path, archive.path)
+            paths.append(archive.path)
+        self.archives = {}
+        return paths
+
+    def abort(self):
+        """Descarta los zips a medio escribir (p. ej. si la ejecución se interrumpe)"""
+        for archive in self.archives.values():
+            try:
+                archive.archive.close()
+                archive.handle.close()
+            finally:
+                if os.path.exists(archive.temp_path):
+                    os.remove(archive.temp_path)
+        self.archives = {}
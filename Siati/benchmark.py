@@ -0,0 +1,401 @@
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from consolidated import write_consolidated_workbook
+from ocs_dump import DUMP_COLUMNS
+from records import Device, Employee, InputDevice, Monitor
+from script import OCSInventoryToExcel
+
+
+CIUDADES = ['QUITO', 'GUAYAQUIL', 'CUENCA', 'MANTA']
+EMPRESAS = ['SIATIADUANAS S.A.', 'SIATILOGISTICS S.A.', 'SIATIEXPRESS CIA. LTDA.']
+DEPARTAMENTOS = ['FINANCIERO', 'COMERCIAL', 'OPERACIONES', 'ADMINISTRATIVO', 'SISTEMAS']
+FABRICANTES = [('Dell Inc.', 'OptiPlex 7070', 'Desktop'), ('HP', 'ProBook 440 G8', 'Notebook'),
+               ('LENOVO', 'ThinkCentre M720q', 'Desktop'), ('Dell Inc.', 'Latitude 5420', 'Notebook')]
+MONITORES = [('Dell Inc.', 'DELL E1916H'), ('Samsung', 'S22F350'), ('LG', '22MK400')]
+
+
+def synthetic_devices(count, seed=1):
+    """
+    Genera dispositivos con la misma forma que devuelve get_devices_data
+
+    Args:
+        count (int): Cantidad de dispositivos
+        seed (int): Semilla para obtener siempre el mismo conjunto
+
+    Returns:
+        list: Registros records.Device
+    """
+    rng = random.Random(seed)
+    devices = []
+    for hardware_id in range(1, count + 1):
+        manufacturer, model, dev_type = rng.choice(FABRICANTES)
+        monitors = []
+        for _ in range(rng.choice([0, 1, 1, 2])):
+            brand, caption = rng.choice(MONITORES)
+            monitors.append(Monitor(brand, caption, f'MON{rng.randrange(10**8):08d}'))
+        devices.append(Device(
+            f'EQUIPO-{hardware_id:05d}', 'Microsoft Windows 11 Pro', manufacturer, model,
+            f'SN{rng.randrange(10**7):07d}', dev_type, hardware_id, None, None,
+            monitors=monitors,
+            keyboards=[InputDevice('Keyboard', 'USB Input Device')],
+            mice=[InputDevice('Pointing', 'USB Input Device')],
+            employee=Employee(rng.choice(EMPRESAS), rng.choice(DEPARTAMENTOS),
+                              f'USUARIO SINTETICO {hardware_id:05d}', 'ANALISTA', rng.choice(CIUDADES))))
+    return devices
+
+
+def synthetic_tables(count, seed=1):
+    """
+    Genera las tablas hardware, bios, monitors, inputs, printers y usuarios de OCS (con las
+    columnas de DUMP_COLUMNS, tomadas de ocsweb.sql) para la misma flota que synthetic_devices
+
+    Args:
+        count (int): Cantidad de dispositivos
+        seed (int): Semilla para obtener siempre el mismo conjunto
+
+    Returns:
+        dict: Nombre de tabla -> lista de tuplas en el orden de DUMP_COLUMNS
+    """
+    rng = random.Random(seed)
+    tables = {name: [] for name in DUMP_COLUMNS}
+    monitor_id = input_id = printer_id = 0
+    shared_printers = [(f'RICOH MP C{3000 + index} PCL 6', f'IP_10.0.{index}.20') for index in range(20)]
+    for device in synthetic_devices(count, seed):
+        hardware_id = device.hardware_id
+        tables['hardware'].append((hardware_id, device.username, device.device_type,
+                                   f'2025-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} 08:00:00',
+                                   rng.randrange(1, 262144)))
+        tables['bios'].append((hardware_id, device.manufacturer, device.model,
+                               device.serial_number, device.dev_type))
+        for monitor in device.monitors:
+            monitor_id += 1
+            tables['monitors'].append((monitor_id, hardware_id, monitor.brand,
+                                       monitor.identifier, monitor.serial_number))
+        # Monitor sin serie y dispositivos de entrada extra, como en los inventarios reales
+        if rng.random() < 0.2:
+            monitor_id += 1
+            tables['monitors'].append((monitor_id, hardware_id, 'Generic PnP', 'Generic PnP Monitor', ''))
+        for input_type in ('Keyboard', 'Pointing', 'Keyboard', 'Pointing'):
+            input_id += 1
+            tables['inputs'].append((input_id, hardware_id, input_type, 'USB Input Device'))
+        # Impresoras virtuales en todos los equipos y alguna de red compartida
+        printers = [('Microsoft Print to PDF', 'PORTPROMPT:'), ('OneNote (Desktop)', 'nul:')]
+        if rng.random() < 0.6:
+            printers.append(rng.choice(shared_printers))
+        for name, port in printers:
+            printer_id += 1
+            tables['printers'].append((printer_id, hardware_id, name, name, port))
+        # Algunos equipos no tienen empleado asignado
+        if rng.random() < 0.95:
+            employee = device.employee
+            tables['usuarios'].append((hardware_id, employee.empresa_usuario, employee.departamento_usuario,
+                                       employee.nombre_completo, employee.cargo_usuario,
+                                       employee.ciudad_usuario, f'usuario{hardware_id:05d}@siatigroup.com'))
+    return tables
+
+
+class SQLiteDatabase:
+    """
+    Sustituto local de ocs_db.OCSDatabase sobre SQLite, con la misma interfaz
+    (query/stream con marcadores %s), para medir la extracción sin servidor MySQL.
+    Con latency se simula el tiempo de ida y vuelta de una base remota.
+    """
+
+    def __init__(self, path=':memory:', latency=0.0):
+        """
+        Args:
+            path (str): Archivo SQLite (por defecto en memoria)
+            latency (float): Segundos de espera por consulta
+        """
+        self.path = path
+        self.latency = latency
+        # Compartida entre los hilos de la extracción concurrente, protegida con un lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def load_tables(self, tables):
+        """Crea las tablas de OCS con sus índices y carga las filas"""
+        with self.connection:
+            for name, rows in tables.items():
+                columns = DUMP_COLUMNS[name]
+                self.connection.execute(f"DROP TABLE IF EXISTS {name}")
+                self.connection.execute(f"CREATE TABLE {name} ({', '.join(columns)})")
+                self.connection.executemany(
+                    f"INSERT INTO {name} VALUES ({', '.join('?' * len(columns))})", rows)
+                key = 'ID' if name == 'hardware' else 'HARDWARE_ID'
+                self.connection.execute(f"CREATE INDEX idx_{name}_{key.lower()} ON {name} ({key})")
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def query(self, sql, params=(), dictionary=True):
+        if self.latency:
+            time.sleep(self.latency)
+        row_type = dict if dictionary else tuple
+        with self._lock:
+            self.queries += 1
+            return [row_type(row) for row in self.connection.execute(sql.replace('%s', '?'), params)]
+
+    def stream(self, sql, batch_size=500, params=(), dictionary=True):
+        row_type = dict if dictionary else tuple
+        with self._lock:
+            self.queries += 1
+            cursor = self.connection.execute(sql.replace('%s', '?'), params)
+        while True:
+            # El lock se toma por lectura y no durante el yield: entre bloques el llamador
+            # hace otras consultas (periféricos) sobre la misma conexión
+            with self._lock:
+                batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield [row_type(row) for row in batch]
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """
+    Memoria residente máxima en MB del proceso (RUSAGE_SELF) o del mayor de sus
+    workers ya terminados (RUSAGE_CHILDREN). No se suman: son máximos de procesos distintos.
+    """
+    usage = resource.getrusage(who).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+def bench_pipeline(template_path, count, seed=1, bulk_extraction=True, concurrency=1, latency=0.0,
+                   employees=False):
+    """
+    Mide por separado la extracción (SQLite local con el esquema de OCS) y la
+    generación de las actas con render_acta, desglosada por etapa con RunMetrics
+
+    Args:
+        template_path (str): Ruta de la plantilla Excel
+        count (int): Dispositivos sintéticos
+        seed (int): Semilla del conjunto de datos
+        bulk_extraction (bool): Consultas por bloques o por dispositivo
+        concurrency (int): Consultas por dispositivo simultáneas (sin bulk_extraction)
+        latency (float): Segundos de latencia simulada por consulta
+        employees (bool): Cargar la tabla usuarios una vez en el directorio de empleados
+            en lugar de consultarla por dispositivo o por bloque
+
+    Returns:
+        dict: Segundos por etapa, dispositivos por segundo, consultas y memoria máxima
+    """
+    db = SQLiteDatabase(latency=latency)
+    db.load_tables(synthetic_tables(count, seed))
+    output_folder = tempfile.mkdtemp(prefix='bench_pipeline_')
+    try:
+        generator = OCSInventoryToExcel(None, template_path, bulk_extraction=bulk_extraction,
+                                        extraction_concurrency=concurrency,
+                                        employees='usuarios' if employees else None, instrument=True)
+        generator.db = db
+
+        start = time.perf_counter()
+        generator.load_employee_directory()
+        devices = generator.get_devices_data()
+        extraction = time.perf_counter() - start
+
+        # Solo las etapas de la generación: se descarta lo registrado en la extracción
+        generator.metrics.drain()
+        start = time.perf_counter()
+        for device, filepath in generator.plan_output_paths(devices, output_folder):
+            generator.render_acta(device, filepath)
+        render = time.perf_counter() - start
+        stages = {name: seconds for name, (seconds, _) in generator.metrics.drain()['stages'].items()}
+    finally:
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+    total = extraction + render
+    return {
+        'devices': len(devices),
+        'bulk_extraction': bulk_extraction,
+        'concurrency': concurrency,
+        'latency_ms': latency * 1000,
+        'employee_directory': employees,
+        'queries': db.queries,
+        'extraction_seconds': extraction,
+        'render_seconds': render,
+        'render_stages': stages,
+        'total_seconds': total,
+        'devices_per_second': len(devices) / total if total else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_children_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def git_revision():
+    """Commit actual del repositorio, para identificar la versión medida"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_result(result, path):
+    """
+    Agrega un resultado al historial (una línea JSON por ejecución) y devuelve
+    la ejecución anterior con la misma flota y configuración, para compararlas
+    """
+    config = ('devices', 'bulk_extraction', 'concurrency', 'latency_ms', 'employee_directory')
+    previous = None
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                entry = json.loads(line)
+                if all(entry.get(key) == result[key] for key in config):
+                    previous = entry
+    entry = dict(result, date=datetime.now().isoformat(timespec='seconds'), revision=git_revision(),
+                 python=sys.version.split()[0])
+    with open(path, 'a', encoding='utf-8') as handle:
+        handle.write(json.dumps(entry) + '\n')
+    return previous
+
+
+def print_pipeline(result, previous=None):
+    """Muestra el resultado por etapa y la variación respecto de la ejecución anterior"""
+    print(f"Extracción: {result['extraction_seconds']:.2f} s ({result['queries']} consultas)")
+    print(f"Actas:      {result['render_seconds']:.2f} s")
+    for name, seconds in result['render_stages'].items():
+        print(f"  {name:<16}{seconds:.2f} s")
+    print(f"Total:      {result['total_seconds']:.2f} s ({result['devices_per_second']:.1f} dispositivos/s)")
+    print(f"Memoria máxima: {result['peak_rss_mb']:.0f} MB (proceso), "
+          f"{result['peak_rss_children_mb']:.0f} MB (mayor worker)")
+    if previous and previous.get('devices_per_second'):
+        change = result['devices_per_second'] / previous['devices_per_second'] - 1
+        print(f"Respecto de {previous.get('revision') or previous.get('date')}: {change:+.1%} dispositivos/s")
+
+
+def bench_render(template_path, devices, render_engine, workers=1):
+    """
+    Mide la generación de actas con un motor de renderizado
+
+    Args:
+        template_path (str): Ruta de la plantilla Excel
+        devices (list): Dispositivos a generar
+        render_engine (str): 'xml' u 'openpyxl'
+        workers (int): Número de procesos
+
+    Returns:
+        dict: Archivos generados, errores, segundos y archivos por segundo
+    """
+    output_folder = tempfile.mkdtemp(prefix=f'bench_{render_engine}_')
+    try:
+        generator = OCSInventoryToExcel(None, template_path, render_engine=render_engine)
+        start = time.perf_counter()
+        jobs = generator.plan_output_paths(devices, output_folder)
+        result = generator.render_jobs(jobs, workers)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+    return {
+        'engine': render_engine,
+        'files': len(result['created']),
+        'errors': len(result['errors']),
+        'seconds': elapsed,
+        'files_per_second': len(result['created']) / elapsed if elapsed else 0.0,
+    }
+
+
+def bench_consolidated(devices, batch_size=500):
+    """
+    Mide la exportación del libro consolidado (modo write_only de openpyxl)
+
+    Args:
+        devices (list): Dispositivos a exportar
+        batch_size (int): Dispositivos por lote
+
+    Returns:
+        dict: Filas escritas, segundos y filas por segundo
+    """
+    output_folder = tempfile.mkdtemp(prefix='bench_consolidado_')
+    try:
+        generator = OCSInventoryToExcel(None, None)
+        batches = (devices[start:start + batch_size] for start in range(0, len(devices), batch_size))
+        start = time.perf_counter()
+        counts = write_consolidated_workbook(batches, os.path.join(output_folder, 'consolidado.xlsx'),
+                                             generator.determine_equipment_type)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+    rows = sum(counts.values())
+    return {
+        'rows': rows,
+        'sheets': len(counts),
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+    }
+
+
+def print_result(result):
+    """Muestra una línea de resultado del benchmark"""
+    print(f"{result['engine']:>10}: {result['files']} archivos en {result['seconds']:.2f} s "
+          f"({result['files_per_second']:.1f} archivos/s, {result['errors']} errores)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de generación de actas con una flota sintética")
+    parser.add_argument('--devices', type=int, default=5000, help="Dispositivos sintéticos a generar")
+    parser.add_argument('--template', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           'plantilla_inventario.xlsx'))
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--openpyxl-limit', type=int, default=200,
+                        help="Máximo de actas para el motor openpyxl (0 = todas); "
+                             "es mucho más lento, así que por defecto se mide sobre una muestra")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Medir extracción, armado y escritura por separado sobre una base SQLite local")
+    parser.add_argument('--per-device', action='store_true',
+                        help="Con --pipeline, extraer con cuatro consultas por dispositivo en lugar de por bloques")
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="Con --per-device, consultas simultáneas (extracción con asyncio)")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Latencia simulada por consulta en milisegundos (base remota)")
+    parser.add_argument('--employee-directory', action='store_true',
+                        help="Con --pipeline, cargar usuarios una sola vez en memoria (directorio de empleados)")
+    parser.add_argument('--results', default='benchmark_results.jsonl',
+                        help="Historial de resultados de --pipeline (una línea JSON por ejecución)")
+    parser.add_argument('--consolidated', action='store_true',
+                        help="Medir también la exportación del libro consolidado por ciudad")
+    args = parser.parse_args()
+
+    if args.pipeline:
+        print(f"Flota sintética en SQLite: {args.devices} dispositivos")
+        result = bench_pipeline(args.template, args.devices, bulk_extraction=not args.per_device,
+                                concurrency=args.concurrency, latency=args.latency / 1000,
+                                employees=args.employee_directory)
+        print_pipeline(result, save_result(result, args.results))
+        sys.exit(0)
+
+    devices = synthetic_devices(args.devices)
+    baseline_devices = devices[:args.openpyxl_limit] if args.openpyxl_limit else devices
+
+    print(f"Flota sintética: {len(devices)} dispositivos")
+    baseline = bench_render(args.template, baseline_devices, 'openpyxl', args.workers)
+    print_result(baseline)
+    cached = bench_render(args.template, devices, 'xml', args.workers)
+    print_result(cached)
+    if baseline['files_per_second']:
+        print(f"Aceleración: {cached['files_per_second'] / baseline['files_per_second']:.1f}x")
+
+    if args.consolidated:
+        consolidated = bench_consolidated(devices)
+        print(f"Consolidado: {consolidated['rows']} filas en {consolidated['sheets']} hojas, "
+              f"{consolidated['seconds']:.2f} s ({consolidated['rows_per_second']:.0f} filas/s)")
@@ -0,0 +1,241 @@
+import json
+import os
+from datetime import datetime
+
+from records import (EMPLOYEE_FIELDS, OPTIONAL_FIELDS, PERIPHERAL_RECORDS, RECORD_FIELDS, SOFTWARE_FIELDS,
+                     SPEC_FIELDS)
+
+
+DEFAULT_MAPPING = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'acta_mapping.json')
+
+_MAPPING_CACHE = {}
+
+# Campos que puede leer una celda según de dónde salen sus datos: el dispositivo (y su
+# empleado), cada fila de un periférico o cada diccionario de 'specs' y 'software'
+DEVICE_MAPPING_FIELDS = RECORD_FIELDS | frozenset(EMPLOYEE_FIELDS)
+SOURCE_FIELDS = {source: frozenset(record._fields) for source, record in PERIPHERAL_RECORDS.items()}
+SOURCE_FIELDS.update(specs=frozenset(SPEC_FIELDS), software=frozenset(SOFTWARE_FIELDS))
+
+
+def resolve_mapping_path(template_path, mapping_path=None):
+    """
+    Archivo de mapeo a usar: el indicado, el JSON con el mismo nombre de la plantilla
+    (p. ej. plantilla_inventario2025.json) o acta_mapping.json
+
+    Returns:
+        str: Ruta del archivo de mapeo
+    """
+    if mapping_path:
+        return mapping_path
+    if template_path:
+        candidate = os.path.splitext(template_path)[0] + '.json'
+        if os.path.exists(candidate):
+            return candidate
+    return DEFAULT_MAPPING
+
+
+def get_mapping(path, accessors):
+    """
+    Devuelve el mapeo compilado de un archivo, compilándolo una sola vez por proceso
+    (se vuelve a compilar si el archivo cambia)
+
+    Args:
+        path (str): Archivo JSON de mapeo
+        accessors (dict): Nombre -> función(dispositivo) para los valores calculados
+    """
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path), tuple(sorted(accessors)))
+    mapping = _MAPPING_CACHE.get(path)
+    if mapping is None or mapping.key != key:
+        with open(path, encoding='utf-8') as handle:
+            mapping = CellMapping(json.load(handle), accessors)
+        mapping.key = key
+        _MAPPING_CACHE[path] = mapping
+    return mapping
+
+
+def _field_value(field, default, source=None):
+    """
+    Función (datos, momento) -> campo de un records.Device (source None), de una fila
+    de sus periféricos (leídos como atributo) o de sus diccionarios de especificaciones
+    y software (leídos con get). Un campo que no existe en esa fuente es un error del
+    mapeo y se rechaza al compilarlo, en lugar de escribir celdas vacías.
+    """
+    fields = DEVICE_MAPPING_FIELDS if source is None else SOURCE_FIELDS.get(source)
+    if fields is None:
+        raise ValueError(f"Fuente de datos desconocida en el mapeo: {source}")
+    if field not in fields:
+        where = 'el dispositivo' if source is None else f"'{source}'"
+        raise ValueError(f"Campo desconocido en el mapeo: {field} (no existe en {where})")
+
+    if source is None and field in EMPLOYEE_FIELDS:
+        def value(data, now):
+            return default if data.employee is None else getattr(data.employee, field)
+    elif source is None and field in OPTIONAL_FIELDS:
+        def value(data, now):
+            # None en un dato opcional equivale a que el dispositivo no lo trae
+            result = getattr(data, field)
+            return default if result is None else result
+    elif source is None or source in PERIPHERAL_RECORDS:
+        def value(data, now):
+            return getattr(data, field)
+    else:
+        def value(data, now):
+            return data.get(field, default)
+    return value
+
+
+def _compile_value(spec, accessors, source=None):
+    """
+    Convierte la especificación de un valor en una función (datos, momento) -> valor
+
+    Formas admitidas:
+        {"field": "nombre_completo", "default": ""}  campo del registro (o clave del diccionario)
+        {"value": "SOPORTE TI"}                      texto fijo
+        {"now": "%d-%m-%Y"}                          fecha/hora de generación
+        {"accessor": "equipment_type"}               función registrada en accessors
+
+    Args:
+        spec (dict): Especificación de la celda
+        accessors (dict): Nombre -> función(dispositivo) para los valores calculados
+        source (str): Lista o diccionario del dispositivo del que salen los datos
+            ('monitors', 'specs', 'software', ...); None para el dispositivo
+    """
+    if 'field' in spec:
+        return _field_value(spec['field'], spec.get('default', ''), source)
+    if 'value' in spec:
+        value = spec['value']
+        return lambda data, now: value
+    if 'now' in spec:
+        fmt = spec['now']
+        return lambda data, now: now.strftime(fmt)
+    if 'accessor' in spec:
+        if spec['accessor'] not in accessors:
+            raise ValueError(f"Función desconocida en el mapeo: {spec['accessor']}")
+        accessor = accessors[spec['accessor']]
+        return lambda data, now: accessor(data)
+    raise ValueError(f"Especificación de celda no válida: {spec}")
+
+
+class CellMapping:
+    """
+    Mapeo declarativo de las celdas del acta (encabezado, tabla de equipos con su tope
+    de filas y filas fijas), compilado una vez en listas de (celda, función). Al generar
+    un acta solo se evalúan las funciones: las coordenadas ya están calculadas.
+    """
+
+    def __init__(self, spec, accessors):
+        """
+        Args:
+            spec (dict): Contenido del archivo de mapeo (ver acta_mapping.json)
+            accessors (dict): Nombre -> función(dispositivo) para los valores calculados
+        """
+        self.spec = spec
+        self.key = None
+        self.header = [(entry['cell'], _compile_value(entry, accessors)) for entry in spec.get('header', [])]
+        # Celdas con la fecha/hora de generación (no forman parte del contenido del acta)
+        self.timestamp_cells = {entry['cell'] for entry in spec.get('header', []) if 'now' in entry}
+        # Celdas con nombre ("name" del encabezado y "named_cells", celdas de la plantilla que
+        # no se escriben), para armar el acta en otros formatos con el mismo diseño (pdf_acta)
+        self.named_cells = dict(spec.get('named_cells', {}))
+        self.named_cells.update((entry['name'], entry['cell']) for entry in spec.get('header', []) if 'name' in entry)
+
+        table = spec['table']
+        self.first_row = table['first_row']
+        self.max_rows = table['max_rows']
+        self.number_column = table.get('number_column')
+        self.columns = columns = table['columns']
+        extra_rows = table.get('extra_rows', [])
+
+        # Coordenadas de cada fila posible: las del tope más las filas fijas a continuación
+        total_rows = self.max_rows + len(extra_rows)
+        self.coordinates = [{name: f'{letter}{self.first_row + index}' for name, letter in columns.items()}
+                            for index in range(total_rows)]
+        self.numbers = [(f'{self.number_column}{self.first_row + index}', str(index + 1))
+                        if self.number_column else None for index in range(total_rows)]
+
+        def compile_row(cells, source=None):
+            return [(name, _compile_value(cells[name], accessors, source)) for name in columns if name in cells]
+
+        self.main = compile_row(table['main'])
+        self.peripherals = [(entry['source'], compile_row(entry['cells'], entry['source']))
+                            for entry in table.get('peripherals', [])]
+        self.extra_rows = [compile_row(cells) for cells in extra_rows]
+
+        # Bloques de celdas con los datos de un diccionario del dispositivo (p. ej. 'specs'),
+        # cada uno con su etiqueta: "PROCESADOR: Intel(R) Core(TM) i7-8700 ..."
+        self.blocks = [(entry['source'], [(cell['cell'], cell.get('label'),
+                                           _compile_value(cell, accessors, entry['source']))
+                                          for cell in entry['cells']])
+                       for entry in spec.get('blocks', [])]
+        self.block_cells = [cell for _, cells in self.blocks for cell, _, _ in cells]
+
+        # Hojas adicionales con una fila por elemento de una lista del dispositivo (p. ej. software)
+        self.sheets = [(entry['title'], entry['source'], [column['header'] for column in entry['columns']],
+                        [_compile_value(column, accessors, entry['source']) for column in entry['columns']])
+                       for entry in spec.get('sheets', [])]
+
+    def build(self, device_data, now=None):
+        """
+        Calcula las celdas del acta de un dispositivo
+
+        Args:
+            device_data (records.Device): Datos del dispositivo y usuario
+            now (datetime): Momento de generación (por defecto, ahora)
+
+        Returns:
+            list: Pares (coordenada, valor) en el orden en que se escriben
+        """
+        now = now or datetime.now()
+        writes = [(cell, value(device_data, now)) for cell, value in self.header]
+
+        def add_row(index, cells, data, numbered):
+            if numbered and self.numbers[index]:
+                writes.append(self.numbers[index])
+            coordinates = self.coordinates[index]
+            for name, value in cells:
+                writes.append((coordinates[name], value(data, now)))
+
+        add_row(0, self.main, device_data, True)
+        index = 1
+        for source, cells in self.peripherals:
+            for item in getattr(device_data, source, None) or ():
+                # Tope de filas de la tabla (los periféricos que no caben se omiten)
+                if index < self.max_rows:
+                    add_row(index, cells, item, True)
+                    index += 1
+        for cells in self.extra_rows:
+            add_row(index, cells, device_data, False)
+            index += 1
+        for source, cells in self.blocks:
+            # El bloque se escribe solo si el dispositivo trae sus datos
+            data = getattr(device_data, source, None)
+            if data is None:
+                continue
+            for cell, label, value in cells:
+                value = value(data, now)
+                writes.append((cell, f"{label}: {value}" if label and value else value))
+        return writes
+
+    def build_sheets(self, device_data, now=None):
+        """
+        Calcula las hojas adicionales del acta de un dispositivo. Una hoja se incluye
+        solo si el dispositivo trae su lista (p. ej. 'software' al extraer el software);
+        las filas del software se arman aquí, al recorrer su software.DeviceSoftware.
+
+        Args:
+            device_data (records.Device): Datos del dispositivo y usuario
+            now (datetime): Momento de generación (por defecto, ahora)
+
+        Returns:
+            list: Pares (título, filas), con los encabezados como primera fila
+        """
+        now = now or datetime.now()
+        sheets = []
+        for title, source, headers, values in self.sheets:
+            items = getattr(device_data, source, None)
+            if items is None:
+                continue
+            rows = [headers] + [[value(item, now) for value in values] for item in items]
+            sheets.append((title, rows))
+        return sheets
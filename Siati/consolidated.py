@@ -0,0 +1,78 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+
+CONSOLIDATED_HEADERS = ['CIUDAD', 'EMPRESA', 'DEPARTAMENTO', 'COLABORADOR', 'CARGO', 'EQUIPO',
+                        'HARDWARE_ID', 'TIPO', 'MARCA', 'MODELO / IDENTIFICADOR', 'SERIE']
+_INVALID_SHEET_CHARS = set('[]:*?/\\')
+
+
+def sheet_title(ciudad):
+    """Nombre de hoja válido para Excel (máximo 31 caracteres, sin []:*?/\\)"""
+    title = "".join(c for c in (ciudad or 'SinCiudad') if c not in _INVALID_SHEET_CHARS).strip()
+    return (title or 'SinCiudad')[:31]
+
+
+def device_rows(device, equipment_type):
+    """
+    Filas del consolidado para un dispositivo: el equipo principal y cada periférico
+
+    Args:
+        device (records.Device): Datos del dispositivo y usuario
+        equipment_type (str): Tipo del equipo principal (CPU, LAPTOP, ...)
+
+    Yields:
+        list: Valores de una fila, en el orden de CONSOLIDATED_HEADERS
+    """
+    base = [device.ciudad_usuario or 'SinCiudad', device.empresa_usuario or '', device.departamento_usuario or '',
+            device.nombre_completo or '', device.cargo_usuario or '', device.username or '', device.hardware_id]
+    yield base + [equipment_type, device.manufacturer or '', device.model or '', device.serial_number or '']
+    for key, label in (('monitors', 'MONITOR'), ('keyboards', 'TECLADO'), ('mice', 'MOUSE'),
+                       ('printers', 'IMPRESORA')):
+        for peripheral in getattr(device, key) or []:
+            yield base + [label, peripheral.brand, peripheral.identifier, peripheral.serial_number]
+
+
+def write_consolidated_workbook(batches, output_path, determine_equipment_type):
+    """
+    Escribe un libro con todos los dispositivos y periféricos, una hoja por ciudad,
+    usando el modo write_only de openpyxl: las filas se escriben a medida que llegan
+    y la memoria no crece con la cantidad de filas
+
+    Args:
+        batches (iterable): Lotes de dispositivos (p. ej. OCSInventoryToExcel.iter_devices)
+        output_path (str): Ruta del archivo xlsx
+        determine_equipment_type (callable): Clasificador del equipo principal
+
+    Returns:
+        dict: Filas escritas por hoja
+    """
+    workbook = Workbook(write_only=True)
+    sheets = {}
+    counts = {}
+    bold = Font(bold=True)
+
+    for batch in batches:
+        for device in batch:
+            title = sheet_title(device.ciudad_usuario or 'SinCiudad')
+            sheet = sheets.get(title)
+            if sheet is None:
+                sheet = workbook.create_sheet(title)
+                header = []
+                for text in CONSOLIDATED_HEADERS:
+                    cell = WriteOnlyCell(sheet, value=text)
+                    cell.font = bold
+                    header.append(cell)
+                sheet.append(header)
+                sheets[title] = sheet
+                counts[title] = 0
+            for row in device_rows(device, determine_equipment_type(device)):
+                sheet.append(row)
+                counts[title] += 1
+
+    if not sheets:
+        # Un libro sin hojas no se puede guardar
+        workbook.create_sheet('SinDatos').append(CONSOLIDATED_HEADERS)
+    workbook.save(output_path)
+    return counts
@@ -0,0 +1,197 @@
+import fnmatch
+from datetime import datetime
+
+
+def _pattern_to_like(pattern):
+    """Convierte un patrón con * y ? al formato de LIKE (% y _, con ! como escape)"""
+    escaped = pattern.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+    return escaped.replace('*', '%').replace('?', '_')
+
+
+def _normalize(value):
+    return (value or '').strip().casefold()
+
+
+def parse_since(value):
+    """
+    Fecha de --changed-since: '2025-06-01' o '2025-06-01 08:00[:00]'
+
+    Returns:
+        datetime: Fecha y hora desde la que se consideran cambiados los equipos
+    """
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip())
+
+
+class DeviceFilter:
+    """
+    Filtros de una generación selectiva. Contra MySQL se traducen a condiciones del
+    WHERE de la consulta de dispositivos, así que solo se leen y generan los equipos
+    pedidos: las columnas del empleado van en una subconsulta a usuarios o, si los
+    empleados vienen de un directorio cargado (Users.csv), se resuelven en él a una
+    lista de HARDWARE_ID. Con volcados o snapshots se aplican en memoria con el mismo
+    criterio.
+    """
+
+    def __init__(self, cities=None, companies=None, departments=None, hardware_ids=None,
+                 hostnames=None, employee_names=None, changed_since=None, emails=None):
+        """
+        Args:
+            cities (list): Ciudades del empleado (usuarios.CIUDAD)
+            companies (list): Empresas del empleado (usuarios.EMPRESA)
+            departments (list): Departamentos del empleado (usuarios.DEPARTAMENTO)
+            hardware_ids (list): HARDWARE_ID de los equipos
+            hostnames (list): Patrones del nombre del equipo (hardware.NAME), con * y ?
+            employee_names (list): Patrones del nombre del empleado (usuarios.NOMBRE), con * y ?
+            changed_since (datetime | str): Solo equipos inventariados desde esa fecha
+                (hardware.LASTDATE)
+            emails (list): Correos del empleado (usuarios.CORREO); en memoria requieren
+                el directorio de empleados
+        """
+        self.cities = list(cities or [])
+        self.companies = list(companies or [])
+        self.departments = list(departments or [])
+        self.hardware_ids = sorted({int(hardware_id) for hardware_id in hardware_ids or []})
+        self.hostnames = list(hostnames or [])
+        self.employee_names = list(employee_names or [])
+        self.changed_since = parse_since(changed_since) if changed_since else None
+        self.emails = list(emails or [])
+        self._resolved = None
+
+    def __bool__(self):
+        return bool(self.hardware_ids or self.hostnames or self.changed_since or self.has_employee_filters())
+
+    def has_employee_filters(self):
+        """True si hay filtros sobre las columnas del empleado"""
+        return bool(self.cities or self.companies or self.departments or self.employee_names or self.emails)
+
+    def employee_ids(self, employees):
+        """
+        HARDWARE_ID de los empleados que cumplen los filtros del empleado, resueltos con
+        los índices del directorio (se calculan una sola vez por directorio)
+
+        Args:
+            employees (employees.EmployeeDirectory): Directorio de empleados cargado
+
+        Returns:
+            set: HARDWARE_ID que cumplen todos los filtros del empleado
+        """
+        if self._resolved is None or self._resolved[0] is not employees:
+            self._resolved = (employees, employees.hardware_ids(
+                cities=self.cities, companies=self.companies, departments=self.departments,
+                names=self.employee_names, emails=self.emails))
+        return self._resolved[1]
+
+    def describe(self):
+        """Texto con los filtros activos, para el registro de la ejecución"""
+        parts = [f"{label}={', '.join(str(value) for value in values)}"
+                 for label, values in (('ciudad', self.cities), ('empresa', self.companies),
+                                       ('departamento', self.departments),
+                                       ('hardware_id', self.hardware_ids), ('equipo', self.hostnames),
+                                       ('empleado', self.employee_names), ('correo', self.emails)) if values]
+        if self.changed_since:
+            parts.append(f"desde={self.changed_since:%Y-%m-%d %H:%M:%S}")
+        return '; '.join(parts)
+
+    def sql(self, alias='h', employees=None):
+        """
+        Condiciones para el WHERE de la consulta de dispositivos
+
+        Args:
+            alias (str): Alias de la tabla hardware en la consulta
+            employees (employees.EmployeeDirectory): Directorio del que vienen los
+                empleados (Users.csv); None = la tabla usuarios de la base
+
+        Returns:
+            tuple: (lista de condiciones, tupla de parámetros %s)
+        """
+        conditions = []
+        params = []
+
+        def add_in(column, values, upper=False):
+            placeholders = ', '.join(['%s'] * len(values))
+            if upper:
+                # Igual que la colación de MySQL: sin distinguir mayúsculas
+                conditions.append(f"UPPER({column}) IN ({placeholders})")
+                params.extend(value.strip().upper() for value in values)
+            else:
+                conditions.append(f"{column} IN ({placeholders})")
+                params.extend(values)
+
+        def add_like(column, patterns):
+            conditions.append('(' + ' OR '.join([f"{column} LIKE %s ESCAPE '!'"] * len(patterns)) + ')')
+            params.extend(_pattern_to_like(pattern) for pattern in patterns)
+
+        if self.hardware_ids:
+            add_in(f'{alias}.ID', self.hardware_ids)
+        if self.hostnames:
+            add_like(f'{alias}.NAME', self.hostnames)
+        if self.changed_since:
+            conditions.append(f"{alias}.LASTDATE >= %s")
+            params.append(f"{self.changed_since:%Y-%m-%d %H:%M:%S}")
+
+        if employees is not None:
+            if self.has_employee_filters():
+                employee_ids = sorted(self.employee_ids(employees))
+                if employee_ids:
+                    add_in(f'{alias}.ID', employee_ids)
+                else:
+                    conditions.append('1 = 0')
+            return conditions, tuple(params)
+
+        # Columnas del empleado: una subconsulta a usuarios (HARDWARE_ID es su clave primaria)
+        employee_conditions = len(conditions)
+        if self.cities:
+            add_in('CIUDAD', self.cities, upper=True)
+        if self.companies:
+            add_in('EMPRESA', self.companies, upper=True)
+        if self.departments:
+            add_in('DEPARTAMENTO', self.departments, upper=True)
+        if self.employee_names:
+            add_like('NOMBRE', self.employee_names)
+        if self.emails:
+            add_in('CORREO', self.emails, upper=True)
+        if len(conditions) > employee_conditions:
+            subquery = ' AND '.join(conditions[employee_conditions:])
+            conditions[employee_conditions:] = [
+                f"{alias}.ID IN (SELECT HARDWARE_ID FROM usuarios WHERE {subquery})"]
+        return conditions, tuple(params)
+
+    def matches(self, device, employees=None):
+        """
+        Aplica los filtros a un dispositivo ya armado (volcados, snapshots)
+
+        Args:
+            device (records.Device): Dispositivo con los datos del empleado agregados
+            employees (employees.EmployeeDirectory): Directorio de empleados, si está
+                cargado (los correos solo se pueden filtrar con él)
+
+        Returns:
+            bool: True si el dispositivo cumple todos los filtros
+        """
+        if self.hardware_ids and device.hardware_id not in set(self.hardware_ids):
+            return False
+        if self.changed_since:
+            # LASTDATE llega como datetime de MySQL o como texto del volcado
+            if str(device.lastdate or '')[:19] < f"{self.changed_since:%Y-%m-%d %H:%M:%S}":
+                return False
+        patterns = [(self.hostnames, 'username')]
+        if employees is not None and self.has_employee_filters():
+            # Con el directorio cargado, los filtros del empleado se resuelven en sus índices
+            if device.hardware_id not in self.employee_ids(employees):
+                return False
+        elif self.emails:
+            # Los dispositivos no traen el correo del empleado
+            return False
+        else:
+            for values, field in ((self.cities, 'ciudad_usuario'), (self.companies, 'empresa_usuario'),
+                                  (self.departments, 'departamento_usuario')):
+                if values and _normalize(getattr(device, field)) not in {_normalize(value) for value in values}:
+                    return False
+            patterns.append((self.employee_names, 'nombre_completo'))
+        for values, field in patterns:
+            if values and not any(fnmatch.fnmatchcase(_normalize(getattr(device, field)), _normalize(pattern))
+                                  for pattern in values):
+                return False
+        return True
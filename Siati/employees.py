@@ -0,0 +1,203 @@
+import csv
+import fnmatch
+import hashlib
+import json
+
+from records import EMPLOYEE_FIELDS, Employee
+
+
+# Datos del empleado que se agregan a cada dispositivo (mismas claves que get_empleado)
+EMPLEADO_FIELDS = EMPLOYEE_FIELDS
+
+USUARIOS_QUERY = """
+    SELECT
+        HARDWARE_ID as hardware_id,
+        EMPRESA as empresa_usuario,
+        DEPARTAMENTO as departamento_usuario,
+        NOMBRE as nombre_completo,
+        CARGO as cargo_usuario,
+        CIUDAD as ciudad_usuario,
+        CORREO as correo
+    FROM usuarios
+    ORDER BY HARDWARE_ID
+    """
+
+# Users.csv no tiene encabezado; sus columnas siguen el orden de la tabla usuarios
+# (HARDWARE_ID, CIUDAD, EMPRESA, AREA, DEPARTAMENTO, CARGO, NOMBRE, CORREO)
+CSV_COLUMNS = ('hardware_id', 'ciudad_usuario', 'empresa_usuario', 'area', 'departamento_usuario',
+               'cargo_usuario', 'nombre_completo', 'correo')
+
+
+def _normalize(value):
+    """Clave de los índices secundarios: sin espacios extremos ni distinción de mayúsculas"""
+    return (value or '').strip().casefold()
+
+
+class EmployeeDirectory:
+    """
+    Directorio de empleados en memoria, cargado una sola vez desde la tabla usuarios,
+    el volcado usuarios.sql o Users.csv. Cada empleado es un records.Employee
+    indexado por HARDWARE_ID, con índices secundarios por ciudad, empresa, departamento
+    y correo para filtrar la flota sin recorrerla.
+    """
+
+    def __init__(self, rows=()):
+        """
+        Args:
+            rows (iterable): Diccionarios con hardware_id, EMPLEADO_FIELDS y correo
+        """
+        self.employees = {}
+        self.by_city = {}
+        self.by_company = {}
+        self.by_department = {}
+        self.by_email = {}
+        for row in rows:
+            self.add(row)
+
+    def add(self, row):
+        """Agrega un empleado; igual que en MySQL, vale la primera fila de cada HARDWARE_ID"""
+        hardware_id = int(row['hardware_id'])
+        if hardware_id in self.employees:
+            return
+        self.employees[hardware_id] = Employee._make(row.get(field) for field in EMPLEADO_FIELDS)
+        self.by_city.setdefault(_normalize(row.get('ciudad_usuario')), []).append(hardware_id)
+        self.by_company.setdefault(_normalize(row.get('empresa_usuario')), []).append(hardware_id)
+        self.by_department.setdefault(_normalize(row.get('departamento_usuario')), []).append(hardware_id)
+        email = _normalize(row.get('correo'))
+        if email:
+            self.by_email.setdefault(email, []).append(hardware_id)
+
+    @classmethod
+    def from_database(cls, db):
+        """
+        Carga la tabla usuarios con una sola consulta
+
+        Args:
+            db (ocs_db.OCSDatabase): Conexión a OCS Inventory
+        """
+        return cls(db.query(USUARIOS_QUERY))
+
+    @classmethod
+    def from_dump(cls, source):
+        """
+        Carga los empleados de un volcado ya leído
+
+        Args:
+            source (ocs_dump.OCSDumpSource): Volcados con la tabla usuarios
+        """
+        if source.tables is None:
+            source.load()
+        usuarios = source.tables['usuarios'].data
+        return cls({'hardware_id': hardware_id, 'empresa_usuario': empresa,
+                    'departamento_usuario': departamento, 'nombre_completo': nombre,
+                    'cargo_usuario': cargo, 'ciudad_usuario': ciudad, 'correo': correo}
+                   for hardware_id, empresa, departamento, nombre, cargo, ciudad, correo in zip(
+                       usuarios['HARDWARE_ID'], usuarios['EMPRESA'], usuarios['DEPARTAMENTO'],
+                       usuarios['NOMBRE'], usuarios['CARGO'], usuarios['CIUDAD'], usuarios['CORREO']))
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+        Carga Users.csv (separado por ';', UTF-8 con BOM, sin encabezado)
+
+        Args:
+            path (str): Ruta del CSV
+        """
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            rows = [dict(zip(CSV_COLUMNS, (value.strip() for value in line)))
+                    for line in csv.reader(handle, delimiter=';') if line and line[0].strip().isdigit()]
+        return cls(rows)
+
+    @classmethod
+    def load(cls, source, db=None):
+        """
+        Carga el directorio según su origen
+
+        Args:
+            source: 'usuarios' (tabla de la base), ruta de Users.csv, un OCSDumpSource
+                o un EmployeeDirectory ya cargado
+            db (ocs_db.OCSDatabase): Conexión, si el origen es la tabla usuarios
+
+        Returns:
+            EmployeeDirectory: Directorio cargado
+        """
+        if isinstance(source, cls):
+            return source
+        if source == 'usuarios':
+            return cls.from_database(db)
+        if isinstance(source, str):
+            return cls.from_csv(source)
+        return cls.from_dump(source)
+
+    def __len__(self):
+        return len(self.employees)
+
+    def __contains__(self, hardware_id):
+        return hardware_id in self.employees
+
+    def get(self, hardware_id):
+        """
+        Datos del empleado asignado a un dispositivo
+
+        Returns:
+            dict: Claves de EMPLEADO_FIELDS, o None si no hay empleado
+        """
+        employee = self.employees.get(hardware_id)
+        return employee.to_dict() if employee is not None else None
+
+    def signature(self):
+        """Hash de los empleados del directorio (cambia si se edita Users.csv o la tabla usuarios)"""
+        payload = json.dumps(sorted(self.employees.items()), default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def find_email(self, email):
+        """HARDWARE_ID de los equipos del empleado con ese correo"""
+        return list(self.by_email.get(_normalize(email), []))
+
+    def hardware_ids(self, cities=None, companies=None, departments=None, names=None, emails=None):
+        """
+        HARDWARE_ID de los empleados que cumplen los filtros indicados
+
+        Args:
+            cities (list): Ciudades (None = todas)
+            companies (list): Empresas (None = todas)
+            departments (list): Departamentos (None = todos)
+            names (list): Patrones del nombre del empleado, con * y ? (None = todos)
+            emails (list): Correos (None = todos)
+
+        Returns:
+            set: HARDWARE_ID que cumplen todos los filtros
+        """
+        selected = None
+        for index, values in ((self.by_city, cities), (self.by_company, companies),
+                              (self.by_department, departments), (self.by_email, emails)):
+            if values:
+                matches = {hardware_id for value in values for hardware_id in index.get(_normalize(value), ())}
+                selected = matches if selected is None else selected & matches
+        if names:
+            patterns = [_normalize(pattern) for pattern in names]
+            candidates = self.employees if selected is None else selected
+            selected = {hardware_id for hardware_id in candidates
+                        if any(fnmatch.fnmatchcase(_normalize(self.employees[hardware_id].nombre_completo), pattern)
+                               for pattern in patterns)}
+        return set(self.employees) if selected is None else selected
+
+    def attach(self, devices):
+        """
+        Agrega los datos del empleado a cada dispositivo
+
+        Args:
+            devices (list): Dispositivos de un lote
+
+        Returns:
+            list: Dispositivos sin empleado en el directorio
+        """
+        unmatched = []
+        for device in devices:
+            employee = self.employees.get(device.hardware_id)
+            if employee is None:
+                unmatched.append(device)
+            else:
+                # El dispositivo comparte el registro del directorio (no se modifica)
+                device.employee = employee
+        return unmatched
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import pickle
+import sqlite3
+import time
+import zlib
+
+
+# Cambiar al modificar la forma de los dispositivos: invalida todas las entradas anteriores
+CACHE_VERSION = 2
+
+# Huella de la tabla hardware: cambia cuando OCS inventaría un equipo o se agrega/elimina uno
+FINGERPRINT_QUERY = "SELECT MAX(LASTDATE) as lastdate, COUNT(*) as devices FROM hardware"
+
+
+def cache_key(*parts):
+    """
+    Clave de una entrada: consulta, parámetros y configuración de la extracción
+
+    Returns:
+        str: Hash SHA-256 en hexadecimal
+    """
+    payload = json.dumps([CACHE_VERSION, *parts], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def database_fingerprint(rows):
+    """Texto comparable de la huella de la tabla hardware (resultado de FINGERPRINT_QUERY)"""
+    row = rows[0] if rows else {}
+    return f"{row.get('lastdate')}|{row.get('devices')}"
+
+
+class ExtractionCache:
+    """
+    Caché en disco (SQLite) de los dispositivos extraídos de OCS Inventory, para volver
+    a generar las actas sin consultar la base de producción. Una entrada deja de valer
+    al vencer su TTL o cuando cambia la huella de la base (LASTDATE máximo y cantidad
+    de equipos de hardware, más el hash de usuarios si de ahí salen los empleados);
+    si el archivo supera su tamaño máximo se eliminan las entradas usadas hace más tiempo. Los dispositivos se guardan uno por fila, así que
+    se pueden escribir y leer por lotes en modo streaming.
+    """
+
+    def __init__(self, path, ttl=3600, max_bytes=512 * 1024 * 1024):
+        """
+        Args:
+            path (str): Archivo SQLite de la caché
+            ttl (float): Segundos de validez de una entrada (None = sin vencimiento)
+            max_bytes (int): Tamaño máximo de los datos guardados
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                fingerprint TEXT,
+                devices INTEGER NOT NULL DEFAULT 0,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                complete INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS devices (
+                key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (key, position)
+            );
+        """)
+
+    def close(self):
+        """Cierra el archivo de la caché"""
+        self.connection.close()
+
+    def lookup(self, key, fingerprint=None):
+        """
+        Indica si hay una entrada válida para la clave; las vencidas, incompletas o con
+        otra huella se eliminan
+
+        Args:
+            key (str): Clave de cache_key
+            fingerprint (str): Huella actual de la base; None si no se pudo consultar
+                (sin conexión solo se valida el TTL)
+
+        Returns:
+            int: Cantidad de dispositivos de la entrada, o None si no hay una válida
+        """
+        row = self.connection.execute(
+            "SELECT created, fingerprint, devices, complete FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        created, stored_fingerprint, devices, complete = row
+        expired = self.ttl is not None and time.time() - created > self.ttl
+        changed = fingerprint is not None and fingerprint != stored_fingerprint
+        if not complete or expired or changed:
+            self.delete(key)
+            return None
+        with self.connection:
+            self.connection.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return devices
+
+    def iter_batches(self, key, batch_size=500):
+        """
+        Lee los dispositivos de una entrada por lotes, en el orden en que se guardaron
+
+        Yields:
+            list: Lote de dispositivos
+        """
+        cursor = self.connection.execute(
+            "SELECT payload FROM devices WHERE key = ? ORDER BY position", (key,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [pickle.loads(zlib.decompress(payload)) for payload, in rows]
+
+    def load(self, key):
+        """Todos los dispositivos de una entrada"""
+        return [device for batch in self.iter_batches(key) for device in batch]
+
+    def begin(self, key, fingerprint):
+        """Empieza (o reemplaza) una entrada; queda incompleta hasta finish"""
+        now = time.time()
+        with self.connection:
+            self.connection.execute("DELETE FROM devices WHERE key = ?", (key,))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (key, created, last_used, fingerprint) VALUES (?, ?, ?, ?)",
+                (key, now, now, fingerprint))
+
+    def append(self, key, devices):
+        """Agrega un lote de dispositivos a una entrada en curso"""
+        start = self.connection.execute(
+            "SELECT devices FROM entries WHERE key = ?", (key,)).fetchone()[0]
+        payloads = [zlib.compress(pickle.dumps(device, pickle.HIGHEST_PROTOCOL))
+                    for device in devices]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO devices (key, position, payload) VALUES (?, ?, ?)",
+                [(key, start + index, payload) for index, payload in enumerate(payloads)])
+            self.connection.execute(
+                "UPDATE entries SET devices = devices + ?, bytes = bytes + ? WHERE key = ?",
+                (len(payloads), sum(len(payload) for payload in payloads), key))
+
+    def finish(self, key):
+        """Marca la entrada como completa y libera espacio si se supera max_bytes"""
+        with self.connection:
+            self.connection.execute("UPDATE entries SET complete = 1 WHERE key = ?", (key,))
+        self.evict(keep=key)
+
+    def store(self, key, fingerprint, devices):
+        """Guarda una extracción completa"""
+        self.begin(key, fingerprint)
+        self.append(key, devices)
+        self.finish(key)
+
+    def delete(self, key):
+        """Elimina una entrada"""
+        with self.connection:
+            self.connection.execute("DELETE FROM devices WHERE key = ?", (key,))
+            self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self, keep=None):
+        """
+        Elimina las entradas usadas hace más tiempo hasta que los datos quepan en max_bytes
+
+        Args:
+            keep (str): Entrada que no se elimina (la recién guardada)
+
+        Returns:
+            list: Claves eliminadas
+        """
+        if self.max_bytes is None:
+            return []
+        total = self.connection.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+        removed = []
+        for key, size in self.connection.execute(
+                "SELECT key, bytes FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.delete(key)
+            removed.append(key)
+            total -= size
+        if removed:
+            self.connection.execute("VACUUM")
+        return removed
@@ -0,0 +1,169 @@
+import re
+
+
+# Unidades que no son almacenamiento propio del equipo
+EXCLUDED_DRIVE_TYPES = ('CD-Rom Drive', 'Network Drive', 'Removable Drive')
+
+_EXCLUDED_DRIVE_TYPES_SQL = ', '.join(f"'{drive_type}'" for drive_type in EXCLUDED_DRIVE_TYPES)
+
+# Una fila por equipo: cada tabla se agrega con GROUP BY en el servidor y se une a hardware,
+# así que todas las especificaciones de un bloque llegan en una sola consulta
+SPECS_QUERY = f"""
+    SELECT
+        h.ID as hardware_id,
+        h.PROCESSORT as processor,
+        h.MEMORY as memory_mb,
+        c.cores, c.logical_cpus,
+        m.modules, m.slots, m.speed,
+        d.volumes, d.disk_mb, d.free_mb,
+        v.gpus
+    FROM hardware h
+    LEFT JOIN (
+        SELECT HARDWARE_ID, SUM(CORES) as cores, SUM(LOGICAL_CPUS) as logical_cpus
+        FROM cpus WHERE HARDWARE_ID IN ({{placeholders}}) GROUP BY HARDWARE_ID
+    ) c ON c.HARDWARE_ID = h.ID
+    LEFT JOIN (
+        SELECT HARDWARE_ID, SUM(CASE WHEN CAPACITY > 0 THEN 1 ELSE 0 END) as modules, COUNT(*) as slots,
+               MAX(CAST(SPEED AS UNSIGNED)) as speed
+        FROM memories WHERE HARDWARE_ID IN ({{placeholders}}) GROUP BY HARDWARE_ID
+    ) m ON m.HARDWARE_ID = h.ID
+    LEFT JOIN (
+        SELECT HARDWARE_ID, COUNT(*) as volumes, SUM(TOTAL) as disk_mb, SUM(FREE) as free_mb
+        FROM drives
+        WHERE HARDWARE_ID IN ({{placeholders}}) AND TOTAL > 0
+        AND TYPE NOT IN ({_EXCLUDED_DRIVE_TYPES_SQL})
+        GROUP BY HARDWARE_ID
+    ) d ON d.HARDWARE_ID = h.ID
+    LEFT JOIN (
+        SELECT HARDWARE_ID, GROUP_CONCAT(DISTINCT NAME) as gpus
+        FROM videos WHERE HARDWARE_ID IN ({{placeholders}}) GROUP BY HARDWARE_ID
+    ) v ON v.HARDWARE_ID = h.ID
+    WHERE h.ID IN ({{placeholders}})
+    """
+
+# Veces que aparece {placeholders} en SPECS_QUERY (los parámetros se repiten igual)
+SPECS_QUERY_BLOCKS = SPECS_QUERY.count('{placeholders}')
+
+# Tablas y columnas de los volcados que se reducen a las especificaciones (specs_from_dump)
+SPECS_DUMP_COLUMNS = {
+    'hardware': ['ID', 'PROCESSORT', 'MEMORY'],
+    'cpus': ['HARDWARE_ID', 'CORES', 'LOGICAL_CPUS'],
+    'memories': ['HARDWARE_ID', 'CAPACITY', 'SPEED'],
+    'drives': ['HARDWARE_ID', 'TYPE', 'TOTAL', 'FREE'],
+    'videos': ['HARDWARE_ID', 'NAME'],
+}
+
+# Sufijo de hardware.PROCESSORT: "... @ 3.20GHz [6 core(s) x86_64]"
+_PROCESSOR_SUFFIX_RE = re.compile(r'\s*\[[^\]]*\]\s*$')
+
+
+def _gigabytes(megabytes):
+    """Texto en GB con hasta un decimal (8192 -> '8 GB', 476164 -> '465 GB')"""
+    value = (megabytes or 0) / 1024
+    text = f"{value:.0f}" if value >= 10 else f"{value:.1f}".rstrip('0').rstrip('.')
+    return f"{text} GB"
+
+
+def _plural(count, singular, plural):
+    return f"{count} {singular if count == 1 else plural}"
+
+
+def summarize(row):
+    """
+    Resumen legible de las especificaciones de un equipo
+
+    Args:
+        row (dict): Fila de SPECS_QUERY (o de specs_from_dump)
+
+    Returns:
+        dict: {'cpu', 'ram', 'disk', 'gpu'} con el texto de cada uno ('' si OCS no lo reporta)
+    """
+    cpu = _PROCESSOR_SUFFIX_RE.sub('', row.get('processor') or '').strip()
+    if cpu and row.get('cores'):
+        # Totales de todas las filas de cpus (las máquinas virtuales reportan una fila por vCPU)
+        threads = row.get('logical_cpus') or row['cores']
+        cpu += f" ({_plural(row['cores'], 'núcleo', 'núcleos')}, {_plural(threads, 'hilo', 'hilos')})"
+
+    ram = ''
+    if row.get('memory_mb'):
+        ram = _gigabytes(row['memory_mb'])
+        details = []
+        if row.get('modules'):
+            slots = row.get('slots') or row['modules']
+            details.append(f"{_plural(row['modules'], 'módulo', 'módulos')} en {slots} ranuras")
+        if row.get('speed'):
+            details.append(f"{row['speed']} MHz")
+        if details:
+            ram += f" ({', '.join(details)})"
+
+    disk = ''
+    if row.get('disk_mb'):
+        disk = f"{_gigabytes(row['disk_mb'])} en {_plural(row['volumes'], 'volumen', 'volúmenes')}"
+        if row.get('free_mb') is not None:
+            disk += f" ({_gigabytes(row['free_mb'])} libres)"
+
+    # Algunos agentes de Linux reportan solo un número como nombre del adaptador
+    gpus = sorted({name.strip() for name in (row.get('gpus') or '').split(',')
+                   if name.strip() and not name.strip().isdigit()})
+    return {'cpu': cpu, 'ram': ram, 'disk': disk, 'gpu': ' / '.join(gpus)}
+
+
+def specs_from_dump(source, hardware_ids=None):
+    """
+    Especificaciones de los equipos leídas de los volcados: las columnas de cpus,
+    memories, drives y videos ya cargadas en la fuente se reducen en memoria, con los
+    mismos totales que SPECS_QUERY calcula con GROUP BY en MySQL
+
+    Args:
+        source (ocs_dump.OCSDumpSource): Volcados de OCS Inventory (las tablas de
+            SPECS_DUMP_COLUMNS se leen con las de las actas si se pidieron antes de cargarlos)
+        hardware_ids (set): Solo estos equipos (None = todos)
+
+    Returns:
+        dict: HARDWARE_ID -> resumen (summarize)
+    """
+    tables = source.load_tables(SPECS_DUMP_COLUMNS)
+    counters = ('cores', 'logical_cpus', 'modules', 'slots', 'speed', 'volumes', 'disk_mb', 'free_mb')
+    rows = {}
+    gpus = {}
+
+    def columns(table):
+        data = tables[table].data
+        selected = zip(*(data[column] for column in SPECS_DUMP_COLUMNS[table]))
+        if hardware_ids is None:
+            return selected
+        return (values for values in selected if values[0] in hardware_ids)
+
+    for hardware_id, processor, memory in columns('hardware'):
+        row = rows[hardware_id] = dict.fromkeys(counters, 0)
+        row['processor'] = processor
+        row['memory_mb'] = memory
+
+    # Las filas de equipos que no están en hardware no tienen resumen
+    for hardware_id, cores, logical_cpus in columns('cpus'):
+        row = rows.get(hardware_id)
+        if row is not None:
+            row['cores'] += cores or 0
+            row['logical_cpus'] += logical_cpus or 0
+    for hardware_id, capacity, speed in columns('memories'):
+        row = rows.get(hardware_id)
+        if row is not None:
+            row['slots'] += 1
+            if (capacity or 0) > 0:
+                row['modules'] += 1
+            speed = str(speed or '').strip()
+            if speed.isdigit():
+                row['speed'] = max(row['speed'], int(speed))
+    for hardware_id, drive_type, total, free in columns('drives'):
+        row = rows.get(hardware_id)
+        if row is not None and (total or 0) > 0 and drive_type not in EXCLUDED_DRIVE_TYPES:
+            row['volumes'] += 1
+            row['disk_mb'] += total
+            row['free_mb'] += free or 0
+    for hardware_id, name in columns('videos'):
+        if name and hardware_id in rows:
+            gpus.setdefault(hardware_id, set()).add(name)
+
+    for hardware_id, names in gpus.items():
+        rows[hardware_id]['gpus'] = ','.join(names)
+    return {hardware_id: summarize(row) for hardware_id, row in rows.items()}
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errorcode, pooling
+
+
+# Errores que suelen resolverse reconectando o reintentando la consulta
+TRANSIENT_ERRORS = {
+    errorcode.CR_CONNECTION_ERROR,
+    errorcode.CR_CONN_HOST_ERROR,
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+    errorcode.ER_LOCK_DEADLOCK,
+    errorcode.ER_LOCK_WAIT_TIMEOUT,
+}
+
+
+# Mensajes de los errores sin código (errno -1) del conector cuando se perdió la conexión
+LOST_CONNECTION_MESSAGES = ('lost connection', 'connection not available',
+                            'connection to mysql is not available')
+
+
+def is_transient(err):
+    """
+    Indica si un error de MySQL es transitorio (conexión caída, bloqueo, pool lleno).
+    Los demás OperationalError/InterfaceError (acceso denegado, base inexistente,
+    errores de sintaxis o de protocolo) no se reintentan.
+    """
+    if isinstance(err, mysql.connector.errors.PoolError):
+        return True
+    errno = getattr(err, 'errno', None)
+    if errno in TRANSIENT_ERRORS:
+        return True
+    if errno in (None, -1) and isinstance(err, (mysql.connector.errors.OperationalError,
+                                                 mysql.connector.errors.InterfaceError)):
+        message = (getattr(err, 'msg', None) or str(err)).lower()
+        return any(lost in message for lost in LOST_CONNECTION_MESSAGES)
+    return False
+
+
+class OCSDatabase:
+    """
+    Acceso a la base de datos de OCS Inventory con un pool de conexiones
+    (mysql.connector.pooling), cursores preparados reutilizados por conexión
+    y reintentos con reconexión ante errores transitorios. Los errores que
+    persisten después de los reintentos se propagan al llamador.
+    """
+
+    def __init__(self, db_config, pool_size=4, retries=3, retry_delay=0.5, pool_name='ocs_inventory'):
+        """
+        Args:
+            db_config (dict): Configuración de la base de datos
+            pool_size (int): Conexiones abiertas en el pool
+            retries (int): Reintentos ante errores transitorios
+            retry_delay (float): Espera inicial entre reintentos (se duplica en cada intento)
+            pool_name (str): Nombre del pool
+        """
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.pool_name = pool_name
+        self.pool = None
+        # Cursores preparados por conexión física: id(conexión) -> {(sql, dictionary): cursor}
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Crea el pool de conexiones (lanza mysql.connector.Error si no es posible)"""
+        self.pool = pooling.MySQLConnectionPool(pool_name=self.pool_name, pool_size=self.pool_size,
+                                                pool_reset_session=False, **self.db_config)
+
+    def close(self):
+        """Cierra los cursores guardados y las conexiones del pool"""
+        with self._lock:
+            for cursors in self._cursors.values():
+                for cursor in cursors.values():
+                    try:
+                        cursor.close()
+                    except mysql.connector.Error:
+                        pass
+            self._cursors.clear()
+        if self.pool is not None:
+            self.pool._remove_connections()
+            self.pool = None
+
+    def query(self, sql, params=(), dictionary=True):
+        """
+        Ejecuta una consulta y devuelve todas sus filas como diccionarios,
+        reintentando ante errores transitorios
+
+        Args:
+            sql (str): Consulta con marcadores %s
+            params (tuple): Parámetros de la consulta
+            dictionary (bool): False para recibir tuplas en el orden del SELECT
+                (para armar registros sin pasar por un diccionario por fila)
+
+        Returns:
+            list: Filas como diccionarios (o tuplas)
+        """
+        return self._with_retry(lambda connection: self._execute(connection, sql, params, dictionary))
+
+    def stream(self, sql, batch_size=500, params=(), dictionary=True):
+        """
+        Ejecuta una consulta en una conexión propia con cursor sin buffer y
+        devuelve las filas por lotes a medida que llegan del servidor.
+        Solo se reintenta la apertura: una caída a mitad de la lectura se propaga.
+
+        Yields:
+            list: Lote de filas como diccionarios (o tuplas, con dictionary=False)
+        """
+        connection = self._with_retry(lambda _: mysql.connector.connect(**self.db_config), use_pool=False)
+        try:
+            cursor = connection.cursor(dictionary=dictionary, buffered=False)
+            cursor.execute(sql, params)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield batch
+            cursor.close()
+        finally:
+            connection.close()
+
+    def _execute(self, connection, sql, params, dictionary=True):
+        """Ejecuta la consulta con el cursor preparado de esa conexión para ese SQL"""
+        key = id(getattr(connection, '_cnx', connection))
+        with self._lock:
+            cursors = self._cursors.setdefault(key, {})
+        cursor = cursors.get((sql, dictionary))
+        if cursor is None:
+            cursor = connection.cursor(prepared=True, dictionary=dictionary)
+            cursors[(sql, dictionary)] = cursor
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def _forget(self, connection):
+        """Descarta los cursores de una conexión que falló"""
+        key = id(getattr(connection, '_cnx', connection))
+        with self._lock:
+            self._cursors.pop(key, None)
+
+    def _with_retry(self, operation, use_pool=True):
+        """Ejecuta operation(conexión) reintentando y reconectando ante errores transitorios"""
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            connection = None
+            try:
+                if use_pool:
+                    if self.pool is None:
+                        self.connect()
+                    connection = self.pool.get_connection()
+                return operation(connection)
+            except mysql.connector.Error as err:
+                if connection is not None:
+                    self._forget(connection)
+                    try:
+                        # Forzar una conexión nueva la próxima vez que se use esta del pool
+                        connection._cnx.disconnect()
+                    except Exception:
+                        pass
+                if attempt == self.retries or not is_transient(err):
+                    raise
+                time.sleep(delay)
+                delay *= 2
+            finally:
+                if use_pool and connection is not None:
+                    connection.close()
@@ -0,0 +1,348 @@
+import re
+import sys
+from array import array
+
+from printers import is_physical_printer, printer_record
+from records import Device, Employee, InputDevice, Monitor
+
+
+# Columnas que se conservan de cada tabla; el resto del volcado se descarta al leerlo
+DUMP_COLUMNS = {
+    'hardware': ['ID', 'NAME', 'OSNAME', 'LASTDATE', 'CHECKSUM'],
+    'bios': ['HARDWARE_ID', 'SMANUFACTURER', 'SMODEL', 'SSN', 'TYPE'],
+    'monitors': ['ID', 'HARDWARE_ID', 'MANUFACTURER', 'CAPTION', 'SERIAL'],
+    'inputs': ['ID', 'HARDWARE_ID', 'TYPE', 'DESCRIPTION'],
+    'printers': ['ID', 'HARDWARE_ID', 'NAME', 'DRIVER', 'PORT'],
+    'usuarios': ['HARDWARE_ID', 'EMPRESA', 'DEPARTAMENTO', 'NOMBRE', 'CARGO', 'CIUDAD', 'CORREO'],
+}
+
+_CREATE_RE = re.compile(r'CREATE TABLE (?:`\w+`\.)?`(\w+)`')
+_INSERT_RE = re.compile(r'INSERT INTO (?:`\w+`\.)?`(\w+)`\s*(?:\(([^)]*)\))?\s*VALUES\s*', re.I)
+_COLUMN_RE = re.compile(r'`(\w+)`')
+_VALUE = r"'(?:[^'\\]|\\.|'')*'|NULL|[-+]?[0-9][0-9.eE+-]*|0x[0-9A-Fa-f]+"
+_TUPLE_RE = re.compile(r"\(\s*(?:(?:%s)\s*(?:,\s*(?:%s)\s*)*)?\)\s*([,;])?" % (_VALUE, _VALUE), re.S)
+_TOKEN_RE = re.compile(_VALUE, re.S)
+_ESCAPE_RE = re.compile(r"\\(.)|''", re.S)
+_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+
+def _unescape(match):
+    char = match.group(1)
+    if char is None:
+        return "'"
+    return _ESCAPES.get(char, char)
+
+
+def _parse_value(token):
+    """Convierte un literal SQL del volcado en un valor de Python"""
+    if token[0] == "'":
+        text = token[1:-1]
+        if '\\' in text or "''" in text:
+            text = _ESCAPE_RE.sub(_unescape, text)
+        return sys.intern(text) if len(text) <= 32 else text
+    if token == 'NULL':
+        return None
+    if token.startswith('0x'):
+        return bytes.fromhex(token[2:])
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def iter_dump_rows(path, tables):
+    """
+    Recorre un volcado SQL (phpMyAdmin/mysqldump) línea por línea, sin cargarlo
+    completo en memoria, y devuelve las filas de las tablas indicadas
+
+    Args:
+        path (str): Ruta del archivo .sql
+        tables (iterable): Nombres de las tablas a leer
+
+    Yields:
+        tuple: (tabla, columnas, valores) por cada fila insertada
+    """
+    tables = set(tables)
+    schemas = {}
+    create_table = None
+    table = columns = None
+    buffer = ''
+
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        for line in handle:
+            if table is None and create_table is not None:
+                if line.startswith(')'):
+                    create_table = None
+                elif line.lstrip().startswith('`'):
+                    schemas[create_table].append(_COLUMN_RE.match(line.lstrip()).group(1))
+                continue
+
+            if table is None:
+                if line.startswith('CREATE TABLE'):
+                    match = _CREATE_RE.match(line)
+                    if match and match.group(1) in tables:
+                        if ') ENGINE' in line:
+                            # Tabla definida en una sola línea (p. ej. usuarios en base.txt)
+                            schemas[match.group(1)] = _inline_columns(line[match.end():])
+                        else:
+                            create_table = match.group(1)
+                            schemas[create_table] = []
+                    continue
+                if not line.startswith('INSERT INTO'):
+                    continue
+                match = _INSERT_RE.match(line)
+                if not match or match.group(1) not in tables:
+                    continue
+                table = match.group(1)
+                columns = _COLUMN_RE.findall(match.group(2)) if match.group(2) else schemas.get(table, [])
+                buffer = line[match.end():]
+            else:
+                # Continuación del INSERT (una tupla por línea, o un texto con saltos de línea)
+                buffer += line
+
+            rows, position, finished = _consume_tuples(buffer)
+            for values in rows:
+                yield table, columns, values
+            if finished:
+                table = None
+                buffer = ''
+            else:
+                buffer = buffer[position:]
+
+
+def _consume_tuples(buffer):
+    """
+    Lee las tuplas completas de un fragmento de INSERT
+
+    Returns:
+        tuple: (lista de valores por fila, posición consumida, True si terminó la sentencia)
+    """
+    rows = []
+    position = 0
+    length = len(buffer)
+    while True:
+        while position < length and buffer[position].isspace():
+            position += 1
+        if position == length:
+            return rows, position, False
+        match = _TUPLE_RE.match(buffer, position)
+        if match is None:
+            # Tupla incompleta: se espera la siguiente línea
+            return rows, position, False
+        rows.append([_parse_value(token) for token in _TOKEN_RE.findall(buffer, match.start() + 1, match.end())])
+        position = match.end()
+        if match.group(1) != ',':
+            return rows, position, True
+
+
+def _inline_columns(definition):
+    """Extrae los nombres de columna de un CREATE TABLE escrito en una sola línea"""
+    body = definition.split('PRIMARY KEY')[0]
+    return re.findall(r'`(\w+)`\s+[A-Za-z]', body)
+
+
+class DumpTable:
+    """
+    Tabla del volcado guardada por columnas (una lista por columna) e indexada
+    por HARDWARE_ID, con solo las columnas necesarias para las actas. Si la tabla
+    está en varios volcados, las filas de cada equipo son las del primero que las trae
+    (OCS vuelve a insertar los periféricos de un equipo con otros ID al inventariarlo).
+    """
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+        self.data = {column: [] for column in columns}
+        self.index = {}
+        self.size = 0
+        self._key = 'ID' if name == 'hardware' else 'HARDWARE_ID'
+        if self._key in self.data:
+            self.data[self._key] = array('l')
+        self._previous = set()
+
+    def begin_file(self):
+        """Empieza otro volcado: los equipos que ya tienen filas no se vuelven a agregar"""
+        self._previous = set(self.index)
+
+    def append(self, source_columns, values):
+        """
+        Agrega una fila a partir de las columnas y valores del INSERT
+
+        Returns:
+            bool: False si el equipo ya tenía filas de un volcado anterior
+        """
+        row = dict(zip(source_columns, values))
+        key = row.get(self._key)
+        if key is not None and int(key) in self._previous:
+            return False
+        for column in self.columns:
+            value = row.get(column)
+            if column == self._key:
+                value = int(value or 0)
+            self.data[column].append(value)
+        if key is not None:
+            self.index.setdefault(int(key), array('l')).append(self.size)
+        self.size += 1
+        return True
+
+    def rows_for(self, hardware_id):
+        """Posiciones de las filas de un HARDWARE_ID"""
+        return self.index.get(hardware_id, ())
+
+    def value(self, column, position):
+        return self.data[column][position]
+
+
+class OCSDumpSource:
+    """
+    Fuente de datos de OCS Inventory que lee los volcados SQL directamente,
+    sin servidor MySQL. Devuelve los dispositivos con la misma forma que
+    OCSInventoryToExcel.get_devices_data.
+    """
+
+    def __init__(self, dump_paths):
+        """
+        Args:
+            dump_paths (list): Archivos .sql a leer (p. ej. ocsweb.sql, usuarios.sql y
+                printers.sql); las filas de cada equipo en una tabla se toman del primero que
+                las trae, así que una tabla en varios volcados no duplica sus filas
+        """
+        self.dump_paths = [dump_paths] if isinstance(dump_paths, str) else list(dump_paths)
+        self.columns = {name: list(columns) for name, columns in DUMP_COLUMNS.items()}
+        self.tables = None
+
+    def require(self, columns):
+        """
+        Agrega tablas o columnas a leer además de las de las actas (software,
+        especificaciones, blacklist_serials). Las que se piden antes de load se leen
+        en la misma pasada; si faltan en las tablas ya leídas, se vuelven a leer.
+
+        Args:
+            columns (dict): Tabla -> columnas
+        """
+        for name, names in columns.items():
+            current = self.columns.setdefault(name, [])
+            missing = [column for column in names if column not in current]
+            if missing:
+                current.extend(missing)
+                self.tables = None
+
+    def load_tables(self, columns):
+        """
+        Tablas de los volcados con al menos las columnas indicadas
+
+        Args:
+            columns (dict): Tabla -> columnas
+
+        Returns:
+            dict: Nombre -> DumpTable
+        """
+        self.require(columns)
+        if self.tables is None:
+            self.load()
+        return self.tables
+
+    def load(self):
+        """Lee los volcados en una sola pasada por archivo"""
+        tables = {name: DumpTable(name, columns) for name, columns in self.columns.items()}
+        for path in self.dump_paths:
+            for table in tables.values():
+                table.begin_file()
+            for table, columns, values in iter_dump_rows(path, tables):
+                tables[table].append(columns, values)
+        self.tables = tables
+        return True
+
+    def get_devices_data(self):
+        """
+        Arma la lista de dispositivos con periféricos y datos del empleado
+
+        Returns:
+            list: Registros records.Device con información de cada dispositivo
+        """
+        if self.tables is None:
+            self.load()
+        devices = list(self._iter_device_rows())
+        for device in devices:
+            self.attach_peripherals(device)
+        return devices
+
+    def iter_devices(self, batch_size=500):
+        """
+        Devuelve los dispositivos por lotes, agregando periféricos a cada lote
+
+        Yields:
+            list: Lote de dispositivos
+        """
+        if self.tables is None:
+            self.load()
+        batch = []
+        for device in self._iter_device_rows():
+            self.attach_peripherals(device)
+            batch.append(device)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _iter_device_rows(self):
+        """Equivalente a DEVICES_QUERY: hardware LEFT JOIN bios, ordenado por nombre"""
+        hardware = self.tables['hardware']
+        bios = self.tables['bios']
+        names = hardware.data['NAME']
+        order = sorted((position for position in range(hardware.size) if names[position]),
+                       key=lambda position: names[position].casefold())
+
+        for position in order:
+            hardware_id = hardware.data['ID'][position]
+            bios_rows = bios.rows_for(hardware_id) or [None]
+            seen = set()
+            for bios_position in bios_rows:
+                if bios_position is None:
+                    values = (None, None, None, None)
+                else:
+                    values = tuple(bios.value(column, bios_position)
+                                   for column in ('SMANUFACTURER', 'SMODEL', 'SSN', 'TYPE'))
+                # SELECT DISTINCT
+                if values in seen:
+                    continue
+                seen.add(values)
+                yield Device(names[position], hardware.data['OSNAME'][position], *values, hardware_id,
+                             hardware.data['LASTDATE'][position], hardware.data['CHECKSUM'][position])
+
+    def attach_peripherals(self, device):
+        """Agrega monitores, teclados, mouse, impresoras y datos del empleado a un dispositivo"""
+        hardware_id = device.hardware_id
+        monitors = self.tables['monitors']
+        inputs = self.tables['inputs']
+        printers = self.tables['printers']
+        usuarios = self.tables['usuarios']
+
+        device.monitors = [
+            Monitor(monitors.value('MANUFACTURER', position), monitors.value('CAPTION', position),
+                    monitors.value('SERIAL', position))
+            for position in sorted(monitors.rows_for(hardware_id), key=lambda p: monitors.value('ID', p))
+            if monitors.value('SERIAL', position)
+        ]
+
+        device.keyboards = []
+        device.mice = []
+        for position in sorted(inputs.rows_for(hardware_id), key=lambda p: inputs.value('ID', p)):
+            input_type = inputs.value('TYPE', position)
+            target = {'Keyboard': device.keyboards, 'Pointing': device.mice}.get(input_type)
+            if target is not None and not target:
+                target.append(InputDevice(input_type, inputs.value('DESCRIPTION', position)))
+
+        device.printers = [
+            printer_record(printers.value('NAME', position), printers.value('DRIVER', position),
+                           printers.value('PORT', position))
+            for position in sorted(printers.rows_for(hardware_id), key=lambda p: printers.value('ID', p))
+            if is_physical_printer(printers.value('NAME', position), printers.value('PORT', position))
+        ]
+
+        empleado = usuarios.rows_for(hardware_id)
+        if empleado:
+            position = empleado[0]
+            device.employee = Employee._make(usuarios.value(column, position)
+                                             for column in ('EMPRESA', 'DEPARTAMENTO', 'NOMBRE', 'CARGO', 'CIUDAD'))
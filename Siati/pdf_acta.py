@@ -0,0 +1,222 @@
+from xml.sax.saxutils import escape
+
+
+# Textos fijos del formato FTI-08 (los mismos de plantilla_inventario.xlsx)
+TITULO = 'ACTA DE ENTREGA-RECEPCIÓN DE EQUIPOS INFORMÁTICOS'
+CODIGO = [('CÓDIGO:', 'FTI-08'), ('VERSIÓN:', '01'), ('FECHA DE VIGENCIA:', '20-06-2024')]
+INTRODUCCION = ('Por medio de la presente, se hace la entrega formal del (los) siguiente (s) '
+                'Equipos Informáticos:')
+CONDICIONES = [
+    '1. El colaborador que recibe, se hace responsable por la adecuada conservación de los equipos '
+    'informáticos entregados para su cuidado, uso correcto y administración.',
+    '2. Cuando administrativamente los equipos informáticos sean trasladados a otra sucursal, el '
+    'colaborador será el responsable de elaborar el acta de entrega-recepción de su traslado a nombre '
+    'del nuevo responsable, realizándose ejemplares para cada una de las partes que intervienen en el '
+    'translado de equipos informáticos.',
+    '3. En caso de robo o cualquier siniestro ocurrido, el custodio del equipo informático, comunicará '
+    'por escrito dentro de las siguientes 24 horas del posterior al suceso ocurrido al Supervisor '
+    'Administrativo y a su Jefe Inmediato, para gestionar la reclamación al Broker de seguros y al '
+    'Departamento de TI para el bloqueo de los accesos a los sistemas.',
+    'En caso de que el siniestro ocurrido sea por pérdida o robo se deberá gestionar la respectiva '
+    'denuncia en la Fiscalía del Estado dentro de las siguientes 48 horas posterior al suceso ocurrido, '
+    'requisito necesario para la notificación del siniestro al Broker de seguros en los casos que se aplica.',
+    'Para constancia, proceden las partes a suscribir la presente Acta de Entrega - Recepción:',
+]
+
+# Encabezado y ancho relativo de cada columna de la tabla del mapeo ('number' es la numeración)
+TABLA_COLUMNAS = {'number': ('No.', 4), 'description': ('DESCRIPCIÓN', 14), 'label': ('ETIQUETA', 9),
+                  'status': ('ESTADO', 15), 'brand': ('MARCA', 12), 'model': ('MODELO', 14),
+                  'serial': ('SERIE', 12), 'notes': ('OBSERVACIONES', 12)}
+
+AZUL = '#002060'
+
+
+def _require_reportlab():
+    """Importa reportlab solo cuando se pide la salida PDF"""
+    try:
+        import reportlab  # noqa: F401
+    except ImportError as err:
+        raise ImportError("La salida PDF requiere reportlab: pip install reportlab") from err
+
+
+def table_columns(mapping):
+    """
+    Columnas de la tabla de equipos del mapeo, en el orden de la plantilla
+
+    Returns:
+        list: Pares (nombre, letra de la columna), con 'number' para la numeración
+    """
+    columns = dict(mapping.columns)
+    if mapping.number_column:
+        columns['number'] = mapping.number_column
+    return sorted(columns.items(), key=lambda item: (len(item[1]), item[1]))
+
+
+def table_rows(cells, mapping):
+    """
+    Filas de la tabla de equipos a partir de las celdas escritas en la plantilla
+
+    Args:
+        cells (dict): Coordenada -> valor (build_cell_writes)
+        mapping (cell_mapping.CellMapping): Mapeo con el que se calcularon las celdas
+
+    Returns:
+        list: Una lista de textos por fila, desde la primera fila de la tabla
+    """
+    # Las filas del tope (la plantilla ya las trae numeradas) y las fijas que se escribieron
+    last_row = mapping.max_rows - 1
+    for index, coordinates in enumerate(mapping.coordinates):
+        if any(coordinate in cells for coordinate in coordinates.values()):
+            last_row = max(last_row, index)
+    columns = table_columns(mapping)
+    rows = []
+    for index in range(last_row + 1):
+        coordinates = mapping.coordinates[index]
+        values = []
+        for name, _ in columns:
+            if name == 'number':
+                coordinate, number = mapping.numbers[index]
+                value = cells.get(coordinate)
+                if value is None and index < mapping.max_rows:
+                    value = number
+            else:
+                value = cells.get(coordinates[name])
+            values.append('' if value is None else str(value))
+        rows.append(values)
+    return rows
+
+
+def render_pdf(writes, target, mapping, logo_path=None, sheets=()):
+    """
+    Genera el acta en PDF con el mismo diseño de la plantilla Excel; las celdas del
+    encabezado, la tabla y las observaciones se ubican con el mapeo
+
+    Args:
+        writes (list): Pares (coordenada, valor) de build_cell_writes
+        target (str | file): Ruta o archivo binario de destino
+        mapping (cell_mapping.CellMapping): Mapeo con el que se calcularon las celdas
+        logo_path (str): Logo para el encabezado (opcional)
+        sheets (list): Hojas adicionales (título, filas), como anexos en páginas nuevas
+    """
+    _require_reportlab()
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    cells = dict(writes)
+
+    def text(name):
+        # Celda con nombre del mapeo (las que el mapeo no define quedan vacías)
+        return escape(str(cells.get(mapping.named_cells.get(name)) or ''))
+
+    azul = colors.HexColor(AZUL)
+
+    normal = ParagraphStyle('normal', fontName='Helvetica', fontSize=7.5, leading=9)
+    negrita = ParagraphStyle('negrita', parent=normal, fontName='Helvetica-Bold')
+    titulo = ParagraphStyle('titulo', parent=negrita, fontSize=11, leading=13, alignment=1)
+    seccion = ParagraphStyle('seccion', parent=negrita, textColor=colors.white, alignment=1)
+    tabla = ParagraphStyle('tabla', parent=normal, fontSize=7, leading=8)
+
+    document = SimpleDocTemplate(target, pagesize=A4, leftMargin=12 * mm, rightMargin=12 * mm,
+                                 topMargin=10 * mm, bottomMargin=10 * mm, title=TITULO)
+    width = document.width
+    grid = [('GRID', (0, 0), (-1, -1), 0.5, colors.black), ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')]
+
+    def banner(label):
+        return Table([[Paragraph(label, seccion)]], colWidths=[width],
+                     style=TableStyle(grid + [('BACKGROUND', (0, 0), (-1, -1), azul)]))
+
+    story = []
+
+    # Encabezado: logo, título y código del formato
+    logo = Image(logo_path, width=40 * mm, height=12.4 * mm) if logo_path else ''
+    codigo = Table([[Paragraph(label, negrita), Paragraph(value, normal)] for label, value in CODIGO],
+                   colWidths=[28 * mm, 18 * mm], style=TableStyle(grid))
+    story.append(Table([[logo, Paragraph(TITULO, titulo), codigo]],
+                       colWidths=[46 * mm, width - 92 * mm, 46 * mm],
+                       style=TableStyle(grid + [('ALIGN', (0, 0), (0, 0), 'CENTER'),
+                                                ('LEFTPADDING', (2, 0), (2, 0), 0),
+                                                ('RIGHTPADDING', (2, 0), (2, 0), 0),
+                                                ('TOPPADDING', (2, 0), (2, 0), 0),
+                                                ('BOTTOMPADDING', (2, 0), (2, 0), 0)])))
+    story.append(Spacer(0, 3 * mm))
+
+    # Datos generales y motivo
+    story.append(banner('DATOS GENERALES'))
+    generales = [
+        [Paragraph('DEPARTAMENTO / ÁREA:', negrita), Paragraph(text('departamento'), normal),
+         Paragraph('FECHA:', negrita), Paragraph(text('fecha'), normal)],
+        [Paragraph('COLABORADOR QUIÉN ENTREGA:', negrita), Paragraph(text('entrega'), normal),
+         Paragraph('HORA:', negrita), Paragraph(text('hora'), normal)],
+        [Paragraph('COLABORADOR QUIÉN RECIBE:', negrita), Paragraph(text('recibe'), normal),
+         Paragraph('EMPRESA A LA QUE PERTENECE:', negrita), Paragraph(text('empresa'), normal)],
+    ]
+    story.append(Table(generales, colWidths=[40 * mm, width - 120 * mm, 40 * mm, 40 * mm],
+                       style=TableStyle(grid)))
+    motivo = [
+        [Paragraph('MOTIVO:', negrita),
+         Paragraph('Ingreso de colaborador', normal), Paragraph(text('motivo_ingreso'), normal),
+         Paragraph('Salida de colaborador', normal), Paragraph(text('motivo_salida'), normal),
+         Paragraph('Cambio', normal), Paragraph(text('motivo_cambio'), normal)],
+        ['', Paragraph('Otros', normal), Paragraph(text('motivo_otros'), normal),
+         Paragraph('¿Cuáles?', normal), Paragraph(text('motivo_cual'), normal), '', ''],
+    ]
+    story.append(Table(motivo, colWidths=[40 * mm] + [(width - 40 * mm) / 6] * 6, style=TableStyle(
+        grid + [('SPAN', (4, 1), (6, 1))])))
+    story.append(Spacer(0, 3 * mm))
+
+    # Detalle de equipos (filas de la tabla del mapeo)
+    story.append(banner('DETALLE DE EQUIPOS INFORMÁTICOS'))
+    story.append(Paragraph(INTRODUCCION, normal))
+    columns = [TABLA_COLUMNAS.get(name, (name.upper(), 12)) for name, _ in table_columns(mapping)]
+    total = sum(weight for _, weight in columns)
+    header = [Paragraph(label, seccion) for label, _ in columns]
+    body = [[Paragraph(escape(value), tabla) for value in row] for row in table_rows(cells, mapping)]
+    story.append(Table([header] + body, colWidths=[width * weight / total for _, weight in columns],
+                       repeatRows=1, style=TableStyle(grid + [('BACKGROUND', (0, 0), (-1, 0), azul)])))
+    story.append(Spacer(0, 2 * mm))
+    story.append(Paragraph('<b>CRITERIOS:</b> TIPO: Equipo Informático. '
+                           'ESTADO: Nuevo, En funcionamiento, No funciona.', normal))
+    story.append(Spacer(0, 2 * mm))
+    # Observaciones generales (los bloques del mapeo, p. ej. las especificaciones del equipo)
+    story.append(banner('OBSERVACIONES GENERALES'))
+    observaciones = [escape(str(cells[cell])) for cell in mapping.block_cells if cells.get(cell)]
+    if observaciones:
+        story.append(Table([[Paragraph('<br/>'.join(observaciones), normal)]], colWidths=[width],
+                           style=TableStyle(grid)))
+    else:
+        story.append(Table([['']], colWidths=[width], rowHeights=[10 * mm], style=TableStyle(grid)))
+    story.append(Spacer(0, 2 * mm))
+
+    # Condiciones
+    story.append(Paragraph('CONDICIONES:', negrita))
+    story.append(Paragraph('Esta Entrega - Recepción se sujeta a las siguientes condiciones:', normal))
+    for paragraph in CONDICIONES:
+        story.append(Paragraph(escape(paragraph), normal))
+    story.append(Spacer(0, 6 * mm))
+
+    # Firmas de quien entrega y quien recibe
+    def firma(label, nombre, cargo):
+        return [Paragraph(label, negrita), Spacer(0, 10 * mm), Paragraph('_' * 40, normal),
+                Paragraph(f'<b>Nombre:</b> {text(nombre)}', normal),
+                Paragraph(f'<b>Cargo:</b> {text(cargo)}', normal)]
+
+    story.append(Table([[firma('Entregué conforme:', 'entrega_nombre', 'entrega_cargo'),
+                         firma('Recibí conforme:', 'recibe_nombre', 'recibe_cargo')]],
+                       colWidths=[width / 2, width / 2]))
+
+    # Anexos (p. ej. software instalado): una tabla por hoja adicional, con el encabezado repetido
+    for title, rows in sheets:
+        if len(rows) < 2:
+            continue
+        story.append(PageBreak())
+        story.append(banner(f'ANEXO: {escape(title)}'))
+        header, body = rows[0], rows[1:]
+        data = [[Paragraph(escape(str(value or '')), negrita) for value in header]]
+        data += [[Paragraph(escape(str(value or '')), tabla) for value in row] for row in body]
+        story.append(Table(data, colWidths=[width / len(header)] * len(header), repeatRows=1,
+                           style=TableStyle(grid + [('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D9E1F2'))])))
+
+    document.build(story)
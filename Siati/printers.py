@@ -0,0 +1,95 @@
+import csv
+import re
+
+from records import Printer
+
+
+# Impresoras virtuales que OCS inventaría en casi todos los equipos (no van en el acta)
+VIRTUAL_PORTS = {'portprompt:', 'nul:', 'ad_port', 'pdfcmon', 'shrfax:', 'pdfarchitect9_port:', 'file:',
+                 'xpsport:'}
+VIRTUAL_NAME_KEYWORDS = ('pdf', 'onenote', 'xps', 'fax', 'anydesk', 'universal print')
+
+_IP_PORT_RE = re.compile(r'^(?:IP_)?(\d{1,3}(?:\.\d{1,3}){3})(?:_\d+)?$', re.I)
+
+SHARED_REPORT_HEADERS = ['IMPRESORA', 'PUERTO', 'DRIVER', 'EQUIPOS', 'CIUDADES', 'NOMBRES_EQUIPO']
+
+
+def is_physical_printer(name, port):
+    """
+    Indica si una fila de la tabla printers es una impresora real
+
+    Args:
+        name (str): printers.NAME
+        port (str): printers.PORT
+
+    Returns:
+        bool: False para impresoras virtuales (PDF, OneNote, XPS, Fax, AnyDesk, ...)
+    """
+    if (port or '').strip().casefold() in VIRTUAL_PORTS:
+        return False
+    lowered = (name or '').casefold()
+    return not any(keyword in lowered for keyword in VIRTUAL_NAME_KEYWORDS)
+
+
+def printer_record(name, driver, port):
+    """Periférico con la forma de monitores/teclados/mouse, más driver y puerto"""
+    return Printer((name or '').split(' ')[0], name, '', driver, port)
+
+
+def printer_key(printer):
+    """
+    Identifica la misma impresora instalada en distintos equipos: por la IP del
+    puerto si es de red (192.168.0.9, IP_192.168.0.9, 192.168.0.9_2) o por su nombre
+
+    Returns:
+        str: Clave de la impresora
+    """
+    match = _IP_PORT_RE.match((printer.port or '').strip())
+    if match:
+        return f"ip:{match.group(1)}"
+    return f"nombre:{(printer.identifier or '').strip().casefold()}"
+
+
+class SharedPrinterReport:
+    """
+    Acumula las impresoras de cada dispositivo, lote por lote, y reporta las que
+    están instaladas en varios equipos
+    """
+
+    def __init__(self, min_hosts=2):
+        """
+        Args:
+            min_hosts (int): Equipos mínimos para considerar compartida una impresora
+        """
+        self.min_hosts = min_hosts
+        self.printers = {}
+
+    def add(self, devices):
+        """Registra las impresoras de un lote de dispositivos"""
+        for device in devices:
+            for printer in device.printers or []:
+                entry = self.printers.setdefault(printer_key(printer), {
+                    'name': printer.identifier, 'port': printer.port,
+                    'driver': printer.driver, 'hosts': set(), 'cities': set()})
+                entry['hosts'].add(device.username)
+                entry['cities'].add(device.ciudad_usuario or 'SinCiudad')
+
+    def rows(self):
+        """
+        Returns:
+            list: Filas del reporte (SHARED_REPORT_HEADERS), de la más a la menos compartida
+        """
+        shared = [entry for entry in self.printers.values() if len(entry['hosts']) >= self.min_hosts]
+        shared.sort(key=lambda entry: (-len(entry['hosts']), entry['name'] or ''))
+        return [[entry['name'], entry['port'], entry['driver'], len(entry['hosts']),
+                 ', '.join(sorted(entry['cities'])), ', '.join(sorted(entry['hosts']))]
+                for entry in shared]
+
+    def write_csv(self, path):
+        """Guarda el reporte como CSV separado por ';' (igual que Users.csv)"""
+        rows = self.rows()
+        with open(path, 'w', newline='', encoding='utf-8-sig') as handle:
+            writer = csv.writer(handle, delimiter=';')
+            writer.writerow(SHARED_REPORT_HEADERS)
+            writer.writerows(rows)
+        return rows
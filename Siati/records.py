@@ -0,0 +1,124 @@
+from collections import namedtuple
+from dataclasses import dataclass
+
+
+# Columnas de DEVICES_QUERY, en el orden en que llegan del cursor
+DEVICE_FIELDS = ('username', 'device_type', 'manufacturer', 'model', 'serial_number', 'dev_type', 'hardware_id',
+                 'lastdate', 'checksum')
+
+# Datos del empleado (mismo orden que employees.EMPLEADO_FIELDS y que get_empleado)
+EMPLOYEE_FIELDS = ('empresa_usuario', 'departamento_usuario', 'nombre_completo', 'cargo_usuario',
+                   'ciudad_usuario')
+
+PERIPHERAL_FIELDS = ('monitors', 'keyboards', 'mice', 'printers')
+
+EXTRA_FIELDS = ('equipment_type', 'extraction_error', 'software', 'specs')
+
+# Datos que se agregan al dispositivo después de la consulta principal (None = no se agregaron)
+OPTIONAL_FIELDS = PERIPHERAL_FIELDS + EXTRA_FIELDS
+
+
+class _Row:
+    """Filas de solo lectura con la conversión a diccionario que usan el hash y los reportes JSON"""
+
+    __slots__ = ()
+
+    def to_dict(self):
+        """Diccionario con las mismas claves que tenía la fila cuando era un dict"""
+        return dict(zip(self._fields, self))
+
+
+class Monitor(_Row, namedtuple('Monitor', ('brand', 'identifier', 'serial_number'))):
+    """Fila de monitors: MANUFACTURER, CAPTION y SERIAL"""
+    __slots__ = ()
+
+
+class InputDevice(_Row, namedtuple('InputDevice', ('brand', 'identifier', 'serial_number'), defaults=('',))):
+    """Fila de inputs: TYPE ('Keyboard' o 'Pointing') y DESCRIPTION; OCS no guarda su serial"""
+    __slots__ = ()
+
+
+class Printer(_Row, namedtuple('Printer', ('brand', 'identifier', 'serial_number', 'driver', 'port'))):
+    """Impresora física con la forma de los demás periféricos, más driver y puerto"""
+    __slots__ = ()
+
+
+class Employee(_Row, namedtuple('Employee', EMPLOYEE_FIELDS)):
+    """Fila de usuarios asignada al dispositivo"""
+    __slots__ = ()
+
+
+# Registro de cada lista de periféricos del dispositivo
+PERIPHERAL_RECORDS = {'monitors': Monitor, 'keyboards': InputDevice, 'mice': InputDevice, 'printers': Printer}
+
+# Claves de los diccionarios de 'specs' (hardware_specs.summarize) y de cada programa de 'software'
+SPEC_FIELDS = ('cpu', 'ram', 'disk', 'gpu')
+SOFTWARE_FIELDS = ('name', 'version', 'publisher')
+
+# Campos que se leen como atributo en Device (los del empleado son propiedades que leen Device.employee)
+RECORD_FIELDS = frozenset(DEVICE_FIELDS + OPTIONAL_FIELDS)
+
+
+def _employee_field(name):
+    """Propiedad de Device con un dato del empleado (None si el equipo no tiene empleado asignado)"""
+    def value(self):
+        return None if self.employee is None else getattr(self.employee, name)
+    value.__name__ = name
+    return property(value)
+
+
+@dataclass(slots=True)
+class Device:
+    """
+    Dispositivo con su bios, periféricos y empleado. Se arma directamente con la tupla
+    de DEVICES_QUERY (Device(*row)) y los datos que se agregan después quedan en None
+    hasta que se asignan. device_type es hardware.OSNAME y dev_type es bios.TYPE
+    (Desktop, Notebook, ...), el que clasifica el equipo.
+
+    Los campos se leen como atributos (device.hardware_id, device.nombre_completo), así un
+    nombre mal escrito falla con AttributeError en lugar de devolver un valor vacío. Los
+    datos del empleado son propiedades que valen None si el equipo no tiene empleado;
+    to_dict da el diccionario que se usaba antes de los registros (hash y reportes JSON).
+    """
+    username: str
+    device_type: str
+    manufacturer: str
+    model: str
+    serial_number: str
+    dev_type: str
+    hardware_id: int
+    lastdate: object
+    checksum: int
+    monitors: list = None
+    keyboards: list = None
+    mice: list = None
+    printers: list = None
+    employee: Employee = None
+    equipment_type: str = None
+    extraction_error: str = None
+    software: object = None  # software.DeviceSoftware: se recorre como lista al generar el acta
+    specs: dict = None
+
+    empresa_usuario = _employee_field('empresa_usuario')
+    departamento_usuario = _employee_field('departamento_usuario')
+    nombre_completo = _employee_field('nombre_completo')
+    cargo_usuario = _employee_field('cargo_usuario')
+    ciudad_usuario = _employee_field('ciudad_usuario')
+
+    def to_dict(self):
+        """
+        Diccionario con las mismas claves (y los periféricos como diccionarios) que tenía
+        como dict: los datos sin asignar y los del empleado ausente no aparecen
+        """
+        data = {key: getattr(self, key) for key in DEVICE_FIELDS}
+        for key in PERIPHERAL_FIELDS:
+            items = getattr(self, key)
+            if items is not None:
+                data[key] = [item.to_dict() if isinstance(item, _Row) else item for item in items]
+        if self.employee is not None:
+            data.update(self.employee.to_dict())
+        for key in EXTRA_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = list(value) if key == 'software' else value
+        return data
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+
+def _json_value(value):
+    """Registros (records.Device, Monitor, ...) con las claves que tenían como diccionario; fechas como texto"""
+    to_dict = getattr(value, 'to_dict', None)
+    return to_dict() if to_dict is not None else str(value)
+
+
+def device_fingerprint(device_data):
+    """
+    Calcula un hash de los datos con los que se genera el acta de un dispositivo
+    (bios, monitores, teclados, mouse y datos del empleado). Es el mismo hash que el
+    del diccionario equivalente, así que el estado guardado antes de los registros sigue valiendo.
+
+    Args:
+        device_data (records.Device): Datos del dispositivo y usuario
+
+    Returns:
+        str: Hash SHA-256 en hexadecimal
+    """
+    payload = json.dumps(device_data, sort_keys=True, default=_json_value, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_signature(path):
+    """Hash del contenido de un archivo (se usa para detectar cambios en la plantilla)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RenderStateStore:
+    """
+    Estado de la última generación de actas guardado en un archivo SQLite.
+    Por cada acta registra el HARDWARE_ID, el LASTDATE/CHECKSUM de la tabla hardware,
+    el hash de los datos usados y la firma de la plantilla con la que se generó, para
+    volver a generar solo lo que cambió.
+    """
+
+    def __init__(self, path):
+        """
+        Abre (o crea) el archivo de estado
+
+        Args:
+            path (str): Ruta del archivo SQLite
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS actas (
+                filepath TEXT PRIMARY KEY,
+                hardware_id INTEGER,
+                lastdate TEXT,
+                checksum TEXT,
+                fingerprint TEXT NOT NULL,
+                template_signature TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_actas_hardware_id ON actas (hardware_id);
+        """)
+        # Los archivos de estado anteriores guardaban una sola firma de plantilla para todas
+        # las actas: sus filas quedan sin firma y se regeneran una vez
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(actas)")}
+        if 'template_signature' not in columns:
+            with self.connection:
+                self.connection.execute("ALTER TABLE actas ADD COLUMN template_signature TEXT")
+
+    def close(self):
+        """Cierra el archivo de estado"""
+        self.connection.close()
+
+    def select_changed(self, jobs, template_signature, extensions=()):
+        """
+        Separa los trabajos cuyas actas deben volver a generarse
+
+        Un acta se regenera si no tiene estado previo, si falta su archivo o el de
+        alguno de sus otros formatos, si cambió LASTDATE/CHECKSUM en hardware, si
+        cambió el hash de sus datos o si se generó con otra plantilla.
+
+        Args:
+            jobs (list): Tuplas (dispositivo, ruta) de plan_output_paths
+            template_signature (str): Firma de la plantilla, el mapeo y los formatos usados
+            extensions (iterable): Otros formatos generados junto a cada acta (p. ej. '.pdf')
+
+        Returns:
+            tuple: (trabajos a generar, cantidad de actas sin cambios)
+        """
+        previous = {
+            filepath: (lastdate, checksum, fingerprint, signature)
+            for filepath, lastdate, checksum, fingerprint, signature in self.connection.execute(
+                "SELECT filepath, lastdate, checksum, fingerprint, template_signature FROM actas")
+        }
+
+        changed = []
+        unchanged = 0
+        for device, filepath in jobs:
+            current = (_as_text(device.lastdate), _as_text(device.checksum), device_fingerprint(device),
+                       template_signature)
+            if previous.get(filepath) == current and _outputs_exist(filepath, extensions):
+                unchanged += 1
+            else:
+                changed.append((device, filepath))
+        return changed, unchanged
+
+    def record(self, jobs, created, template_signature):
+        """
+        Guarda el estado de las actas generadas correctamente y borra el de las que
+        fallaron, para que la siguiente ejecución las vuelva a intentar
+
+        Args:
+            jobs (list): Tuplas (dispositivo, ruta) que se intentaron generar
+            created (list): Rutas que se generaron sin error
+            template_signature (str): Firma de la plantilla, el mapeo y los formatos usados
+        """
+        created = set(created)
+        rows = [
+            (filepath, device.hardware_id, _as_text(device.lastdate), _as_text(device.checksum),
+             device_fingerprint(device), template_signature)
+            for device, filepath in jobs if filepath in created
+        ]
+        failed = [(filepath,) for _, filepath in jobs if filepath not in created]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO actas (filepath, hardware_id, lastdate, checksum, fingerprint, "
+                "template_signature) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.connection.executemany("DELETE FROM actas WHERE filepath = ?", failed)
+
+    def remove_missing(self, current_paths, extensions=()):
+        """
+        Elimina las actas (archivo y estado) de dispositivos que ya no existen
+        o que ahora se generan con otro nombre de archivo
+
+        Args:
+            current_paths (iterable): Rutas de las actas de la ejecución actual
+            extensions (iterable): Otros formatos generados junto a cada acta (p. ej. '.pdf')
+
+        Returns:
+            list: Rutas eliminadas
+        """
+        current_paths = set(current_paths)
+        stale = [filepath for (filepath,) in self.connection.execute("SELECT filepath FROM actas")
+                 if filepath not in current_paths]
+        for filepath in stale:
+            base = os.path.splitext(filepath)[0]
+            for path in [filepath] + [base + extension for extension in extensions]:
+                if os.path.exists(path):
+                    os.remove(path)
+        with self.connection:
+            self.connection.executemany("DELETE FROM actas WHERE filepath = ?", [(path,) for path in stale])
+        return stale
+
+
+def _outputs_exist(filepath, extensions):
+    """Indica si existen el acta y sus archivos en los demás formatos"""
+    base = os.path.splitext(filepath)[0]
+    return all(os.path.exists(path) for path in [filepath] + [base + extension for extension in extensions])
+
+
+def _as_text(value):
+    """Normaliza LASTDATE/CHECKSUM para compararlos con lo guardado en SQLite"""
+    return None if value is None else str(value)
+
+
+class ContentIndex:
+    """
+    Índice del contenido de cada acta (hash de sus celdas sin la fecha/hora de
+    generación) guardado en un archivo SQLite junto a la carpeta de salida. Un acta
+    cuyo contenido no cambió no se vuelve a escribir, aunque cambie la hora.
+    """
+
+    def __init__(self, path):
+        """
+        Abre (o crea) el índice
+
+        Args:
+            path (str): Ruta del archivo SQLite
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS contenido (
+                filepath TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL
+            )
+        """)
+
+    def close(self):
+        """Cierra el índice"""
+        self.connection.close()
+
+    def select_changed(self, jobs, content_hash, extensions=()):
+        """
+        Separa los trabajos cuyo contenido cambió o a los que les falta algún archivo
+
+        Args:
+            jobs (list): Tuplas (dispositivo, ruta) de plan_output_paths
+            content_hash (callable): Función dispositivo -> hash del contenido del acta
+            extensions (iterable): Otros formatos generados junto a cada acta (p. ej. '.pdf')
+
+        Returns:
+            tuple: (trabajos a escribir, {ruta: hash} de esos trabajos, cantidad sin cambios)
+        """
+        previous = dict(self.connection.execute("SELECT filepath, content_hash FROM contenido"))
+        changed = []
+        hashes = {}
+        unchanged = 0
+        for device, filepath in jobs:
+            current = content_hash(device)
+            if previous.get(filepath) == current and _outputs_exist(filepath, extensions):
+                unchanged += 1
+            else:
+                changed.append((device, filepath))
+                hashes[filepath] = current
+        return changed, hashes, unchanged
+
+    def record(self, hashes, created):
+        """
+        Guarda el hash de las actas escritas correctamente
+
+        Args:
+            hashes (dict): {ruta: hash} devuelto por select_changed
+            created (list): Rutas que se generaron sin error
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO contenido (filepath, content_hash) VALUES (?, ?)",
+                [(filepath, hashes[filepath]) for filepath in created if filepath in hashes])
+
+    def prune(self, current_paths):
+        """Quita del índice las rutas que no pertenecen a la ejecución actual"""
+        current_paths = set(current_paths)
+        stale = [(filepath,) for (filepath,) in self.connection.execute("SELECT filepath FROM contenido")
+                 if filepath not in current_paths]
+        with self.connection:
+            self.connection.executemany("DELETE FROM contenido WHERE filepath = ?", stale)
@@ -0,0 +1,162 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+
+# Contexto vacío compartido: con las métricas desactivadas cada etapa cuesta solo un "with"
+_NO_STAGE = nullcontext()
+
+
+class _Stage:
+    """Cronómetro de una etapa; suma el tiempo transcurrido al salir del bloque"""
+
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.add_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class RunMetrics:
+    """
+    Tiempos por etapa y contadores de una ejecución (consultas, filas, bytes escritos,
+    actas creadas), con captura opcional de cProfile o tracemalloc. Desactivado no
+    registra nada y su costo es despreciable.
+    """
+
+    def __init__(self, enabled=False, profile=None):
+        """
+        Args:
+            enabled (bool): Registrar tiempos y contadores
+            profile (str): None, 'cprofile' (funciones más costosas del proceso principal)
+                o 'tracemalloc' (memoria máxima y líneas que más memoria asignan)
+        """
+        self.enabled = enabled
+        self.profile = profile if enabled else None
+        self.stages = {}
+        self.counters = {}
+        self._profiler = None
+        self._started = None
+        # Etapas y contadores también se actualizan desde los hilos de la extracción
+        # concurrente y de las peticiones del servicio de actas
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """Bloque 'with' que suma su duración a la etapa indicada"""
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, name)
+
+    def add_stage(self, name, seconds, calls=1):
+        """Suma seconds y calls a la etapa indicada"""
+        with self._lock:
+            totals = self.stages.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+
+    def count(self, name, amount=1):
+        """Suma amount al contador indicado"""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def drain(self):
+        """Devuelve lo registrado desde la última llamada y lo reinicia (para los workers)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            data = {'stages': self.stages, 'counters': self.counters}
+            self.stages = {}
+            self.counters = {}
+        return data
+
+    def merge(self, data):
+        """Suma lo registrado en otro proceso (resultado de drain)"""
+        if not data:
+            return
+        for name, (seconds, calls) in data['stages'].items():
+            self.add_stage(name, seconds, calls)
+        for name, amount in data['counters'].items():
+            self.count(name, amount)
+
+    def start(self):
+        """Inicia la medición de la ejecución y, si se pidió, el perfilado"""
+        if not self.enabled:
+            return
+        self._started = time.perf_counter()
+        if self.profile == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'tracemalloc':
+            tracemalloc.start()
+
+    def stop(self, profile_path=None):
+        """
+        Detiene la medición
+
+        Args:
+            profile_path (str): Ruta donde guardar el perfil de cProfile (.prof)
+
+        Returns:
+            dict: Resultado del perfilado para el reporte, o None
+        """
+        if not self.enabled:
+            return None
+        self.counters['wall_seconds'] = time.perf_counter() - self._started
+        if self._profiler is not None:
+            self._profiler.disable()
+            if profile_path:
+                self._profiler.dump_stats(profile_path)
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats('cumulative').print_stats(25)
+            self._profiler = None
+            return {'type': 'cprofile', 'file': profile_path, 'top': text.getvalue().splitlines()}
+        if self.profile == 'tracemalloc' and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return {'type': 'tracemalloc', 'peak_bytes': peak,
+                    'top': [str(stat) for stat in snapshot.statistics('lineno')[:15]]}
+        return None
+
+    def report(self, **extra):
+        """
+        Arma el reporte de la ejecución
+
+        Args:
+            **extra: Datos adicionales (carpeta de salida, actas creadas, perfil, ...)
+
+        Returns:
+            dict: Etapas (segundos, llamadas), contadores y archivos por segundo
+        """
+        with self._lock:
+            stages = {name: tuple(totals) for name, totals in self.stages.items()}
+            counters = dict(self.counters)
+        wall = counters.get('wall_seconds', 0.0)
+        created = counters.get('files_created', 0)
+        data = {
+            'stages': {name: {'seconds': round(seconds, 6), 'calls': calls}
+                       for name, (seconds, calls) in sorted(stages.items())},
+            'counters': dict(sorted(counters.items())),
+            'files_per_second': created / wall if wall else 0.0,
+        }
+        data.update(extra)
+        return data
+
+    def write_report(self, path, **extra):
+        """Guarda el reporte como JSON"""
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.report(**extra), handle, indent=2, ensure_ascii=False, default=str)
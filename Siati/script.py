@@ -1,44 +1,254 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
 import mysql.connector
-import pandas as pd
 from openpyxl import load_workbook
-import os
-from datetime import datetime
+
+from acta_service import serve
+from archive_sink import ZipArchiveSink
+from cell_mapping import get_mapping, resolve_mapping_path
+from consolidated import write_consolidated_workbook
+from device_filter import DeviceFilter, parse_since
+from employees import EmployeeDirectory
+from extraction_cache import FINGERPRINT_QUERY, ExtractionCache, cache_key, database_fingerprint
+from hardware_specs import SPECS_DUMP_COLUMNS, SPECS_QUERY, SPECS_QUERY_BLOCKS, specs_from_dump, summarize
+from ocs_db import OCSDatabase
+from ocs_dump import OCSDumpSource
+from pdf_acta import render_pdf
+from printers import SharedPrinterReport, is_physical_printer, printer_record
+from records import Device, Employee, InputDevice, Monitor
+from render_state import ContentIndex, RenderStateStore, file_signature
+from run_metrics import RunMetrics
+from serial_index import BLACKLIST_DUMP_COLUMNS, SerialIndex, load_blacklist
+from software import SOFTWARE_DUMP_COLUMNS, SOFTWARE_QUERY, SoftwareInventory
+from staging import EXTRACT_QUERIES, StagedInventory
+from xlsx_template import get_template
+
+logger = logging.getLogger(__name__)
 
 class OCSInventoryToExcel:
-    def __init__(self, db_config, template_path):
+    def __init__(self, db_config, template_path, bulk_extraction=True, chunk_size=500,
+                 render_engine='xml', data_source=None, pool_size=4, instrument=False, profile=None,
+                 extraction_concurrency=1, output_formats=('xlsx',), logo_path=None, mapping_path=None,
+                 employees=None, device_filter=None, cache_path=None, cache_ttl=3600, cache_max_mb=512,
+                 refresh_cache=False, include_software=False, serial_check=False, include_specs=False):
         """
         Inicializa la clase con configuración de BD y ruta de plantilla
         
         Args:
             db_config (dict): Configuración de la base de datos
             template_path (str): Ruta de la plantilla Excel
+            bulk_extraction (bool): Extraer periféricos y empleados con consultas
+                por bloques (HARDWARE_ID IN (...)) en lugar de una consulta por dispositivo
+            chunk_size (int): Cantidad máxima de HARDWARE_ID por consulta en modo bloque
+            render_engine (str): 'xml' reutiliza la plantilla parseada en memoria y solo
+                reescribe las celdas del acta; 'openpyxl' carga la plantilla en cada acta
+            data_source: Fuente alternativa a MySQL (p. ej. ocs_dump.OCSDumpSource para
+                leer los volcados .sql); si se indica, db_config no se usa
+            pool_size (int): Conexiones del pool de MySQL
+            instrument (bool): Medir tiempos por etapa y contadores, y guardar un reporte
+                JSON junto a la carpeta de salida
+            profile (str): Con instrument, 'cprofile' o 'tracemalloc' para perfilar la ejecución
+            extraction_concurrency (int): Sin bulk_extraction, cantidad de consultas por
+                dispositivo que se ejecutan a la vez (asyncio + hilos); 1 = una tras otra.
+                El pool de MySQL se amplía a este tamaño (máximo 32 conexiones)
+            output_formats (tuple): Formatos de cada acta, 'xlsx' y/o 'pdf' (requiere
+                reportlab); el primero define la extensión de la ruta planificada
+            logo_path (str): Logo del PDF (por defecto logo.png junto a la plantilla)
+            mapping_path (str): Archivo JSON con las celdas del acta (por defecto el JSON
+                con el nombre de la plantilla, o acta_mapping.json)
+            employees: Directorio de empleados que se carga una sola vez al conectar, en lugar
+                de consultar usuarios por dispositivo o por bloque: 'usuarios' (la tabla),
+                ruta de Users.csv o un employees.EmployeeDirectory. None = consultas a usuarios
+            device_filter (device_filter.DeviceFilter): Generar solo los equipos que cumplen
+                los filtros (ciudad, empresa, departamento, HARDWARE_ID, nombres, fecha);
+                contra MySQL se agregan al WHERE de la consulta de dispositivos
+            cache_path (str): Archivo SQLite de la caché de extracción; las ejecuciones
+                siguientes con la misma consulta y configuración leen los dispositivos de
+                ahí en lugar de MySQL (las fuentes sin servidor no la usan)
+            cache_ttl (float): Segundos de validez de la caché (None = sin vencimiento); también
+                se invalida si cambia el LASTDATE máximo o la cantidad de equipos
+            cache_max_mb (int): Tamaño máximo de la caché; se eliminan las entradas usadas
+                hace más tiempo
+            refresh_cache (bool): Ignorar la caché y volver a extraer (se guarda de nuevo)
+            include_software (bool): Extraer el software instalado (software, software_name,
+                software_version) y agregarlo al acta como hoja SOFTWARE
+            serial_check (bool): Indexar los seriales de bios y monitores durante la generación
+                y reportar duplicados, seriales de blacklist_serials y periféricos que
+                cambiaron de equipo desde la ejecución anterior
+            include_specs (bool): Extraer procesador, memoria, almacenamiento y gráficos
+                (cpus, memories, drives, videos y hardware.MEMORY/PROCESSORT) y escribir el
+                bloque de especificaciones en las observaciones del acta
         """
         self.db_config = db_config
         self.template_path = template_path
-        self.connection = None
+        self.db = None
+        self.pool_size = pool_size
+        self.bulk_extraction = bulk_extraction
+        self.chunk_size = chunk_size
+        self.render_engine = render_engine
+        self.data_source = data_source
+        self.last_run = None
+        self.instrument = instrument
+        self.metrics = RunMetrics(instrument, profile)
+        self.extraction_concurrency = extraction_concurrency
+        self.output_formats = tuple(output_formats)
+        self.logo_path = logo_path
+        self.mapping_path = mapping_path
+        self.employees = employees
+        self.employee_directory = None
+        self.device_filter = device_filter or DeviceFilter()
+        self.extraction_cache = (ExtractionCache(cache_path, cache_ttl, cache_max_mb * 1024 * 1024)
+                                 if cache_path else None)
+        self.refresh_cache = refresh_cache
+        self.include_software = include_software
+        self.software_inventory = None
+        self.serial_check = serial_check
+        self.include_specs = include_specs
+        self.hardware_specs = None
         
     def connect_database(self):
         """Conecta a la base de datos MySQL de OCS Inventory"""
+        if self.data_source is not None:
+            # Sin servidor: se leen los volcados SQL, con las tablas opcionales en la misma pasada
+            if isinstance(self.data_source, OCSDumpSource):
+                self.data_source.require(self.dump_columns())
+            self.data_source.load()
+            logger.info("Volcados de OCS Inventory cargados")
+            self.load_employee_directory()
+            self.load_software_inventory()
+            self.load_hardware_specs()
+            return True
         try:
-            self.connection = mysql.connector.connect(**self.db_config)
-            print("Conexión exitosa a la base de datos OCS Inventory")
+            pool_size = max(self.pool_size, min(self.extraction_concurrency, 32))
+            self.db = OCSDatabase(self.db_config, pool_size=pool_size)
+            self.db.connect()
+            logger.info("Conexión exitosa a la base de datos OCS Inventory")
+            self.load_employee_directory()
             return True
         except mysql.connector.Error as err:
-            print(f"Error conectando a la base de datos: {err}")
+            logger.error("Error conectando a la base de datos: %s", err)
+            if self.extraction_cache is not None and not self.refresh_cache:
+                # Sin servidor todavía se puede generar desde la caché (validada solo por TTL)
+                logger.warning("Se usará la caché de extracción si tiene una entrada vigente")
+                self.db = None
+                return True
             return False
     
-    def get_devices_data(self):
+    def load_employee_directory(self):
+        """Carga el directorio de empleados una sola vez, si se indicó su origen"""
+        if self.employee_directory is not None or self.employees is None:
+            return
+        source = self.employees
+        if source == 'usuarios' and self.data_source is not None:
+            # Los volcados ya traen la tabla usuarios
+            source = self.data_source
+        if not isinstance(source, (str, EmployeeDirectory, OCSDumpSource)):
+            # StagedInventory ya une los empleados en la preparación con pandas
+            return
+        with self.metrics.stage('employee_directory'):
+            self.employee_directory = EmployeeDirectory.load(source, self.db)
+        if source == 'usuarios':
+            self.metrics.count('queries')
+            self.metrics.count('rows_fetched', len(self.employee_directory))
+        logger.info("Directorio de empleados: %d empleados", len(self.employee_directory))
+    
+    def dump_columns(self):
         """
-        Extrae información de dispositivos desde OCS Inventory
-        
+        Tablas opcionales de los volcados que usa la ejecución (software, especificaciones,
+        blacklist_serials), para leerlas en la misma pasada que las de las actas
+
         Returns:
-            list: Lista de diccionarios con información de cada dispositivo
+            dict: Tabla -> columnas
         """
-        if not self.connection:
-            print("No hay conexión a la base de datos")
-            return []
-        
-        query = """
+        columns = {}
+        for needed, tables in ((self.include_software, SOFTWARE_DUMP_COLUMNS),
+                               (self.include_specs, SPECS_DUMP_COLUMNS),
+                               (self.serial_check, BLACKLIST_DUMP_COLUMNS)):
+            if needed:
+                for name, names in tables.items():
+                    columns.setdefault(name, []).extend(names)
+        return columns
+    
+    def load_software_inventory(self):
+        """Con volcados, arma el inventario de software una sola vez al conectar"""
+        if not self.include_software or self.software_inventory is not None:
+            return
+        if not isinstance(self.data_source, OCSDumpSource):
+            logger.warning("La fuente de datos no incluye el software instalado; se omite la hoja SOFTWARE")
+            return
+        with self.metrics.stage('software'):
+            self.software_inventory = SoftwareInventory.from_dump(self.data_source)
+        logger.info("Software instalado: %d instalaciones", len(self.software_inventory))
+    
+    def load_hardware_specs(self):
+        """Con volcados, reduce cpus, memories, drives y videos una sola vez al conectar"""
+        if not self.include_specs or self.hardware_specs is not None:
+            return
+        if not isinstance(self.data_source, OCSDumpSource):
+            logger.warning("La fuente de datos no incluye cpus, memories, drives ni videos; "
+                           "se omiten las especificaciones")
+            return
+        with self.metrics.stage('specs'):
+            self.hardware_specs = specs_from_dump(self.data_source)
+        logger.info("Especificaciones de hardware: %d equipos", len(self.hardware_specs))
+    
+    def devices_query(self, device_filter=None):
+        """
+        Consulta principal con los filtros de la ejecución agregados al WHERE
+
+        Args:
+            device_filter (device_filter.DeviceFilter): Otros filtros (por defecto los de la ejecución)
+
+        Returns:
+            tuple: (consulta, parámetros)
+        """
+        device_filter = self.device_filter if device_filter is None else device_filter
+        if not device_filter:
+            return self.DEVICES_QUERY, ()
+        conditions, params = self.filter_conditions(device_filter)
+        where = ''.join(f"\n        AND {condition}" for condition in conditions)
+        query = self.DEVICES_QUERY.replace("\n        ORDER BY h.NAME", f"{where}\n        ORDER BY h.NAME")
+        return query, params
+    
+    def filter_conditions(self, device_filter, alias='h'):
+        """
+        Condiciones del WHERE de un filtro: los filtros del empleado se resuelven en el
+        directorio si los empleados vienen de Users.csv, y con una subconsulta a usuarios
+        si vienen de la tabla
+
+        Returns:
+            tuple: (lista de condiciones, tupla de parámetros %s)
+        """
+        employees = self.employee_directory if self.employees != 'usuarios' else None
+        return device_filter.sql(alias, employees)
+    
+    def filter_source_devices(self, devices):
+        """
+        Agrega los empleados del directorio y aplica los filtros en memoria a los
+        dispositivos de una fuente sin servidor (volcados o snapshot)
+        """
+        self.attach_employees(devices)
+        if self.device_filter:
+            devices = [device for device in devices
+                       if self.device_filter.matches(device, self.employee_directory)]
+        if self.software_inventory is not None:
+            self.software_inventory.attach(devices)
+        if self.hardware_specs is not None:
+            for device in devices:
+                device.specs = self.hardware_specs.get(device.hardware_id) or summarize({})
+        return devices
+    
+    # Dispositivos con su bios; los periféricos y el empleado se agregan después
+    DEVICES_QUERY = """
         SELECT DISTINCT
             h.NAME as username,
             h.OSNAME as device_type,
@@ -46,36 +256,494 @@ class OCSInventoryToExcel:
             b.SMODEL as model,
             b.SSN as serial_number,
             b.TYPE as dev_type,
-            h.ID as hardware_id
+            h.ID as hardware_id,
+            h.LASTDATE as lastdate,
+            h.CHECKSUM as checksum
         FROM hardware h
         LEFT JOIN bios b ON h.ID = b.HARDWARE_ID
         WHERE h.NAME IS NOT NULL AND h.NAME != ''
         ORDER BY h.NAME
         """
+    
+    def get_devices_data(self):
+        """
+        Extrae información de dispositivos desde OCS Inventory
+        
+        Returns:
+            list: Registros records.Device con la información de cada dispositivo
+        """
+        if self.data_source is not None:
+            devices = self.filter_source_devices(self.data_source.get_devices_data())
+            logger.info("Se encontraron %d dispositivos", len(devices))
+            return devices
+        
+        cached = self.lookup_extraction_cache()
+        if cached is not None:
+            key, fingerprint, hit = cached
+            if hit:
+                with self.metrics.stage('cache'):
+                    devices = self.extraction_cache.load(key)
+                logger.info("Se encontraron %d dispositivos (caché de extracción)", len(devices))
+                return devices
+        
+        if not self.db:
+            logger.error("No hay conexión a la base de datos")
+            return []
         
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query)
-            devices = cursor.fetchall()
-            cursor.close()
+            query, params = self.devices_query()
+            with self.metrics.stage('hardware_query'):
+                devices = [Device(*row) for row in self.db.query(query, params, dictionary=False)]
+            self.metrics.count('queries')
+            self.metrics.count('rows_fetched', len(devices))
             
-            # Para cada dispositivo, obtener monitores, teclados y mouse
-            for device in devices:
-                device['monitors'] = self.get_monitors(device['hardware_id'])
-                device['keyboards'] = self.get_keyboards(device['hardware_id'])
-                device['mice'] = self.get_mice(device['hardware_id'])                
-                empleado = self.get_empleado(device['hardware_id'])
-                if empleado and isinstance(empleado, list) and len(empleado) > 0:
-                    device.update(empleado[0])
-                
+            with self.metrics.stage('peripheral_queries'):
+                self.attach_peripherals(devices)
+            
+            # Una extracción con errores no se guarda: la próxima ejecución vuelve a consultar
+            if cached is not None and not any(device.extraction_error for device in devices):
+                with self.metrics.stage('cache'):
+                    self.extraction_cache.store(key, fingerprint, devices)
             
-            print(f"Se encontraron {len(devices)} dispositivos")
+            logger.info("Se encontraron %d dispositivos", len(devices))
             return devices
             
         except mysql.connector.Error as err:
-            print(f"Error ejecutando consulta: {err}")
+            logger.error("Error ejecutando consulta: %s", err)
             return []
     
+    def iter_devices(self, batch_size=500):
+        """
+        Extrae los dispositivos por lotes a medida que llegan del servidor, sin
+        cargar toda la flota en memoria. La consulta principal usa una conexión
+        propia con cursor sin buffer (las filas se leen del servidor con fetchmany),
+        y los periféricos de cada lote se consultan por el pool de conexiones.
+        
+        Args:
+            batch_size (int): Cantidad de dispositivos por lote
+            
+        Yields:
+            list: Lote de dispositivos con la misma forma que get_devices_data
+        """
+        if self.data_source is not None:
+            for batch in self.data_source.iter_devices(batch_size):
+                batch = self.filter_source_devices(batch)
+                if batch:
+                    yield batch
+            return
+        
+        cached = self.lookup_extraction_cache()
+        storing = False
+        if cached is not None:
+            key, fingerprint, hit = cached
+            if hit:
+                total = 0
+                for batch in self.extraction_cache.iter_batches(key, batch_size):
+                    total += len(batch)
+                    yield batch
+                logger.info("Se procesaron %d dispositivos (caché de extracción)", total)
+                return
+        
+        if not self.db:
+            logger.error("No hay conexión a la base de datos")
+            return
+        
+        if cached is not None:
+            # Se guarda lote por lote; si la ejecución se interrumpe la entrada queda incompleta
+            self.extraction_cache.begin(key, fingerprint)
+            storing = True
+        
+        total = 0
+        query, params = self.devices_query()
+        rows = self.db.stream(query, batch_size, params, dictionary=False)
+        self.metrics.count('queries')
+        while True:
+            # Las filas llegan del servidor a medida que se leen: se mide cada lectura
+            with self.metrics.stage('hardware_query'):
+                batch = next(rows, None)
+            if batch is None:
+                break
+            batch = [Device(*row) for row in batch]
+            self.metrics.count('rows_fetched', len(batch))
+            with self.metrics.stage('peripheral_queries'):
+                self.attach_peripherals(batch)
+            if storing:
+                with self.metrics.stage('cache'):
+                    if any(device.extraction_error for device in batch):
+                        self.extraction_cache.delete(key)
+                        storing = False
+                    else:
+                        self.extraction_cache.append(key, batch)
+            total += len(batch)
+            yield batch
+        if storing:
+            with self.metrics.stage('cache'):
+                self.extraction_cache.finish(key)
+        logger.info("Se procesaron %d dispositivos", total)
+    
+    def lookup_extraction_cache(self):
+        """
+        Busca la extracción actual en la caché. La huella de la tabla hardware (una
+        consulta mínima) invalida la entrada si algún equipo se volvió a inventariar, y
+        la de usuarios si se reasignó un equipo; sin conexión solo se valida el TTL.
+        
+        Returns:
+            tuple: (clave, huella, hay entrada vigente), o None si no hay caché configurada
+        """
+        if self.extraction_cache is None:
+            return None
+        query, params = self.devices_query()
+        server = {name: (self.db_config or {}).get(name) for name in ('host', 'port', 'database')}
+        key = cache_key(query, params, server, self.employees_cache_key(), self.include_software,
+                        self.include_specs)
+        
+        fingerprint = None
+        if self.db:
+            try:
+                fingerprint = database_fingerprint(self._query(FINGERPRINT_QUERY))
+                if self.employees is None or self.employees == 'usuarios':
+                    # Los dispositivos se guardan con el empleado: reasignar un equipo en usuarios
+                    # no cambia hardware, así que la tabla también forma parte de la huella
+                    directory = self.employee_directory or EmployeeDirectory.from_database(self.db)
+                    fingerprint += f"|{directory.signature()}"
+            except mysql.connector.Error as err:
+                logger.warning("No se pudo validar la caché de extracción: %s", err)
+        if self.refresh_cache:
+            return key, fingerprint, False
+        with self.metrics.stage('cache'):
+            devices = self.extraction_cache.lookup(key, fingerprint)
+        self.metrics.count('cache_hits' if devices is not None else 'cache_misses')
+        return key, fingerprint, devices is not None
+    
+    def employees_cache_key(self):
+        """
+        Origen de los empleados en la clave de la caché de extracción. Users.csv y un
+        directorio ya cargado entran con el hash de su contenido, así que editarlos
+        invalida la entrada también sin conexión; la tabla usuarios se valida con la
+        huella de la base (lookup_extraction_cache)
+        """
+        if self.employees is None or self.employees == 'usuarios':
+            return self.employees
+        if isinstance(self.employees, str):
+            return [self.employees, file_signature(self.employees)]
+        return ['directorio', self.employees.signature()]
+    
+    def attach_peripherals(self, devices):
+        """
+        Agrega periféricos y datos del empleado a los dispositivos, según el modo de extracción.
+        Si una consulta falla después de los reintentos, el dispositivo queda marcado con
+        'extraction_error' y no se genera su acta (en lugar de generarla sin periféricos).
+        """
+        if self.bulk_extraction:
+            # Obtener monitores, teclados, mouse y empleados de todos los dispositivos a la vez
+            self.attach_peripherals_bulk(devices)
+        elif self.extraction_concurrency > 1:
+            # Consultas por dispositivo, varias en curso a la vez
+            self.attach_peripherals_concurrent(devices)
+            self.attach_printers(devices)
+        else:
+            # Para cada dispositivo, obtener monitores, teclados y mouse
+            for device in devices:
+                try:
+                    device.monitors = self.get_monitors(device.hardware_id)
+                    device.keyboards = self.get_keyboards(device.hardware_id)
+                    device.mice = self.get_mice(device.hardware_id)
+                    empleado = self.get_empleado(device.hardware_id) if self.employee_directory is None else None
+                except mysql.connector.Error as err:
+                    device.extraction_error = str(err)
+                    continue
+                if empleado:
+                    device.employee = empleado[0]
+            self.attach_printers(devices)
+        self.attach_employees(devices)
+        if self.include_software:
+            self.attach_software(devices)
+        if self.include_specs:
+            self.attach_specs(devices)
+    
+    def attach_employees(self, devices):
+        """Agrega los datos del empleado desde el directorio en memoria, si está cargado"""
+        if self.employee_directory is not None:
+            self.employee_directory.attach(devices)
+    
+    def attach_printers(self, devices):
+        """
+        Agrega las impresoras físicas en los modos por dispositivo con las consultas por
+        bloques, sin sumar una consulta más por dispositivo
+        """
+        failures = {}
+        printers = self.get_printers_bulk(list(dict.fromkeys(device.hardware_id for device in devices)), failures)
+        for device in devices:
+            hardware_id = device.hardware_id
+            if hardware_id in failures and device.extraction_error is None:
+                device.extraction_error = failures[hardware_id]
+            device.printers = list(printers.get(hardware_id, []))
+    
+    def attach_software(self, devices):
+        """
+        Agrega el software instalado de los dispositivos con consultas por bloques
+        (en todos los modos de extracción: por dispositivo serían cientos de filas por consulta)
+        """
+        failures = {}
+        software = self.get_software_bulk(list(dict.fromkeys(device.hardware_id for device in devices)), failures)
+        software.attach(devices)
+        for device in devices:
+            if device.hardware_id in failures and device.extraction_error is None:
+                device.extraction_error = failures[device.hardware_id]
+    
+    def attach_specs(self, devices):
+        """
+        Agrega el resumen de especificaciones ('specs') de los dispositivos: una consulta
+        por bloque agrega las cuatro tablas en el servidor, en todos los modos de extracción
+        """
+        failures = {}
+        specs = self.get_specs_bulk(list(dict.fromkeys(device.hardware_id for device in devices)), failures)
+        for device in devices:
+            hardware_id = device.hardware_id
+            if hardware_id in failures and device.extraction_error is None:
+                device.extraction_error = failures[hardware_id]
+            device.specs = specs.get(hardware_id) or summarize({})
+    
+    def attach_peripherals_concurrent(self, devices):
+        """
+        Agrega periféricos y datos del empleado con las mismas consultas por dispositivo,
+        pero con hasta extraction_concurrency consultas en curso a la vez. Con una base
+        remota el tiempo lo domina la latencia de red, no el servidor, así que solaparlas
+        reduce el tiempo total casi en proporción a la concurrencia.
+        
+        Args:
+            devices (list): Dispositivos devueltos por la consulta de hardware/bios
+        """
+        with ThreadPoolExecutor(max_workers=self.extraction_concurrency,
+                                thread_name_prefix='ocs_extraccion') as executor:
+            asyncio.run(self._attach_peripherals_async(devices, executor))
+    
+    async def _attach_peripherals_async(self, devices, executor):
+        """Lanza las consultas de todos los dispositivos y espera a que terminen"""
+        loop = asyncio.get_running_loop()
+        
+        async def lookup(method, hardware_id):
+            # El conector de MySQL es bloqueante: cada consulta corre en un hilo del executor
+            return await loop.run_in_executor(executor, method, hardware_id)
+        
+        async def attach(device):
+            hardware_id = device.hardware_id
+            lookups = [self.get_monitors, self.get_keyboards, self.get_mice]
+            if self.employee_directory is None:
+                lookups.append(self.get_empleado)
+            try:
+                monitors, keyboards, mice, *empleado = await asyncio.gather(
+                    *(lookup(method, hardware_id) for method in lookups))
+            except mysql.connector.Error as err:
+                device.extraction_error = str(err)
+                return
+            device.monitors = monitors
+            device.keyboards = keyboards
+            device.mice = mice
+            if empleado and empleado[0]:
+                device.employee = empleado[0][0]
+        
+        await asyncio.gather(*(attach(device) for device in devices))
+    
+    def attach_peripherals_bulk(self, devices):
+        """
+        Agrega monitores, teclados, mouse, impresoras y datos del empleado a cada dispositivo
+        usando pocas consultas por bloques en lugar de cinco consultas por dispositivo.
+        El resultado tiene la misma forma que el modo por dispositivo.
+        
+        Args:
+            devices (list): Dispositivos devueltos por la consulta de hardware/bios
+        """
+        hardware_ids = list(dict.fromkeys(device.hardware_id for device in devices))
+        
+        failures = {}
+        monitors = self.get_monitors_bulk(hardware_ids, failures)
+        keyboards, mice = self.get_inputs_bulk(hardware_ids, failures)
+        printers = self.get_printers_bulk(hardware_ids, failures)
+        empleados = self.get_empleados_bulk(hardware_ids, failures) if self.employee_directory is None else {}
+        
+        for device in devices:
+            hardware_id = device.hardware_id
+            if hardware_id in failures:
+                device.extraction_error = failures[hardware_id]
+            device.monitors = list(monitors.get(hardware_id, []))
+            device.keyboards = list(keyboards.get(hardware_id, []))
+            device.mice = list(mice.get(hardware_id, []))
+            device.printers = list(printers.get(hardware_id, []))
+            empleado = empleados.get(hardware_id)
+            if empleado:
+                device.employee = empleado[0]
+    
+    def _chunks(self, hardware_ids):
+        """Divide la lista de HARDWARE_ID en bloques de tamaño chunk_size"""
+        for start in range(0, len(hardware_ids), self.chunk_size):
+            yield hardware_ids[start:start + self.chunk_size]
+    
+    def _fetch_grouped(self, query, hardware_ids, record, failures=None):
+        """
+        Ejecuta una consulta con filtro HARDWARE_ID IN (...) por bloques y agrupa
+        las filas por HARDWARE_ID
+        
+        Args:
+            query (str): Consulta con el marcador {placeholders} y hardware_id como primera columna
+            hardware_ids (list): Identificadores de hardware a consultar
+            record (callable): Arma el registro con la tupla de las demás columnas, en el orden
+                del SELECT (p. ej. records.Monitor._make); las filas llegan como tuplas, sin diccionarios
+            failures (dict): Si se indica, un bloque que falla no detiene la extracción:
+                sus HARDWARE_ID se registran aquí con el mensaje de error
+            
+        Returns:
+            dict: HARDWARE_ID -> lista de registros
+        """
+        grouped = {}
+        for rows in self._query_chunks(query, hardware_ids, failures, dictionary=False):
+            for row in rows:
+                grouped.setdefault(row[0], []).append(record(row[1:]))
+        return grouped
+    
+    def _query_chunks(self, query, hardware_ids, failures=None, repeat=1, dictionary=True):
+        """
+        Ejecuta una consulta con filtro HARDWARE_ID IN (...) por bloques
+        
+        Args:
+            query (str): Consulta con el marcador {placeholders}
+            hardware_ids (list): Identificadores de hardware a consultar
+            failures (dict): Si se indica, los HARDWARE_ID de un bloque que falla se registran
+                aquí con el mensaje de error y se sigue con el siguiente bloque
+            repeat (int): Veces que aparece {placeholders} en la consulta
+            dictionary (bool): False para recibir las filas como tuplas
+            
+        Yields:
+            list: Filas de cada bloque
+        """
+        for chunk in self._chunks(hardware_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            try:
+                rows = self._query(query.format(placeholders=placeholders), tuple(chunk) * repeat, dictionary)
+            except mysql.connector.Error as err:
+                if failures is None:
+                    raise
+                for hardware_id in chunk:
+                    failures.setdefault(hardware_id, str(err))
+                continue
+            yield rows
+    
+    def _query(self, sql, params=(), dictionary=True):
+        """Ejecuta una consulta auxiliar contando consultas y filas leídas"""
+        rows = self.db.query(sql, params, dictionary)
+        self.metrics.count('queries')
+        self.metrics.count('rows_fetched', len(rows))
+        return rows
+    
+    def get_monitors_bulk(self, hardware_ids, failures=None):
+        """Obtiene los monitores de varios dispositivos agrupados por HARDWARE_ID"""
+        query = """
+        SELECT 
+            HARDWARE_ID as hardware_id,
+            MANUFACTURER as brand,
+            CAPTION as identifier,
+            SERIAL as serial_number
+        FROM monitors 
+        WHERE HARDWARE_ID IN ({placeholders})
+        AND SERIAL IS NOT NULL 
+        AND SERIAL != ''
+        ORDER BY HARDWARE_ID, ID
+        """
+        return self._fetch_grouped(query, hardware_ids, Monitor._make, failures)
+    
+    def get_inputs_bulk(self, hardware_ids, failures=None):
+        """
+        Obtiene teclados y mouse de varios dispositivos en una sola consulta.
+        Igual que get_keyboards/get_mice, se conserva solo el primero de cada tipo.
+        
+        Returns:
+            tuple: (teclados, mouse), cada uno HARDWARE_ID -> lista con una fila
+        """
+        query = """
+        SELECT 
+            HARDWARE_ID as hardware_id,
+            TYPE as brand,
+            DESCRIPTION as identifier,
+            '' as serial_number
+        FROM inputs 
+        WHERE HARDWARE_ID IN ({placeholders}) AND TYPE IN ('Keyboard', 'Pointing')
+        ORDER BY HARDWARE_ID, ID
+        """
+        keyboards = {}
+        mice = {}
+        for rows in self._query_chunks(query, hardware_ids, failures, dictionary=False):
+            for hardware_id, brand, identifier, serial_number in rows:
+                target = keyboards if brand == 'Keyboard' else mice
+                # El registro se arma solo para la fila que se conserva
+                if hardware_id not in target:
+                    target[hardware_id] = [InputDevice(brand, identifier, serial_number)]
+        return keyboards, mice
+    
+    def get_printers_bulk(self, hardware_ids, failures=None):
+        """
+        Obtiene las impresoras físicas de varios dispositivos agrupadas por HARDWARE_ID
+        (se descartan las virtuales: PDF, OneNote, XPS, Fax, AnyDesk, ...)
+        """
+        query = """
+        SELECT 
+            HARDWARE_ID as hardware_id,
+            NAME as name,
+            DRIVER as driver,
+            PORT as port
+        FROM printers 
+        WHERE HARDWARE_ID IN ({placeholders})
+        ORDER BY HARDWARE_ID, ID
+        """
+        printers = {}
+        for rows in self._query_chunks(query, hardware_ids, failures, dictionary=False):
+            for hardware_id, name, driver, port in rows:
+                if is_physical_printer(name, port):
+                    printers.setdefault(hardware_id, []).append(printer_record(name, driver, port))
+        return printers
+    
+    def get_software_bulk(self, hardware_ids, failures=None):
+        """
+        Obtiene el software instalado de varios dispositivos (software unida a
+        software_name, software_version y software_publisher)
+        
+        Returns:
+            software.SoftwareInventory: Instalaciones con los textos internados
+        """
+        inventory = SoftwareInventory()
+        query = SOFTWARE_QUERY.format(where="WHERE s.HARDWARE_ID IN ({placeholders})")
+        for rows in self._query_chunks(query, hardware_ids, failures):
+            inventory.add_rows(rows)
+        return inventory
+    
+    def get_specs_bulk(self, hardware_ids, failures=None):
+        """
+        Obtiene el resumen de especificaciones de varios dispositivos (cpus, memories,
+        drives y videos agregados con GROUP BY y unidos a hardware en una sola consulta)
+        
+        Returns:
+            dict: HARDWARE_ID -> {'cpu', 'ram', 'disk', 'gpu'}
+        """
+        specs = {}
+        for rows in self._query_chunks(SPECS_QUERY, hardware_ids, failures, SPECS_QUERY_BLOCKS):
+            for row in rows:
+                specs[row['hardware_id']] = summarize(row)
+        return specs
+    
+    def get_empleados_bulk(self, hardware_ids, failures=None):
+        """Obtiene los datos de empleado de varios dispositivos agrupados por HARDWARE_ID"""
+        query = """
+        SELECT 
+            HARDWARE_ID as hardware_id,
+            EMPRESA as empresa_usuario,
+            DEPARTAMENTO as departamento_usuario,
+            NOMBRE as nombre_completo,
+            CARGO as cargo_usuario,
+            CIUDAD as ciudad_usuario
+        FROM usuarios 
+        WHERE HARDWARE_ID IN ({placeholders})
+        """
+        return self._fetch_grouped(query, hardware_ids, Employee._make, failures)
+    
     def get_monitors(self, hardware_id):
         """Obtiene información de monitores conectados"""
         query = """
@@ -89,14 +757,7 @@ class OCSInventoryToExcel:
         AND SERIAL != ''
         """
         
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, (hardware_id,))
-            monitors = cursor.fetchall()
-            cursor.close()
-            return monitors
-        except:
-            return []
+        return list(map(Monitor._make, self._query(query, (hardware_id,), dictionary=False)))
         
     
 
@@ -111,17 +772,10 @@ class OCSInventoryToExcel:
             CARGO as cargo_usuario,
             CIUDAD as ciudad_usuario
         FROM usuarios 
-        WHERE HARDWARE_ID = %s;
+        WHERE HARDWARE_ID = %s
         """
         
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, (hardware_id,))
-            empleado = cursor.fetchall()
-            cursor.close()
-            return empleado
-        except:
-            return []
+        return list(map(Employee._make, self._query(query, (hardware_id,), dictionary=False)))
 
 
 
@@ -139,14 +793,7 @@ class OCSInventoryToExcel:
         LIMIT 1
         """
         
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, (hardware_id,))
-            keyboards = cursor.fetchall()
-            cursor.close()
-            return keyboards
-        except:
-            return []
+        return list(map(InputDevice._make, self._query(query, (hardware_id,), dictionary=False)))
     
     def get_mice(self, hardware_id):
         """Obtiene información de mouse conectados"""
@@ -160,154 +807,211 @@ class OCSInventoryToExcel:
         LIMIT 1
         """
         
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, (hardware_id,))
-            mice = cursor.fetchall()
-            cursor.close()
-            return mice
-        except:
-            return []
+        return list(map(InputDevice._make, self._query(query, (hardware_id,), dictionary=False)))
     
     def create_excel_for_user(self, device_data, output_folder):
         """
         Crea un Excel individual para cada usuario usando la plantilla
         
         Args:
-            device_data (dict): Datos del dispositivo y usuario
+            device_data (records.Device): Datos del dispositivo y usuario
             output_folder (str): Carpeta donde guardar los archivos
+            
+        Returns:
+            str: Ruta del archivo creado, o None si hubo un error
         """
         try:
-            # Cargar la plantilla
-            workbook = load_workbook(self.template_path)
-            worksheet = workbook.active
-            
-            # Basándome en la plantilla PDF, necesito que me confirmes las celdas exactas
-            # Datos del colaborador que recibe
-            worksheet['D11'] = device_data.get('nombre_completo', '')  # Nombre del colaborador
-            worksheet['D9'] = 'ALEXANDER CORAL'  # Colaborador quien entrega
-            worksheet['H15'] = 'X'  # Colaborador quien entrega
-            worksheet['L15'] = 'Actualización de Equipos del Colaborador'  # Colaborador quien entrega
-            worksheet['D7'] = device_data.get('departamento_usuario', '')  # 
-            worksheet['Q11'] = device_data.get('empresa_usuario', '')  #   
-
-            # Crear apartado de Entregue Conforme y Recibi Conforme
-            worksheet['G56'] = 'ALEXANDER CORAL'  # Colaborador quien entrega
-            worksheet['G57'] = 'SOPORTE TI'  # Colaborador quien entrega
-            worksheet['L56'] = device_data.get('nombre_completo', '') # 
-            worksheet['L57'] = device_data.get('cargo_usuario', '')  #      
-            
-            # Fecha actual
-            worksheet['R7'] = datetime.now().strftime('%d-%m-%Y')  # Fecha
-            worksheet['R9'] = datetime.now().strftime('%H:%M')    # Hora
-            
-            # Datos del equipo principal en la tabla
-            # Fila del primer equipo (ajustar según la plantilla Excel real)
-            equipment_row = 21  # Estimado, necesita confirmación
-            
-            # Columnas de la tabla de equipos (estimadas, necesitan confirmación)
-            worksheet[f'A{equipment_row}'] = '1'  # Número
-            #worksheet[f'B{equipment_row}'] = device_data.get('dev_type', '')  # Tipo
-            worksheet[f'B{equipment_row}'] = self.determine_equipment_type(device_data)  # Descripción/Tipo
-            worksheet[f'H{equipment_row}'] = 'En funcionamiento / Regular'  # Estado
-            worksheet[f'K{equipment_row}'] = device_data.get('manufacturer', '')  # Marca
-            worksheet[f'M{equipment_row}'] = device_data.get('model', '')  # Modelo
-            worksheet[f'O{equipment_row}'] = device_data.get('serial_number', '')  # Serie
+            filepath = self.get_output_path(device_data, output_folder)
+            self.render_acta(device_data, filepath)
+            logger.info("Acta creada: %s", os.path.basename(filepath))
+            return filepath
             
+        except Exception as e:
+            logger.error("Error creando acta para %s: %s", device_data.username or 'usuario', e)
+            return None
+    
+    def render_acta(self, device_data, filepath):
+        """
+        Llena la plantilla con los datos del dispositivo y la guarda en filepath,
+        en cada formato de output_formats (el PDF con la misma ruta y extensión .pdf).
+        A diferencia de create_excel_for_user, los errores se propagan al llamador.
+        
+        Args:
+            device_data (records.Device): Datos del dispositivo y usuario
+            filepath (str): Ruta completa del archivo a generar
+        """
+        metrics = self.metrics
+        with metrics.stage('cell_writes'):
+            writes = self.build_cell_writes(device_data)
+            sheets = self.get_cell_mapping().build_sheets(device_data)
+        base = os.path.splitext(filepath)[0]
+        for output_format in self.output_formats:
+            path = f"{base}.{output_format}"
+            # Se escribe en un temporal y se renombra: nunca queda un acta a medio escribir
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                self._write_format(output_format, writes, temp_path, sheets)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            if metrics.enabled:
+                metrics.count('bytes_written', os.path.getsize(path))
+    
+    def render_acta_contents(self, device_data, output_formats=None):
+        """
+        Genera el acta en memoria, sin archivos temporales, en cada formato de output_formats
 
-            # Agregar monitores como equipos adicionales
-            current_row = equipment_row + 1
-            monitors = device_data.get('monitors', [])
-            for i, monitor in enumerate(monitors):
-                if current_row <= equipment_row + 10:  # Limitar a 10 filas adicionales
-                    worksheet[f'A{current_row}'] = str(i + 2)
-                    worksheet[f'B{current_row}'] = 'MONITOR'
-                    worksheet[f'H{current_row}'] = 'En funcionamiento / Regular'
-                    worksheet[f'K{current_row}'] = monitor.get('brand', '')
-                    worksheet[f'M{current_row}'] = monitor.get('identifier', '')
-                    worksheet[f'O{current_row}'] = monitor.get('serial_number', '')                    
-                    current_row += 1
-            
-            # Agregar teclados
-            keyboards = device_data.get('keyboards', [])
-            for i, keyboard in enumerate(keyboards):
-                if current_row <= equipment_row + 10:
-                    worksheet[f'A{current_row}'] = str(current_row - equipment_row + 1)
-                    worksheet[f'B{current_row}'] = 'TECLADO'
-                    worksheet[f'H{current_row}'] = 'En funcionamiento / Regular'
-                    worksheet[f'K{current_row}'] = keyboard.get('brand', '')
-                    worksheet[f'M{current_row}'] = keyboard.get('identifier', '')
-                    worksheet[f'O{current_row}'] = keyboard.get('serial_number', 'N/A')
-                    current_row += 1
-            
-            # Agregar mouse
-            mice = device_data.get('mice', [])
-            for i, mouse in enumerate(mice):
-                if current_row <= equipment_row + 10:
-                    worksheet[f'A{current_row}'] = str(current_row - equipment_row + 1)
-                    worksheet[f'B{current_row}'] = 'MOUSE'
-                    worksheet[f'H{current_row}'] = 'En funcionamiento / Regular'
-                    worksheet[f'K{current_row}'] = mouse.get('brand', '')
-                    worksheet[f'M{current_row}'] = mouse.get('identifier', '')
-                    worksheet[f'O{current_row}'] = mouse.get('serial_number', 'N/A')                    
-                    current_row += 1
-
-
-            # Datos UPS
-            worksheet[f'B{current_row}'] = 'UPS'
-            worksheet[f'H{current_row}'] = 'En funcionamiento / Regular'
-            worksheet[f'K{current_row}'] = 'Forza'
-            current_row += 1
-            
-            # Datos Teléfono
-            worksheet[f'B{current_row}'] = 'TELEFONO'
-            worksheet[f'H{current_row}'] = 'En funcionamiento / Regular'
-            worksheet[f'K{current_row}'] = 'Grand Stream'
-            current_row += 1
-            
-            # Datos Base laptop
-            worksheet[f'B{current_row}'] = 'BASE LAPTOP'
-            worksheet[f'H{current_row}'] = 'En funcionamiento / Regular'
-            worksheet[f'K{current_row}'] = 'Marca Base Laptop'
-            current_row += 1
-            
-            # Datos Mochila
-            worksheet[f'B{current_row}'] = 'MOCHILA'
-            worksheet[f'H{current_row}'] = 'En funcionamiento / Regular'
-            worksheet[f'K{current_row}'] = 'Quasad'
-            current_row += 1          
-            
+        Args:
+            device_data (records.Device): Datos del dispositivo y usuario
+            output_formats (tuple): Formatos a generar (por defecto los de la ejecución)
 
-            # Crear nombre de archivo seguro
-            ciudad = device_data.get('ciudad_usuario', 'SinCiudad')
-            safe_ciudad = "".join(c for c in ciudad if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            ciudad_folder = os.path.join(output_folder, safe_ciudad)
-            if not os.path.exists(ciudad_folder):
-                os.makedirs(ciudad_folder)
+        Returns:
+            list: Pares (formato, contenido en bytes)
+        """
+        with self.metrics.stage('cell_writes'):
+            writes = self.build_cell_writes(device_data)
+            sheets = self.get_cell_mapping().build_sheets(device_data)
+        contents = []
+        for output_format in output_formats or self.output_formats:
+            buffer = BytesIO()
+            self._write_format(output_format, writes, buffer, sheets)
+            contents.append((output_format, buffer.getvalue()))
+        return contents
+    
+    def _write_format(self, output_format, writes, path, sheets=()):
+        """
+        Escribe el acta en un formato ('xlsx' o 'pdf') en la ruta o archivo binario indicado,
+        con las hojas adicionales del mapeo (en el PDF, como anexos)
+        """
+        metrics = self.metrics
+        if output_format == 'pdf':
+            with metrics.stage('pdf'):
+                render_pdf(writes, path, self.get_cell_mapping(), self.get_logo_path(), sheets)
+        elif self.render_engine == 'openpyxl':
+            # Cargar la plantilla
+            with metrics.stage('load_template'):
+                workbook = load_workbook(self.template_path)
+            with metrics.stage('cell_writes'):
+                worksheet = workbook.active
+                for coordinate, value in writes:
+                    worksheet[coordinate] = value
+                for title, rows in sheets:
+                    extra = workbook.create_sheet(title[:31])
+                    for row in rows:
+                        extra.append(row)
+                    extra.freeze_panes = 'A2'
+            # Guardar el archivo
+            with metrics.stage('save'):
+                workbook.save(path)
+        else:
+            # Plantilla parseada una sola vez por proceso; solo se reescriben las celdas del acta
+            with metrics.stage('load_template'):
+                template = get_template(self.template_path)
+            with metrics.stage('cell_writes'):
+                sheet_xml = template.render_sheet(writes)
+            with metrics.stage('save'):
+                template.write_sheet(sheet_xml, path, sheets)
+    
+    def get_logo_path(self):
+        """Logo del acta en PDF: el indicado o logo.png junto a la plantilla, si existe"""
+        if self.logo_path:
+            return self.logo_path
+        logo_path = os.path.join(os.path.dirname(os.path.abspath(self.template_path)), 'logo.png')
+        return logo_path if os.path.exists(logo_path) else None
+    
+    def build_cell_writes(self, device_data):
+        """
+        Calcula las celdas del acta y su valor según el mapeo de la plantilla
+        (ver cell_mapping.py y acta_mapping.json)
+        
+        Args:
+            device_data (records.Device): Datos del dispositivo y usuario
             
-            username = device_data.get('username', 'Usuario_Desconocido')
-            safe_filename = "".join(c for c in username if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            #filename = f"Entrega_{safe_filename}.xlsx"
-
-            nombre_completo = device_data.get('nombre_completo', 'Usuario_Desconocido')
-            safe_nombre = "".join(c for c in nombre_completo if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            filename = f"{safe_nombre}_{safe_filename}.xlsx"
-
+        Returns:
+            list: Pares (coordenada, valor) en el orden en que se escriben
+        """
+        return self.get_cell_mapping().build(device_data)
+    
+    def get_cell_mapping(self):
+        """Mapeo de celdas compilado (una vez por proceso) para la plantilla configurada"""
+        return get_mapping(resolve_mapping_path(self.template_path, self.mapping_path),
+                           {'equipment_type': self.determine_equipment_type})
+    
+    def get_output_path(self, device_data, output_folder, create_folders=True):
+        """
+        Construye la ruta del acta (<output_folder>/<ciudad>/<nombre>_<equipo>.xlsx, o la
+        extensión del primer formato de salida)
+        y crea la carpeta de la ciudad si no existe
+        
+        Args:
+            device_data (records.Device): Datos del dispositivo y usuario
+            output_folder (str): Carpeta donde guardar los archivos
+            create_folders (bool): Crear la carpeta de la ciudad (no hace falta con zips)
+            
+        Returns:
+            str: Ruta completa del archivo
+        """
+        # Crear nombre de archivo seguro
+        ciudad = device_data.ciudad_usuario or 'SinCiudad'
+        safe_ciudad = "".join(c for c in ciudad if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        ciudad_folder = os.path.join(output_folder, safe_ciudad)
+        if create_folders:
+            os.makedirs(ciudad_folder, exist_ok=True)
+        
+        username = device_data.username or 'Usuario_Desconocido'
+        safe_filename = "".join(c for c in username if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        #filename = f"Entrega_{safe_filename}.xlsx"
 
-            filepath = os.path.join(ciudad_folder, filename)
+        nombre_completo = device_data.nombre_completo or 'Usuario_Desconocido'
+        safe_nombre = "".join(c for c in nombre_completo if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        filename = f"{safe_nombre}_{safe_filename}.{self.output_formats[0]}"
 
-            
-            # Guardar el archivo
-            workbook.save(filepath)
-            print(f"Acta creada: {filename}")
-            
-        except Exception as e:
-            print(f"Error creando acta para {device_data.get('username', 'usuario')}: {e}")
+        return os.path.join(ciudad_folder, filename)
     
+    def plan_output_paths(self, devices_data, output_folder, used=None, create_folders=True):
+        """
+        Asigna una ruta de salida determinista a cada dispositivo. Si dos dispositivos
+        producen el mismo nombre de archivo se agrega el HARDWARE_ID (y un contador si
+        aún coincide) para que ningún acta sobrescriba a otra.
+        
+        Args:
+            devices_data (list): Dispositivos a generar
+            output_folder (str): Carpeta donde guardar los archivos
+            used (set): Rutas ya asignadas en lotes anteriores (modo streaming);
+                se actualiza con las rutas asignadas
+            create_folders (bool): Crear las carpetas de las ciudades
+            
+        Returns:
+            list: Tuplas (dispositivo, ruta) en el mismo orden que devices_data
+        """
+        if used is None:
+            used = set()
+        paths = [self.get_output_path(device, output_folder, create_folders) for device in devices_data]
+        repeated = {path for path, count in Counter(paths).items() if count > 1}
+        
+        jobs = []
+        for device, path in zip(devices_data, paths):
+            if path in repeated or path in used:
+                base, ext = os.path.splitext(path)
+                path = f"{base}_{device.hardware_id}{ext}"
+                counter = 2
+                candidate = path
+                while candidate in used:
+                    candidate = f"{os.path.splitext(path)[0]}_{counter}{ext}"
+                    counter += 1
+                path = candidate
+            used.add(path)
+            jobs.append((device, path))
+        return jobs
     
     def determine_equipment_type(self, device_data):
-        """Determina el tipo de equipo basado en el tipo de dispositivo"""
-        os_name = device_data.get('dev_type', '').lower()
+        """Determina el tipo de equipo basado en el tipo de dispositivo (bios.TYPE, no hardware.OSNAME)"""
+        if device_data.equipment_type:
+            # Ya clasificado en la preparación con pandas (staging.StagedInventory)
+            return device_data.equipment_type
+        os_name = (device_data.dev_type or '').lower()
         if 'desktop' in os_name:
             return 'CPU'
         elif 'notebook' in os_name:
@@ -316,56 +1020,789 @@ class OCSInventoryToExcel:
             return 'Equipo Informático'
 
     
-    def generate_all_excel_files(self, output_folder="output_inventarios"):
+    def generate_all_excel_files(self, output_folder="output_inventarios", workers=1, incremental=False,
+                                 stream=False, batch_size=500, dedup=False, archive=False, manifest=True):
         """
         Genera todos los archivos Excel automáticamente
         
         Args:
             output_folder (str): Carpeta donde guardar todos los archivos
+            workers (int): Número de procesos para generar las actas en paralelo
+                (1 = en serie, en el proceso actual)
+            incremental (bool): Generar solo las actas cuyos datos cambiaron desde la
+                ejecución anterior y eliminar las de dispositivos que ya no existen
+            stream (bool): Extraer y generar por lotes a medida que llegan las filas,
+                con memoria acotada, en lugar de extraer toda la flota primero
+            batch_size (int): Dispositivos por lote en modo streaming
+            dedup (bool): No reescribir las actas cuyo contenido (sin la fecha y hora de
+                generación) es igual al de la ejecución anterior
+            archive (bool): Guardar las actas en un zip por ciudad (<carpeta>/<ciudad>.zip)
+                en lugar de un archivo por acta; no se combina con incremental, dedup ni
+                con el filtro de equipos
+            manifest (bool): Con archive, agregar manifiesto.csv a cada zip
         """
+        if archive and (incremental or dedup):
+            raise ValueError("Los zips por ciudad se generan completos: no admiten incremental ni dedup")
+        if archive and self.device_filter:
+            # Cada zip reemplaza al anterior de su ciudad: uno filtrado dejaría fuera al resto
+            raise ValueError("Los zips por ciudad se generan completos: no admiten filtros de equipos")
         # Crear carpeta de salida si no existe
         if not os.path.exists(output_folder):
             os.makedirs(output_folder)
         
+        self.metrics.start()
+        
         # Conectar a la base de datos
-        if not self.connect_database():
+        with self.metrics.stage('connect'):
+            connected = self.connect_database()
+        if not connected:
             return False
+        if self.device_filter:
+            logger.info("Generación filtrada: %s", self.device_filter.describe())
+        serial_index = SerialIndex(self.load_serial_blacklist()) if self.serial_check else None
+        run_hardware_ids = set()
         
-        # Obtener datos de todos los dispositivos
-        devices_data = self.get_devices_data()
+        if stream:
+            batches = self.iter_devices(batch_size)
+        else:
+            # Obtener datos de todos los dispositivos
+            with self.metrics.stage('extraction'):
+                devices_data = self.get_devices_data()
+            
+            # Cerrar conexión: la generación de actas ya no necesita la base de datos
+            if self.db:
+                self.db.close()
+            
+            if not devices_data:
+                logger.warning("No se encontraron datos para procesar")
+                return False
+            batches = [devices_data]
+        batches = iter(batches)
         
-        if not devices_data:
-            print("No se encontraron datos para procesar")
-            return False
+        state = RenderStateStore(self.get_state_path(output_folder)) if incremental else None
+        # Cambiar la plantilla, el mapeo, el motor o los formatos de salida obliga a regenerar todas las actas
+        template_signature = self.template_signature() if incremental or dedup else None
+        content_index = ContentIndex(self.get_content_index_path(output_folder)) if dedup else None
+        sink = ZipArchiveSink(output_folder, manifest) if archive else None
+        # El pool se crea con el primer lote que tiene más de un acta y se reutiliza en los siguientes
+        executor = None
         
-        # Generar Excel para cada usuario
-        print(f"\nGenerando {len(devices_data)} archivos Excel...")
-        for device in devices_data:
-            self.create_excel_for_user(device, output_folder)
+        self.last_run = {'created': [], 'errors': [], 'unmatched': []}
+        if incremental:
+            self.last_run['unchanged'] = 0
+        if dedup:
+            self.last_run['identical'] = 0
+        all_paths = []
+        used = set()
+        # Los demás formatos se guardan junto al primero, con la misma ruta y otra extensión
+        extensions = [f".{output_format}" for output_format in self.output_formats[1:]]
+        try:
+            while True:
+                # En modo streaming la extracción ocurre al pedir cada lote
+                with self.metrics.stage('extraction'):
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                self.metrics.count('devices', len(batch))
+                if serial_index is not None:
+                    with self.metrics.stage('serial_index'):
+                        serial_index.add(batch)
+                        run_hardware_ids.update(device.hardware_id for device in batch)
+                # Equipos sin empleado en usuarios/Users.csv: su acta queda sin datos del colaborador
+                self.last_run['unmatched'].extend((device.hardware_id, device.username)
+                                                  for device in batch if device.employee is None)
+                
+                jobs = self.plan_output_paths(batch, output_folder, used, create_folders=not archive)
+                if incremental or dedup:
+                    all_paths.extend(filepath for _, filepath in jobs)
+                if incremental:
+                    with self.metrics.stage('incremental_state'):
+                        jobs, unchanged = state.select_changed(jobs, template_signature, extensions)
+                    self.last_run['unchanged'] += unchanged
+                planned = jobs
+                if dedup:
+                    with self.metrics.stage('dedup'):
+                        jobs, hashes, identical = content_index.select_changed(
+                            jobs, lambda device: self.content_hash(device, template_signature), extensions)
+                    self.last_run['identical'] += identical
+                
+                # Generar Excel para cada usuario; reemitir una sola acta no levanta el pool de procesos
+                logger.info("Generando %d archivos Excel...", len(jobs))
+                if executor is None and workers > 1 and len(jobs) > 1:
+                    executor = ProcessPoolExecutor(max_workers=workers,
+                                                   initializer=_init_render_worker,
+                                                   initargs=self._worker_options())
+                batch_workers = workers if executor else 1
+                with self.metrics.stage('render'):
+                    if sink:
+                        result = self.render_jobs_to_archive(jobs, sink, batch_workers, executor)
+                    else:
+                        result = self.render_jobs(jobs, batch_workers, executor)
+                self.last_run['created'].extend(result['created'])
+                self.last_run['errors'].extend(result['errors'])
+                
+                if incremental:
+                    # Las actas con el mismo contenido también quedan al día
+                    written = {filepath for _, filepath in jobs}
+                    current = result['created'] + [filepath for _, filepath in planned if filepath not in written]
+                    with self.metrics.stage('incremental_state'):
+                        state.record(planned, current, template_signature)
+                if dedup:
+                    with self.metrics.stage('dedup'):
+                        content_index.record(hashes, result['created'])
+            
+            # Una ejecución filtrada no ve el resto de la flota: no se elimina nada
+            if incremental:
+                self.last_run['removed'] = []
+                if not self.device_filter:
+                    with self.metrics.stage('incremental_state'):
+                        self.last_run['removed'] = state.remove_missing(all_paths, extensions)
+            if dedup and not self.device_filter:
+                content_index.prune(all_paths)
+            if serial_index is not None:
+                with self.metrics.stage('serial_index'):
+                    self.last_run['serials'] = self.write_serial_report(
+                        serial_index, output_folder, run_hardware_ids if self.device_filter else None)
+            if sink:
+                with self.metrics.stage('save'):
+                    self.last_run['archives'] = sink.close()
+        except BaseException:
+            if sink:
+                sink.abort()
+            raise
+        finally:
+            if executor:
+                executor.shutdown()
+            if state:
+                state.close()
+            if content_index:
+                content_index.close()
+            if stream and self.db:
+                self.db.close()
         
-        # Cerrar conexión
-        if self.connection:
-            self.connection.close()
+        self.print_summary(self.last_run)
+        if self.instrument:
+            self.write_run_report(output_folder, workers=workers, stream=stream, incremental=incremental,
+                                  archive=archive)
         
-        print(f"\nProceso completado. Archivos guardados en: {output_folder}")
+        logger.info("Proceso completado. Archivos guardados en: %s", output_folder)
         return True
+    
+    def get_state_path(self, output_folder):
+        """Ruta del archivo de estado del modo incremental, junto a la carpeta de salida"""
+        return os.path.normpath(output_folder) + '_estado.sqlite'
+    
+    def get_content_index_path(self, output_folder):
+        """Ruta del índice de contenido del modo dedup, junto a la carpeta de salida"""
+        return os.path.normpath(output_folder) + '_contenido.sqlite'
+    
+    def content_hash(self, device_data, template_signature=''):
+        """
+        Hash del contenido del acta: sus celdas sin la fecha/hora de generación,
+        la plantilla y los formatos de salida
+        
+        Args:
+            device_data (records.Device): Datos del dispositivo y usuario
+            template_signature (str): Firma de la plantilla y los formatos
+            
+        Returns:
+            str: Hash SHA-256 en hexadecimal
+        """
+        mapping = self.get_cell_mapping()
+        cells = [(cell, value) for cell, value in mapping.build(device_data)
+                 if cell not in mapping.timestamp_cells]
+        payload = json.dumps([template_signature, cells, mapping.build_sheets(device_data)], default=str,
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get_serial_index_path(self, output_folder):
+        """Ruta del índice de seriales de la ejecución anterior, junto a la carpeta de salida"""
+        return os.path.normpath(output_folder) + '_seriales.sqlite'
+    
+    def load_serial_blacklist(self):
+        """Seriales de blacklist_serials de la base o de los volcados (vacío si no hay de dónde leerlos)"""
+        try:
+            if self.db:
+                blacklist = load_blacklist(self.db)
+                self.metrics.count('queries')
+                return blacklist
+            if isinstance(self.data_source, OCSDumpSource):
+                return load_blacklist(source=self.data_source)
+        except mysql.connector.Error as err:
+            logger.warning("No se pudo leer blacklist_serials: %s", err)
+            return set()
+        logger.warning("La fuente de datos no incluye blacklist_serials")
+        return set()
+    
+    def write_serial_report(self, serial_index, output_folder, hardware_ids=None):
+        """
+        Compara el índice de seriales con el de la ejecución anterior, guarda el reporte
+        <carpeta>_seriales.csv y deja el índice actual para la próxima ejecución
+        
+        Args:
+            serial_index (serial_index.SerialIndex): Seriales de esta ejecución
+            output_folder (str): Carpeta de salida de las actas
+            hardware_ids (set): Equipos de una ejecución filtrada (None = toda la flota)
+            
+        Returns:
+            dict: Cantidad de hallazgos por tipo
+        """
+        index_path = self.get_serial_index_path(output_folder)
+        previous = SerialIndex.load_previous(index_path)
+        report_path = os.path.normpath(output_folder) + '_seriales.csv'
+        rows = serial_index.write_report(report_path, previous, hardware_ids)
+        serial_index.save(index_path, hardware_ids)
+        counts = Counter(row[0] for row in rows)
+        logger.info("Reporte de seriales: %s", report_path)
+        return dict(counts)
+    
+    def get_report_path(self, output_folder):
+        """Ruta del reporte JSON de la ejecución, junto a la carpeta de salida"""
+        return os.path.normpath(output_folder) + '_reporte.json'
+    
+    def write_run_report(self, output_folder, **options):
+        """
+        Detiene la medición y guarda el reporte JSON de la ejecución (etapas, contadores,
+        archivos por segundo y perfil). Con workers > 1 los tiempos de cada acta se suman
+        entre procesos y cProfile solo cubre el proceso principal.
+        
+        Args:
+            output_folder (str): Carpeta de salida de las actas
+            **options: Opciones de la ejecución que se incluyen en el reporte
+        """
+        profile_path = os.path.normpath(output_folder) + '_perfil.prof'
+        profile = self.metrics.stop(profile_path)
+        report_path = self.get_report_path(output_folder)
+        self.metrics.write_report(
+            report_path,
+            output_folder=output_folder,
+            render_engine=self.render_engine,
+            bulk_extraction=self.bulk_extraction,
+            options=options,
+            created=len(self.last_run['created']),
+            errors=[{'hardware_id': hardware_id, 'username': username, 'message': message}
+                    for hardware_id, username, message in self.last_run['errors']],
+            unchanged=self.last_run.get('unchanged'),
+            identical=self.last_run.get('identical'),
+            unmatched=[{'hardware_id': hardware_id, 'username': username}
+                       for hardware_id, username in self.last_run['unmatched']],
+            removed=len(self.last_run.get('removed', [])),
+            serials=self.last_run.get('serials'),
+            profile=profile,
+        )
+        logger.info("Reporte de la ejecución: %s", report_path)
+
+    def export_consolidated_workbook(self, output_path="inventario_consolidado.xlsx", batch_size=500):
+        """
+        Exporta toda la flota (equipos y periféricos) a un solo libro Excel con una
+        hoja por ciudad. Los dispositivos se leen por lotes y se escriben en modo
+        write_only, por lo que la memoria no depende del tamaño de la flota.
+
+        Args:
+            output_path (str): Ruta del libro consolidado
+            batch_size (int): Dispositivos por lote
+
+        Returns:
+            dict: Filas escritas por hoja, o None si no se pudo conectar
+        """
+        if not self.connect_database():
+            return None
+
+        folder = os.path.dirname(output_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        try:
+            counts = write_consolidated_workbook(self.iter_devices(batch_size), output_path,
+                                                 self.determine_equipment_type)
+        finally:
+            if self.db:
+                self.db.close()
+
+        for title, rows in counts.items():
+            logger.info("  - %s: %d filas", title, rows)
+        logger.info("Libro consolidado guardado en: %s", output_path)
+        return counts
+
+    def export_shared_printers_report(self, output_path="impresoras_compartidas.csv", min_hosts=2,
+                                      batch_size=500):
+        """
+        Reporte CSV de las impresoras instaladas en varios equipos (misma IP de puerto
+        o mismo nombre), con la cantidad de equipos, sus ciudades y nombres
+        
+        Args:
+            output_path (str): Ruta del CSV
+            min_hosts (int): Equipos mínimos para incluir una impresora
+            batch_size (int): Dispositivos por lote
+            
+        Returns:
+            list: Filas del reporte, o None si no se pudo conectar
+        """
+        if not self.connect_database():
+            return None
+        report = SharedPrinterReport(min_hosts)
+        try:
+            for batch in self.iter_devices(batch_size):
+                report.add(batch)
+        finally:
+            if self.db:
+                self.db.close()
+        rows = report.write_csv(output_path)
+        logger.info("Impresoras compartidas: %d (reporte en %s)", len(rows), output_path)
+        return rows
+    
+    def export_software_report(self, output_path="licencias_software.csv", batch_size=5000):
+        """
+        Reporte CSV de licencias: por cada software, en cuántos equipos está instalado,
+        cuántas instalaciones y versiones distintas tiene. Respeta los filtros de la
+        ejecución; contra MySQL la tabla software se lee por lotes con un cursor sin buffer.
+        
+        Args:
+            output_path (str): Ruta del CSV
+            batch_size (int): Filas por lectura
+            
+        Returns:
+            list: Filas del reporte, o None si no se pudo conectar
+        """
+        if isinstance(self.data_source, OCSDumpSource):
+            # Las tablas de software se leen en la misma pasada que las de los equipos
+            self.data_source.require(SOFTWARE_DUMP_COLUMNS)
+        if not self.connect_database():
+            return None
+        try:
+            with self.metrics.stage('software'):
+                if self.data_source is not None:
+                    if not isinstance(self.data_source, OCSDumpSource):
+                        logger.error("La fuente de datos no incluye el software instalado")
+                        return None
+                    hardware_ids = None
+                    if self.device_filter:
+                        hardware_ids = {device.hardware_id for device in self.get_devices_data()}
+                    inventory = SoftwareInventory.from_dump(self.data_source, hardware_ids)
+                elif not self.db:
+                    logger.error("No hay conexión a la base de datos")
+                    return None
+                else:
+                    where, params = '', ()
+                    if self.device_filter:
+                        conditions, params = self.filter_conditions(self.device_filter)
+                        where = f"s.HARDWARE_ID IN (SELECT h.ID FROM hardware h WHERE {' AND '.join(conditions)})"
+                    inventory = SoftwareInventory.from_database(self.db, batch_size, where, params)
+                    self.metrics.count('queries')
+                    self.metrics.count('rows_fetched', len(inventory))
+        finally:
+            if self.db:
+                self.db.close()
+        folder = os.path.dirname(output_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        rows = inventory.write_license_csv(output_path)
+        logger.info("Software distinto: %d en %d instalaciones (reporte en %s)", len(rows), len(inventory),
+                    output_path)
+        return rows
+    
+    def export_snapshot(self, folder, fmt='parquet'):
+        """
+        Prepara el inventario con pandas (una consulta por tabla, o las tablas de los
+        volcados) y lo guarda como snapshot, para generar después con --snapshot sin
+        servidor. Se guarda completo: los filtros se aplican al leerlo.
+        
+        Args:
+            folder (str): Carpeta del snapshot
+            fmt (str): 'parquet' o 'feather' (requieren pyarrow)
+            
+        Returns:
+            staging.StagedInventory: Inventario guardado, o None si no se pudo conectar
+        """
+        if not self.connect_database():
+            return None
+        try:
+            with self.metrics.stage('staging'):
+                if isinstance(self.data_source, StagedInventory):
+                    inventory = self.data_source
+                elif self.data_source is not None:
+                    inventory = StagedInventory.from_dump(self.data_source)
+                elif not self.db:
+                    logger.error("No hay conexión a la base de datos")
+                    return None
+                else:
+                    inventory = StagedInventory.from_database(self.db)
+                    self.metrics.count('queries', len(EXTRACT_QUERIES))
+        finally:
+            if self.db:
+                self.db.close()
+        inventory.save_snapshot(folder, fmt)
+        logger.info("Snapshot con %d equipos guardado en %s", len(inventory.devices), folder)
+        return inventory
+    
+    def template_signature(self):
+        """
+        Firma de todo lo que define el aspecto de un acta: la plantilla, el archivo de
+        mapeo de celdas, el motor de render y los formatos de salida
+
+        Returns:
+            str: Firma que se guarda con cada acta en el estado incremental
+        """
+        mapping_path = resolve_mapping_path(self.template_path, self.mapping_path)
+        return (f"{file_signature(self.template_path)}:{file_signature(mapping_path)}:"
+                f"{self.render_engine}:{','.join(self.output_formats)}")
+
+    def render_jobs(self, jobs, workers=1, executor=None):
+        """
+        Genera las actas de una lista de trabajos, en serie o con un ProcessPoolExecutor.
+        Los errores se recogen por dispositivo en lugar de detener el proceso.
+        
+        Args:
+            jobs (list): Tuplas (dispositivo, ruta) de plan_output_paths
+            workers (int): Número de procesos (1 = en serie)
+            executor (ProcessPoolExecutor): Pool ya creado para reutilizarlo entre lotes
+            
+        Returns:
+            dict: {'created': [rutas], 'errors': [(hardware_id, username, mensaje)]}
+        """
+        created = []
+        errors = []
+        
+        # Dispositivos cuya extracción falló: se informan y no se genera un acta incompleta
+        pending = []
+        for device, filepath in jobs:
+            if device.extraction_error:
+                errors.append((device.hardware_id, device.username,
+                               f"Error de extracción: {device.extraction_error}"))
+            else:
+                pending.append((device, filepath))
+        jobs = pending
+        
+        if workers <= 1 and executor is None:
+            for device, filepath in jobs:
+                try:
+                    self.render_acta(device, filepath)
+                    created.append(filepath)
+                except Exception as e:
+                    errors.append((device.hardware_id, device.username, str(e)))
+        else:
+            own_executor = executor is None
+            if own_executor:
+                executor = ProcessPoolExecutor(max_workers=workers,
+                                               initializer=_init_render_worker,
+                                               initargs=self._worker_options())
+            try:
+                futures = [executor.submit(_render_acta_worker, device, filepath) for device, filepath in jobs]
+                # Recorrer en el orden de los trabajos para que el resumen sea determinista
+                for (device, filepath), future in zip(jobs, futures):
+                    try:
+                        filepath, worker_metrics = future.result()
+                        created.append(filepath)
+                        self.metrics.merge(worker_metrics)
+                    except Exception as e:
+                        errors.append((device.hardware_id, device.username, str(e)))
+            finally:
+                if own_executor:
+                    executor.shutdown()
+        
+        self.metrics.count('files_created', len(created))
+        self.metrics.count('errors', len(errors))
+        return {'created': created, 'errors': errors}
+    
+    def render_jobs_to_archive(self, jobs, sink, workers=1, executor=None):
+        """
+        Genera las actas en memoria y las agrega a los zips por ciudad. Con workers > 1
+        los procesos del pool solo generan; este proceso es el único que escribe, en el
+        orden de los trabajos, y mantiene a lo sumo unas pocas actas por worker en memoria.
+        
+        Args:
+            jobs (list): Tuplas (dispositivo, ruta) de plan_output_paths (la carpeta de la
+                ruta define la ciudad y su nombre, el archivo dentro del zip)
+            sink (archive_sink.ZipArchiveSink): Zips de destino
+            workers (int): Número de procesos (1 = en serie)
+            executor (ProcessPoolExecutor): Pool ya creado para reutilizarlo entre lotes
+            
+        Returns:
+            dict: {'created': [rutas <zip>/<acta>], 'errors': [(hardware_id, username, mensaje)]}
+        """
+        created = []
+        errors = []
+        written = sink.bytes_written
+        
+        def store(device, filepath, contents):
+            city = os.path.basename(os.path.dirname(filepath))
+            base = os.path.splitext(os.path.basename(filepath))[0]
+            paths = [sink.add(city, f"{base}.{output_format}", content, device) for output_format, content in contents]
+            created.append(paths[0])
+        
+        pending = []
+        for device, filepath in jobs:
+            if device.extraction_error:
+                errors.append((device.hardware_id, device.username,
+                               f"Error de extracción: {device.extraction_error}"))
+            else:
+                pending.append((device, filepath))
+        
+        if workers <= 1 and executor is None:
+            for device, filepath in pending:
+                try:
+                    contents = self.render_acta_contents(device)
+                except Exception as e:
+                    errors.append((device.hardware_id, device.username, str(e)))
+                    continue
+                with self.metrics.stage('archive_write'):
+                    store(device, filepath, contents)
+        else:
+            own_executor = executor is None
+            if own_executor:
+                executor = ProcessPoolExecutor(max_workers=workers,
+                                               initializer=_init_render_worker,
+                                               initargs=self._worker_options())
+            # Ventana de trabajos en curso: acota las actas que esperan en memoria
+            window = max(workers, 1) * 4
+            in_flight = deque()
+            try:
+                queue = iter(pending)
+                while True:
+                    while len(in_flight) < window:
+                        job = next(queue, None)
+                        if job is None:
+                            break
+                        in_flight.append((job, executor.submit(_render_acta_contents_worker, job[0])))
+                    if not in_flight:
+                        break
+                    (device, filepath), future = in_flight.popleft()
+                    try:
+                        contents, worker_metrics = future.result()
+                        self.metrics.merge(worker_metrics)
+                    except Exception as e:
+                        errors.append((device.hardware_id, device.username, str(e)))
+                        continue
+                    with self.metrics.stage('archive_write'):
+                        store(device, filepath, contents)
+            finally:
+                for _, future in in_flight:
+                    future.cancel()
+                if own_executor:
+                    executor.shutdown()
+        
+        self.metrics.count('files_created', len(created))
+        self.metrics.count('bytes_written', sink.bytes_written - written)
+        self.metrics.count('errors', len(errors))
+        return {'created': created, 'errors': errors}
+    
+    def _worker_options(self):
+        """Argumentos de _init_render_worker para que los procesos generen igual que este"""
+        return (self.template_path, self.render_engine, self.instrument, self.output_formats, self.logo_path,
+                self.mapping_path)
+    
+    def print_summary(self, result):
+        """Muestra el resumen de actas creadas y fallidas de una ejecución"""
+        logger.info("Actas creadas: %d", len(result['created']))
+        logger.info("Actas con error: %d", len(result['errors']))
+        if result.get('unmatched'):
+            logger.info("Equipos sin empleado asignado: %d", len(result['unmatched']))
+        if 'unchanged' in result:
+            logger.info("Actas sin cambios: %d", result['unchanged'])
+            logger.info("Actas eliminadas: %d", len(result['removed']))
+        if 'archives' in result:
+            logger.info("Zips por ciudad: %d", len(result['archives']))
+            for path in result['archives']:
+                logger.info("  - %s", path)
+        if 'identical' in result:
+            logger.info("Actas sin cambios de contenido (no reescritas): %d", result['identical'])
+        if 'serials' in result:
+            for kind, count in sorted(result['serials'].items()):
+                logger.info("Seriales %s: %d", kind.lower().replace('_', ' '), count)
+        for hardware_id, username, message in result['errors']:
+            logger.warning("  - %s (HARDWARE_ID %s): %s", username, hardware_id, message)
+
+
+# Generador por proceso para el modo paralelo; se crea una sola vez en cada worker
+_worker_generator = None
+
+
+def _init_render_worker(template_path, render_engine, instrument=False, output_formats=('xlsx',),
+                        logo_path=None, mapping_path=None):
+    """Inicializa el generador de actas de un proceso del pool"""
+    global _worker_generator
+    _worker_generator = OCSInventoryToExcel(None, template_path, render_engine=render_engine,
+                                            instrument=instrument, output_formats=output_formats,
+                                            logo_path=logo_path, mapping_path=mapping_path)
+
+
+def _render_acta_worker(device_data, filepath):
+    """Genera un acta dentro de un proceso del pool y devuelve su ruta y sus métricas"""
+    _worker_generator.render_acta(device_data, filepath)
+    return filepath, _worker_generator.metrics.drain()
+
+
+def _render_acta_contents_worker(device_data):
+    """Genera un acta en memoria dentro de un proceso del pool (para los zips por ciudad)"""
+    contents = _worker_generator.render_acta_contents(device_data)
+    return contents, _worker_generator.metrics.drain()
+
+
+def _split_values(values):
+    """Valores de una opción repetible, admitiendo también listas separadas por comas"""
+    return [value.strip() for item in values or [] for value in item.split(',') if value.strip()]
+
+
+def build_arg_parser():
+    """Opciones de línea de comandos para generar las actas"""
+    parser = argparse.ArgumentParser(
+        description="Genera las actas FTI-08 de los equipos de OCS Inventory",
+        epilog="Ejemplo: python script.py --city QUITO --company 'SIATIADUANAS S.A.' --incremental")
+
+    database = parser.add_argument_group("base de datos (OCS Inventory)")
+    database.add_argument('--host', default='localhost')
+    database.add_argument('--port', type=int, default=3306)
+    database.add_argument('--database', default='ocsweb', help="Nombre típico de la BD de OCS")
+    database.add_argument('--user', default='ocsuser')
+    database.add_argument('--password', default=os.environ.get('OCS_DB_PASSWORD', 'ocspass'),
+                          help="Por defecto la variable de entorno OCS_DB_PASSWORD")
+    database.add_argument('--dump', nargs='+', metavar='ARCHIVO_SQL',
+                          help="Leer los volcados .sql en lugar de la base (p. ej. ocsweb.sql usuarios.sql)")
+    database.add_argument('--snapshot', metavar='CARPETA',
+                          help="Leer un snapshot preparado con pandas (--save-snapshot)")
+    database.add_argument('--cache', metavar='ARCHIVO',
+                          help="Caché de extracción (SQLite): las ejecuciones siguientes no consultan la base")
+    database.add_argument('--cache-ttl', type=float, default=3600, help="Segundos de validez de la caché")
+    database.add_argument('--cache-max-mb', type=int, default=512, help="Tamaño máximo de la caché")
+    database.add_argument('--refresh-cache', action='store_true', help="Volver a extraer y actualizar la caché")
+    database.add_argument('--employees', metavar='ORIGEN',
+                          help="Cargar los empleados una sola vez: 'usuarios' o la ruta de Users.csv")
+
+    filters = parser.add_argument_group(
+        "filtros", "Se combinan entre sí; cada uno se puede repetir o separar por comas")
+    filters.add_argument('--city', action='append', help="Ciudad del empleado (usuarios.CIUDAD)")
+    filters.add_argument('--company', action='append', help="Empresa del empleado (usuarios.EMPRESA)")
+    filters.add_argument('--department', action='append',
+                         help="Departamento del empleado (usuarios.DEPARTAMENTO)")
+    filters.add_argument('--hardware-id', action='append', help="HARDWARE_ID del equipo")
+    filters.add_argument('--hostname', action='append', metavar='PATRÓN',
+                         help="Nombre del equipo, admite * y ? (hardware.NAME)")
+    filters.add_argument('--employee-name', action='append', metavar='PATRÓN',
+                         help="Nombre del empleado, admite * y ? (usuarios.NOMBRE)")
+    filters.add_argument('--email', action='append',
+                         help="Correo del empleado (usuarios.CORREO); con --dump requiere --employees")
+    filters.add_argument('--changed-since', type=parse_since, metavar='FECHA',
+                         help="Equipos inventariados desde esa fecha, AAAA-MM-DD[ HH:MM] (hardware.LASTDATE)")
+
+    output = parser.add_argument_group("generación")
+    output.add_argument('--template', default='plantilla_inventario.xlsx', help="Plantilla Excel del acta")
+    output.add_argument('--mapping', help="Archivo JSON con las celdas del acta")
+    output.add_argument('--output', default='inventarios_generados', help="Carpeta de salida")
+    output.add_argument('--format', dest='formats', action='append', choices=['xlsx', 'pdf'],
+                        help="Formato de las actas (se puede repetir; por defecto xlsx)")
+    output.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Procesos para generar en paralelo")
+    output.add_argument('--render-engine', choices=['xml', 'openpyxl'], default='xml')
+    output.add_argument('--per-device', action='store_true',
+                        help="Consultar periféricos por dispositivo en lugar de por bloques")
+    output.add_argument('--concurrency', type=int, default=1,
+                        help="Con --per-device, consultas simultáneas")
+    output.add_argument('--stream', action='store_true', help="Extraer y generar por lotes")
+    output.add_argument('--batch-size', type=int, default=500)
+    output.add_argument('--incremental', action='store_true',
+                        help="Generar solo las actas cuyos datos cambiaron desde la ejecución anterior")
+    output.add_argument('--dedup', action='store_true',
+                        help="No reescribir las actas con el mismo contenido que la ejecución anterior")
+    output.add_argument('--zip', dest='archive', action='store_true',
+                        help="Guardar las actas en un zip por ciudad (<carpeta>/<ciudad>.zip)")
+    output.add_argument('--no-manifest', dest='manifest', action='store_false',
+                        help="Con --zip, no agregar manifiesto.csv a cada zip")
+    output.add_argument('--instrument', action='store_true',
+                        help="Guardar un reporte JSON con los tiempos por etapa")
+    output.add_argument('--profile', choices=['cprofile', 'tracemalloc'])
+    output.add_argument('--consolidated', metavar='XLSX',
+                        help="Exportar el libro consolidado por ciudad en lugar de las actas")
+    output.add_argument('--shared-printers', metavar='CSV',
+                        help="Exportar el reporte de impresoras compartidas en lugar de las actas")
+    output.add_argument('--serial-check', action='store_true',
+                        help="Reportar seriales duplicados, de la lista negra y periféricos movidos")
+    output.add_argument('--specs', action='store_true',
+                        help="Agregar al acta procesador, memoria, almacenamiento y gráficos")
+    output.add_argument('--software', action='store_true',
+                        help="Agregar al acta la hoja SOFTWARE con el software instalado")
+    output.add_argument('--software-report', metavar='CSV',
+                        help="Exportar el conteo de licencias de software en lugar de las actas")
+    output.add_argument('--save-snapshot', metavar='CARPETA',
+                        help="Guardar el inventario preparado con pandas (parquet) en lugar de las actas, "
+                             "para generar después con --snapshot")
+
+    service = parser.add_argument_group(
+        "servicio", "Actas bajo demanda por HTTP: /actas/<hardware_id>, /actas/colaborador/<nombre>, "
+                    "/actas/equipo/<nombre>, /actas/ciudad/<ciudad>.zip (?formato=pdf)")
+    service.add_argument('--serve', type=int, metavar='PUERTO',
+                         help="Atender pedidos en este puerto en lugar de generar toda la flota")
+    service.add_argument('--bind', default='127.0.0.1', help="Interfaz donde escuchar")
+    service.add_argument('--service-cache-mb', type=int, default=64,
+                         help="Memoria para las actas ya generadas")
+    service.add_argument('--service-max-age', type=float, default=600,
+                         help="Segundos que se reutiliza un acta ya generada (también se invalida si "
+                              "cambia el LASTDATE o el empleado del equipo)")
+    return parser
+
+
+def main(argv=None):
+    """
+    Punto de entrada de la línea de comandos
+
+    Returns:
+        int: Código de salida (0 si la generación terminó)
+    """
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.archive and (args.incremental or args.dedup):
+        parser.error("--zip genera los zips completos: no se combina con --incremental ni --dedup")
+    if args.email and (args.snapshot or (args.dump and not args.employees)):
+        # Sin servidor, los correos solo están en el directorio de empleados (el snapshot no lo usa)
+        parser.error("--email requiere la base o --dump con --employees")
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    db_config = {'host': args.host, 'database': args.database, 'user': args.user,
+                 'password': args.password, 'port': args.port}
+    data_source = None
+    if args.dump:
+        data_source = OCSDumpSource(args.dump)
+    elif args.snapshot:
+        data_source = StagedInventory.from_snapshot(args.snapshot)
+
+    try:
+        hardware_ids = [int(value) for value in _split_values(args.hardware_id)]
+    except ValueError:
+        parser.error("--hardware-id debe ser un número entero (HARDWARE_ID de OCS)")
+    device_filter = DeviceFilter(cities=_split_values(args.city), companies=_split_values(args.company),
+                                 departments=_split_values(args.department),
+                                 hardware_ids=hardware_ids,
+                                 hostnames=_split_values(args.hostname),
+                                 employee_names=_split_values(args.employee_name),
+                                 changed_since=args.changed_since, emails=_split_values(args.email))
+    if args.archive and device_filter:
+        parser.error("--zip genera los zips completos: no se combina con los filtros de equipos")
+    generator = OCSInventoryToExcel(db_config, args.template, bulk_extraction=not args.per_device,
+                                    render_engine=args.render_engine, data_source=data_source,
+                                    instrument=args.instrument, profile=args.profile,
+                                    extraction_concurrency=args.concurrency,
+                                    output_formats=tuple(args.formats or ['xlsx']),
+                                    mapping_path=args.mapping, employees=args.employees,
+                                    device_filter=device_filter, cache_path=args.cache,
+                                    cache_ttl=args.cache_ttl, cache_max_mb=args.cache_max_mb,
+                                    refresh_cache=args.refresh_cache, include_software=args.software,
+                                    serial_check=args.serial_check, include_specs=args.specs)
+
+    if args.serve is not None:
+        return 0 if serve(generator, args.bind, args.serve, args.service_cache_mb, args.service_max_age) else 1
+    if args.consolidated:
+        return 0 if generator.export_consolidated_workbook(args.consolidated, args.batch_size) is not None else 1
+    if args.shared_printers:
+        return 0 if generator.export_shared_printers_report(args.shared_printers,
+                                                           batch_size=args.batch_size) is not None else 1
+    if args.software_report:
+        return 0 if generator.export_software_report(args.software_report) is not None else 1
+    if args.save_snapshot:
+        return 0 if generator.export_snapshot(args.save_snapshot) is not None else 1
+    ok = generator.generate_all_excel_files(args.output, workers=args.workers, incremental=args.incremental,
+                                            stream=args.stream, batch_size=args.batch_size, dedup=args.dedup,
+                                            archive=args.archive, manifest=args.manifest)
+    return 0 if ok else 1
+
 
-# Configuración y uso del script
+# Configuración y uso del script: python script.py --help
 if __name__ == "__main__":
-    # Configuración de la base de datos (AJUSTAR CON TUS DATOS)
-    db_config = {
-        'host': 'localhost',
-        'database': 'ocsweb',  # Nombre típico de la BD de OCS
-        'user': 'ocsuser',  # Cambiar por tu usuario
-        'password': 'ocspass',  # Cambiar por tu password
-        'port': 3306
-    }
-    
-    # Ruta de tu plantilla Excel (CAMBIAR POR LA RUTA REAL)
-    template_path = "plantilla_inventario.xlsx"
-    
-    # Crear instancia y generar archivos
-    generator = OCSInventoryToExcel(db_config, template_path)
-    
-    # Generar todos los archivos Excel automáticamente
-    generator.generate_all_excel_files("inventarios_generados")
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import csv
+import sqlite3
+
+
+BLACKLIST_QUERY = "SELECT SERIAL as serial FROM blacklist_serials"
+
+# Tabla y columna del volcado con los seriales genéricos
+BLACKLIST_DUMP_COLUMNS = {'blacklist_serials': ['SERIAL']}
+
+REPORT_HEADERS = ['TIPO', 'SERIAL', 'ELEMENTO', 'DESCRIPCION', 'HARDWARE_ID', 'EQUIPO', 'COLABORADOR',
+                  'ANTES_HARDWARE_ID', 'ANTES_EQUIPO', 'ANTES_COLABORADOR']
+
+# Tipos de hallazgo del reporte
+DUPLICATE = 'DUPLICADO'
+BLACKLISTED = 'LISTA_NEGRA'
+MOVED = 'MOVIDO'
+
+
+def normalize_serial(serial):
+    """Serial comparable: sin espacios alrededor y en mayúsculas ('' si no tiene)"""
+    return str(serial or '').strip().upper()
+
+
+def load_blacklist(db=None, source=None):
+    """
+    Seriales genéricos de blacklist_serials ('0000000', 'To be filled by O.E.M.', ...)
+
+    Args:
+        db (ocs_db.OCSDatabase): Conexión a OCS Inventory
+        source (ocs_dump.OCSDumpSource): Volcados, si no hay conexión (la tabla se lee con
+            las de las actas si se pidió antes de cargarlos)
+
+    Returns:
+        set: Seriales normalizados
+    """
+    if db is not None:
+        return {normalize_serial(row['serial']) for row in db.query(BLACKLIST_QUERY)} - {''}
+    if source is None:
+        return set()
+    serials = source.load_tables(BLACKLIST_DUMP_COLUMNS)['blacklist_serials'].data['SERIAL']
+    return {normalize_serial(serial) for serial in serials} - {''}
+
+
+class SerialIndex:
+    """
+    Índice hash serial -> equipos que lo reportan, armado en una sola pasada sobre los
+    dispositivos que se generan (serial de la bios y de cada monitor; OCS no guarda
+    serial de teclados ni mouse, así que los inputs quedan fuera por no tenerlo).
+    Detecta seriales repetidos en varios equipos, seriales de blacklist_serials y,
+    contra el índice de la ejecución anterior guardado en disco, periféricos que
+    cambiaron de equipo.
+    """
+
+    def __init__(self, blacklist=()):
+        """
+        Args:
+            blacklist (iterable): Seriales de blacklist_serials
+        """
+        self.blacklist = {normalize_serial(serial) for serial in blacklist}
+        # (elemento, serial) -> {HARDWARE_ID: (equipo, colaborador, descripción)}
+        self.serials = {}
+        self.blacklisted = []
+
+    def __len__(self):
+        return len(self.serials)
+
+    def _add(self, kind, serial, device, description):
+        serial = normalize_serial(serial)
+        if not serial:
+            return
+        entry = (device.username or '', device.nombre_completo or '', description or '')
+        if serial in self.blacklist:
+            self.blacklisted.append((kind, serial, device.hardware_id, entry))
+            return
+        self.serials.setdefault((kind, serial), {})[device.hardware_id] = entry
+
+    def add(self, devices):
+        """Agrega los seriales de un lote de dispositivos (bios y monitores)"""
+        for device in devices:
+            self._add('EQUIPO', device.serial_number, device, device.model)
+            for monitor in device.monitors or []:
+                self._add('MONITOR', monitor.serial_number, device, monitor.identifier)
+
+    def duplicates(self, previous=None, hardware_ids=None):
+        """
+        Seriales reportados por más de un equipo
+
+        Args:
+            previous (dict): Índice anterior (load_previous); con una ejecución filtrada
+                se usa para comparar también con los equipos que no se generaron
+            hardware_ids (set): Equipos de esta ejecución (sus filas anteriores se descartan)
+
+        Returns:
+            list: Pares ((elemento, serial), {HARDWARE_ID: datos})
+        """
+        found = []
+        for key, hosts in self.serials.items():
+            hosts = dict(hosts)
+            if previous and hardware_ids is not None:
+                for hardware_id, entry in previous.get(key, {}).items():
+                    if hardware_id not in hardware_ids:
+                        hosts.setdefault(hardware_id, entry)
+            if len(hosts) > 1:
+                found.append((key, hosts))
+        return found
+
+    def moved(self, previous):
+        """
+        Periféricos y equipos cuyo serial estaba en otro HARDWARE_ID en la ejecución anterior
+
+        Returns:
+            list: Tuplas ((elemento, serial), HARDWARE_ID actual, datos, HARDWARE_ID anterior, datos)
+        """
+        found = []
+        for key, hosts in self.serials.items():
+            before = previous.get(key)
+            if not before:
+                continue
+            for hardware_id, entry in hosts.items():
+                if hardware_id in before:
+                    continue
+                old_id, old_entry = next(iter(before.items()))
+                found.append((key, hardware_id, entry, old_id, old_entry))
+        return found
+
+    @staticmethod
+    def load_previous(path):
+        """
+        Índice guardado por la ejecución anterior
+
+        Returns:
+            dict: (elemento, serial) -> {HARDWARE_ID: datos}; vacío si no existe
+        """
+        previous = {}
+        try:
+            connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        except sqlite3.OperationalError:
+            return previous
+        try:
+            rows = connection.execute(
+                "SELECT kind, serial, hardware_id, username, employee, description FROM serials").fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            connection.close()
+        for kind, serial, hardware_id, username, employee, description in rows:
+            previous.setdefault((kind, serial), {})[hardware_id] = (username, employee, description)
+        return previous
+
+    def save(self, path, hardware_ids=None):
+        """
+        Guarda el índice para la próxima ejecución
+
+        Args:
+            path (str): Archivo SQLite del índice
+            hardware_ids (set): Con una ejecución filtrada, solo se reemplazan las filas de
+                estos equipos (None = se reemplaza todo el índice)
+        """
+        connection = sqlite3.connect(path)
+        try:
+            with connection:
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS serials (
+                        kind TEXT NOT NULL,
+                        serial TEXT NOT NULL,
+                        hardware_id INTEGER NOT NULL,
+                        username TEXT,
+                        employee TEXT,
+                        description TEXT,
+                        PRIMARY KEY (kind, serial, hardware_id)
+                    )""")
+                if hardware_ids is None:
+                    connection.execute("DELETE FROM serials")
+                else:
+                    connection.executemany("DELETE FROM serials WHERE hardware_id = ?",
+                                           [(hardware_id,) for hardware_id in hardware_ids])
+                connection.executemany(
+                    "INSERT OR REPLACE INTO serials VALUES (?, ?, ?, ?, ?, ?)",
+                    [(kind, serial, hardware_id, *entry)
+                     for (kind, serial), hosts in self.serials.items() for hardware_id, entry in hosts.items()])
+        finally:
+            connection.close()
+
+    def report_rows(self, previous=None, hardware_ids=None):
+        """
+        Filas del reporte: duplicados, seriales de la lista negra y movidos
+
+        Args:
+            previous (dict): Índice de la ejecución anterior
+            hardware_ids (set): Equipos de esta ejecución, si fue filtrada
+
+        Returns:
+            list: Filas con REPORT_HEADERS
+        """
+        rows = []
+        for (kind, serial), hosts in sorted(self.duplicates(previous, hardware_ids)):
+            for hardware_id, (username, employee, description) in sorted(hosts.items()):
+                rows.append([DUPLICATE, serial, kind, description, hardware_id, username, employee, '', '', ''])
+        for kind, serial, hardware_id, (username, employee, description) in sorted(self.blacklisted):
+            rows.append([BLACKLISTED, serial, kind, description, hardware_id, username, employee, '', '', ''])
+        for (kind, serial), hardware_id, entry, old_id, old_entry in sorted(self.moved(previous or {})):
+            username, employee, description = entry
+            rows.append([MOVED, serial, kind, description, hardware_id, username, employee, old_id, old_entry[0],
+                         old_entry[1]])
+        return rows
+
+    def write_report(self, path, previous=None, hardware_ids=None):
+        """Guarda el reporte como CSV separado por ';' (igual que Users.csv)"""
+        rows = self.report_rows(previous, hardware_ids)
+        with open(path, 'w', newline='', encoding='utf-8-sig') as handle:
+            writer = csv.writer(handle, delimiter=';')
+            writer.writerow(REPORT_HEADERS)
+            writer.writerows(rows)
+        return rows
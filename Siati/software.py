@@ -0,0 +1,233 @@
+import csv
+from array import array
+
+
+# Instalaciones con el nombre, versión y editor ya resueltos (software_name/version/publisher)
+SOFTWARE_QUERY = """
+    SELECT
+        s.HARDWARE_ID as hardware_id,
+        n.NAME as name,
+        v.VERSION as version,
+        p.PUBLISHER as publisher
+    FROM software s
+    JOIN software_name n ON n.ID = s.NAME_ID
+    LEFT JOIN software_version v ON v.ID = s.VERSION_ID
+    LEFT JOIN software_publisher p ON p.ID = s.PUBLISHER_ID
+    {where}
+    ORDER BY s.HARDWARE_ID, n.NAME
+    """
+
+LICENSE_REPORT_HEADERS = ['SOFTWARE', 'EDITOR', 'EQUIPOS', 'INSTALACIONES', 'VERSIONES']
+
+# Tablas y columnas del volcado que se leen para armar el inventario de software
+SOFTWARE_DUMP_COLUMNS = {
+    'software': ['HARDWARE_ID', 'NAME_ID', 'VERSION_ID', 'PUBLISHER_ID'],
+    'software_name': ['ID', 'NAME'],
+    'software_version': ['ID', 'VERSION'],
+    'software_publisher': ['ID', 'PUBLISHER'],
+}
+
+
+class StringPool:
+    """Textos internados: cada valor distinto se guarda una sola vez y se referencia por su índice"""
+
+    __slots__ = ('values', 'ids')
+
+    def __init__(self):
+        self.values = ['']
+        self.ids = {'': 0}
+
+    def intern(self, value):
+        """Índice del texto, agregándolo si es nuevo (None y '' comparten el índice 0)"""
+        value = value or ''
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+
+class SoftwareInventory:
+    """
+    Software instalado en cada equipo, guardado por columnas en arrays de enteros
+    (HARDWARE_ID, nombre, versión y editor) con los textos internados en un StringPool.
+    Cientos de miles de instalaciones ocupan unos pocos bytes por fila en lugar de un
+    diccionario por fila; los diccionarios se arman solo para el equipo que se genera.
+    """
+
+    def __init__(self):
+        self.strings = StringPool()
+        self.hardware_ids = array('l')
+        self.names = array('l')
+        self.versions = array('l')
+        self.publishers = array('l')
+        # HARDWARE_ID -> posiciones de sus filas
+        self.index = {}
+
+    def __len__(self):
+        return len(self.hardware_ids)
+
+    def add(self, hardware_id, name, version, publisher):
+        """Agrega una instalación"""
+        position = len(self.hardware_ids)
+        intern = self.strings.intern
+        self.hardware_ids.append(hardware_id)
+        self.names.append(intern(name))
+        self.versions.append(intern(version))
+        self.publishers.append(intern(publisher))
+        positions = self.index.get(hardware_id)
+        if positions is None:
+            positions = self.index[hardware_id] = array('l')
+        positions.append(position)
+
+    def add_rows(self, rows):
+        """Agrega filas de SOFTWARE_QUERY (diccionarios con hardware_id, name, version, publisher)"""
+        for row in rows:
+            self.add(row['hardware_id'], row['name'], row['version'], row['publisher'])
+
+    @classmethod
+    def from_database(cls, db, batch_size=5000, where='', params=()):
+        """
+        Lee la tabla software por lotes con un cursor sin buffer
+
+        Args:
+            db (ocs_db.OCSDatabase): Conexión a OCS Inventory
+            batch_size (int): Filas por lectura
+            where (str): Condición opcional (con alias s para software)
+            params (tuple): Parámetros de la condición
+
+        Returns:
+            SoftwareInventory: Inventario cargado
+        """
+        inventory = cls()
+        query = SOFTWARE_QUERY.format(where=f"WHERE {where}" if where else '')
+        for rows in db.stream(query, batch_size, params):
+            inventory.add_rows(rows)
+        return inventory
+
+    @classmethod
+    def from_dump(cls, source, hardware_ids=None):
+        """
+        Arma el inventario con las tablas de software ya leídas de los volcados
+
+        Args:
+            source (ocs_dump.OCSDumpSource): Volcados de OCS Inventory (las tablas de
+                SOFTWARE_DUMP_COLUMNS se leen con las de las actas si se pidieron antes de cargarlos)
+            hardware_ids (set): Solo estos equipos (None = todos)
+
+        Returns:
+            SoftwareInventory: Inventario cargado
+        """
+        tables = source.load_tables(SOFTWARE_DUMP_COLUMNS)
+        lookups = {}
+        for table in ('software_name', 'software_version', 'software_publisher'):
+            lookup_ids, values = (tables[table].data[column] for column in SOFTWARE_DUMP_COLUMNS[table])
+            lookups[table] = {int(lookup_id): value for lookup_id, value in zip(lookup_ids, values)}
+
+        names = lookups['software_name']
+        software = tables['software'].data
+        # Mismo orden y mismo JOIN que SOFTWARE_QUERY (sin nombre, la instalación no se cuenta)
+        installs = [(hardware_id, int(name_id), int(version_id or 0), int(publisher_id or 0))
+                    for hardware_id, name_id, version_id, publisher_id in zip(
+                        software['HARDWARE_ID'], software['NAME_ID'], software['VERSION_ID'],
+                        software['PUBLISHER_ID'])
+                    if hardware_ids is None or hardware_id in hardware_ids]
+        installs = [install for install in installs if install[1] in names]
+        installs.sort(key=lambda install: (install[0], names[install[1]].casefold()))
+        inventory = cls()
+        for hardware_id, name_id, version_id, publisher_id in installs:
+            inventory.add(hardware_id, names[name_id], lookups['software_version'].get(version_id),
+                          lookups['software_publisher'].get(publisher_id))
+        return inventory
+
+    def for_device(self, hardware_id):
+        """
+        Software de un equipo
+
+        Returns:
+            list: Diccionarios {'name', 'version', 'publisher'}
+        """
+        strings = self.strings
+        return [{'name': strings[self.names[position]], 'version': strings[self.versions[position]],
+                 'publisher': strings[self.publishers[position]]}
+                for position in self.index.get(hardware_id, ())]
+
+    def subset(self, hardware_id):
+        """Inventario con solo las filas de un equipo"""
+        inventory = SoftwareInventory()
+        strings = self.strings
+        for position in self.index.get(hardware_id, ()):
+            inventory.add(hardware_id, strings[self.names[position]], strings[self.versions[position]],
+                          strings[self.publishers[position]])
+        return inventory
+
+    def attach(self, devices):
+        """
+        Agrega a cada dispositivo su 'software' como DeviceSoftware: los diccionarios
+        se arman recién al generar el acta, no al extraer
+        """
+        for device in devices:
+            device.software = DeviceSoftware(self, device.hardware_id)
+
+    def license_rows(self):
+        """
+        Conteo de licencias de toda la flota: equipos con cada software, instalaciones
+        y versiones distintas
+
+        Returns:
+            list: Filas (LICENSE_REPORT_HEADERS), del software en más equipos al que menos
+        """
+        hosts = {}
+        installs = {}
+        versions = {}
+        publishers = {}
+        for hardware_id, name, version, publisher in zip(self.hardware_ids, self.names, self.versions,
+                                                         self.publishers):
+            hosts.setdefault(name, set()).add(hardware_id)
+            installs[name] = installs.get(name, 0) + 1
+            # El índice 0 es '' (instalación sin VERSION_ID): no cuenta como una versión
+            if version:
+                versions.setdefault(name, set()).add(version)
+            if publisher:
+                publishers.setdefault(name, publisher)
+        strings = self.strings
+        rows = [[strings[name], strings[publishers.get(name, 0)], len(hardware_ids), installs[name],
+                 len(versions.get(name, ()))] for name, hardware_ids in hosts.items()]
+        rows.sort(key=lambda row: (-row[2], row[0].casefold()))
+        return rows
+
+    def write_license_csv(self, path):
+        """Guarda el conteo de licencias como CSV separado por ';' (igual que Users.csv)"""
+        rows = self.license_rows()
+        with open(path, 'w', newline='', encoding='utf-8-sig') as handle:
+            writer = csv.writer(handle, delimiter=';')
+            writer.writerow(LICENSE_REPORT_HEADERS)
+            writer.writerows(rows)
+        return rows
+
+
+class DeviceSoftware:
+    """
+    Software de un equipo como referencia a sus filas del SoftwareInventory. Se recorre
+    como la lista de for_device, que se arma en ese momento (en CellMapping.build_sheets,
+    al generar el acta). Al serializarse (caché de extracción, procesos de generación)
+    se guarda con un inventario que tiene solo las filas del equipo.
+    """
+
+    __slots__ = ('inventory', 'hardware_id')
+
+    def __init__(self, inventory, hardware_id):
+        self.inventory = inventory
+        self.hardware_id = hardware_id
+
+    def __len__(self):
+        return len(self.inventory.index.get(self.hardware_id, ()))
+
+    def __iter__(self):
+        return iter(self.inventory.for_device(self.hardware_id))
+
+    def __reduce__(self):
+        return DeviceSoftware, (self.inventory.subset(self.hardware_id), self.hardware_id)
@@ -0,0 +1,285 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from printers import VIRTUAL_NAME_KEYWORDS, VIRTUAL_PORTS
+from records import PERIPHERAL_RECORDS, Device, Employee
+
+
+# Columnas de cada extracto, con los nombres de los campos de records.Device
+DEVICE_COLUMNS = ['username', 'device_type', 'manufacturer', 'model', 'serial_number', 'dev_type',
+                  'hardware_id', 'lastdate', 'checksum']
+EMPLEADO_COLUMNS = ['empresa_usuario', 'departamento_usuario', 'nombre_completo', 'cargo_usuario',
+                    'ciudad_usuario']
+PERIPHERAL_COLUMNS = ['hardware_id', 'brand', 'identifier', 'serial_number']
+PRINTER_COLUMNS = PERIPHERAL_COLUMNS + ['driver', 'port']
+PERIPHERALS = ('monitors', 'keyboards', 'mice', 'printers')
+
+EXTRACT_QUERIES = {
+    'hardware': """
+        SELECT ID as hardware_id, NAME as username, OSNAME as device_type,
+               LASTDATE as lastdate, CHECKSUM as checksum
+        FROM hardware
+        WHERE NAME IS NOT NULL AND NAME != ''
+        """,
+    'bios': """
+        SELECT HARDWARE_ID as hardware_id, SMANUFACTURER as manufacturer, SMODEL as model,
+               SSN as serial_number, TYPE as dev_type
+        FROM bios
+        """,
+    'monitors': """
+        SELECT ID as id, HARDWARE_ID as hardware_id, MANUFACTURER as brand,
+               CAPTION as identifier, SERIAL as serial_number
+        FROM monitors
+        """,
+    'inputs': """
+        SELECT ID as id, HARDWARE_ID as hardware_id, TYPE as brand, DESCRIPTION as identifier
+        FROM inputs
+        WHERE TYPE IN ('Keyboard', 'Pointing')
+        """,
+    'printers': """
+        SELECT ID as id, HARDWARE_ID as hardware_id, NAME as name, DRIVER as driver, PORT as port
+        FROM printers
+        """,
+    'usuarios': """
+        SELECT HARDWARE_ID as hardware_id, EMPRESA as empresa_usuario,
+               DEPARTAMENTO as departamento_usuario, NOMBRE as nombre_completo,
+               CARGO as cargo_usuario, CIUDAD as ciudad_usuario
+        FROM usuarios
+        """,
+}
+
+# Mismas columnas leídas desde ocs_dump.OCSDumpSource
+DUMP_RENAMES = {
+    'hardware': {'ID': 'hardware_id', 'NAME': 'username', 'OSNAME': 'device_type',
+                 'LASTDATE': 'lastdate', 'CHECKSUM': 'checksum'},
+    'bios': {'HARDWARE_ID': 'hardware_id', 'SMANUFACTURER': 'manufacturer', 'SMODEL': 'model',
+             'SSN': 'serial_number', 'TYPE': 'dev_type'},
+    'monitors': {'ID': 'id', 'HARDWARE_ID': 'hardware_id', 'MANUFACTURER': 'brand',
+                 'CAPTION': 'identifier', 'SERIAL': 'serial_number'},
+    'inputs': {'ID': 'id', 'HARDWARE_ID': 'hardware_id', 'TYPE': 'brand', 'DESCRIPTION': 'identifier'},
+    'printers': {'ID': 'id', 'HARDWARE_ID': 'hardware_id', 'NAME': 'name', 'DRIVER': 'driver', 'PORT': 'port'},
+    'usuarios': {'HARDWARE_ID': 'hardware_id', 'EMPRESA': 'empresa_usuario',
+                 'DEPARTAMENTO': 'departamento_usuario', 'NOMBRE': 'nombre_completo',
+                 'CARGO': 'cargo_usuario', 'CIUDAD': 'ciudad_usuario'},
+}
+
+
+def classify_equipment(dev_type):
+    """
+    Versión vectorizada de OCSInventoryToExcel.determine_equipment_type
+
+    Args:
+        dev_type (pd.Series): Columna bios.TYPE
+
+    Returns:
+        np.ndarray: Tipo de equipo para cada fila
+    """
+    lowered = dev_type.fillna('').astype(str).str.lower()
+    return np.select([lowered.str.contains('desktop', regex=False),
+                      lowered.str.contains('notebook', regex=False)],
+                     ['CPU', 'LAPTOP'], default='Equipo Informático')
+
+
+def physical_printers(printers):
+    """
+    Versión vectorizada de printers.is_physical_printer/printer_record
+
+    Args:
+        printers (pd.DataFrame): Extracto de printers (id, hardware_id, name, driver, port)
+
+    Returns:
+        pd.DataFrame: Impresoras físicas con PRINTER_COLUMNS
+    """
+    names = printers['name'].fillna('').astype(str)
+    ports = printers['port'].fillna('').astype(str).str.strip().str.casefold()
+    virtual = ports.isin(VIRTUAL_PORTS)
+    for keyword in VIRTUAL_NAME_KEYWORDS:
+        virtual |= names.str.casefold().str.contains(keyword, regex=False)
+    printers = printers[~virtual].sort_values(['hardware_id', 'id'], kind='stable')
+    printers = printers.assign(brand=printers['name'].fillna('').astype(str).str.split(' ').str[0],
+                               identifier=printers['name'], serial_number='')
+    return printers[PRINTER_COLUMNS].reset_index(drop=True)
+
+
+def _none_for_missing(frame):
+    """Reemplaza NaN/NA por None para que los registros tengan la misma forma que los de MySQL"""
+    return frame.astype(object).where(frame.notna(), None)
+
+
+class StagedInventory:
+    """
+    Inventario preparado por columnas con pandas: une hardware, bios y usuarios,
+    elimina duplicados, filtra periféricos y clasifica el tipo de equipo de forma
+    vectorizada. Se puede usar como data_source de OCSInventoryToExcel y
+    guardar como snapshot Parquet/Feather para no volver a consultar la base.
+    """
+
+    def __init__(self, devices, monitors, keyboards, mice, printers=None):
+        """
+        Args:
+            devices (pd.DataFrame): Un registro por dispositivo (DEVICE_COLUMNS,
+                EMPLEADO_COLUMNS y equipment_type)
+            monitors, keyboards, mice (pd.DataFrame): Periféricos (PERIPHERAL_COLUMNS)
+            printers (pd.DataFrame): Impresoras físicas (PRINTER_COLUMNS)
+        """
+        self.devices = devices
+        self.monitors = monitors
+        self.keyboards = keyboards
+        self.mice = mice
+        self.printers = printers if printers is not None else pd.DataFrame(columns=PRINTER_COLUMNS)
+
+    @classmethod
+    def from_frames(cls, hardware, bios, monitors, inputs, usuarios, printers=None):
+        """
+        Prepara el inventario a partir de los extractos de cada tabla
+
+        Returns:
+            StagedInventory: Inventario listo para generar actas
+        """
+        # hardware LEFT JOIN bios + SELECT DISTINCT
+        devices = hardware.merge(bios, on='hardware_id', how='left')
+        devices = devices.drop_duplicates(subset=[column for column in DEVICE_COLUMNS if column in devices])
+
+        # Un empleado por HARDWARE_ID (es la clave primaria de usuarios)
+        usuarios = usuarios.drop_duplicates(subset='hardware_id', keep='first')
+        devices = devices.merge(usuarios, on='hardware_id', how='left')
+
+        devices['equipment_type'] = classify_equipment(devices['dev_type'])
+        devices = devices.sort_values('username', key=lambda names: names.str.casefold(), kind='stable')
+        devices = devices.reset_index(drop=True)
+
+        # Monitores con número de serie
+        serials = monitors['serial_number']
+        monitors = monitors[serials.notna() & (serials.astype(str) != '')]
+        monitors = monitors.sort_values(['hardware_id', 'id'], kind='stable')
+
+        # Primer teclado y primer mouse de cada dispositivo (equivale a LIMIT 1)
+        inputs = inputs.sort_values(['hardware_id', 'id'], kind='stable')
+        inputs = inputs.drop_duplicates(subset=['hardware_id', 'brand'], keep='first').assign(serial_number='')
+        keyboards = inputs[inputs['brand'] == 'Keyboard']
+        mice = inputs[inputs['brand'] == 'Pointing']
+
+        return cls(devices,
+                   monitors[PERIPHERAL_COLUMNS].reset_index(drop=True),
+                   keyboards[PERIPHERAL_COLUMNS].reset_index(drop=True),
+                   mice[PERIPHERAL_COLUMNS].reset_index(drop=True),
+                   physical_printers(printers) if printers is not None else None)
+
+    @classmethod
+    def from_database(cls, db):
+        """
+        Carga los extractos con una consulta por tabla
+
+        Args:
+            db (ocs_db.OCSDatabase): Conexión a OCS Inventory
+        """
+        frames = {}
+        for name, query in EXTRACT_QUERIES.items():
+            # Columnas explícitas para que una tabla vacía también tenga su esquema
+            columns = re.findall(r'\bas (\w+)', query)
+            frames[name] = pd.DataFrame.from_records(db.query(query, dictionary=False), columns=columns)
+        return cls.from_frames(**frames)
+
+    @classmethod
+    def from_dump(cls, source):
+        """
+        Carga los extractos desde las columnas ya leídas de los volcados SQL
+
+        Args:
+            source (ocs_dump.OCSDumpSource): Volcados de OCS Inventory
+        """
+        if source.tables is None:
+            source.load()
+        frames = {}
+        for name, renames in DUMP_RENAMES.items():
+            table = source.tables[name]
+            frame = pd.DataFrame({column: list(table.data[column]) for column in renames})
+            frames[name] = frame.rename(columns=renames)
+        hardware = frames['hardware']
+        frames['hardware'] = hardware[hardware['username'].fillna('') != '']
+        inputs = frames['inputs']
+        frames['inputs'] = inputs[inputs['brand'].isin(['Keyboard', 'Pointing'])]
+        return cls.from_frames(**frames)
+
+    @classmethod
+    def from_snapshot(cls, folder, fmt='parquet'):
+        """
+        Carga un snapshot guardado con save_snapshot
+
+        Args:
+            folder (str): Carpeta del snapshot
+            fmt (str): 'parquet' o 'feather'
+        """
+        reader = pd.read_parquet if fmt == 'parquet' else pd.read_feather
+        frames = {}
+        for name in ('devices',) + PERIPHERALS:
+            path = os.path.join(folder, f'{name}.{fmt}')
+            # Los snapshots anteriores a las impresoras no tienen printers
+            if name != 'printers' or os.path.exists(path):
+                frames[name] = reader(path)
+        return cls(**frames)
+
+    def save_snapshot(self, folder, fmt='parquet'):
+        """
+        Guarda el inventario preparado (requiere pyarrow)
+
+        Args:
+            folder (str): Carpeta de destino
+            fmt (str): 'parquet' o 'feather'
+        """
+        os.makedirs(folder, exist_ok=True)
+        for name in ('devices',) + PERIPHERALS:
+            frame = getattr(self, name).reset_index(drop=True)
+            path = os.path.join(folder, f'{name}.{fmt}')
+            if fmt == 'parquet':
+                frame.to_parquet(path, index=False)
+            else:
+                frame.to_feather(path)
+
+    # Interfaz de data_source para OCSInventoryToExcel
+
+    def load(self):
+        return True
+
+    def get_devices_data(self):
+        """Devuelve los dispositivos con la misma forma que get_devices_data"""
+        return self._records(self.devices)
+
+    def iter_devices(self, batch_size=500):
+        """Devuelve los dispositivos por lotes"""
+        for start in range(0, len(self.devices), batch_size):
+            yield self._records(self.devices.iloc[start:start + batch_size])
+
+    def _records(self, devices):
+        """Arma los registros de dispositivo con sus periféricos agrupados por HARDWARE_ID"""
+        hardware_ids = set(devices['hardware_id'].tolist())
+        peripherals = {name: self._group(getattr(self, name), hardware_ids, PERIPHERAL_RECORDS[name])
+                       for name in PERIPHERALS}
+
+        # Los snapshots anteriores a LASTDATE/CHECKSUM no tienen esas columnas: quedan en None
+        frame = _none_for_missing(devices.reindex(columns=DEVICE_COLUMNS + EMPLEADO_COLUMNS + ['equipment_type']))
+        records = []
+        employee_end = len(DEVICE_COLUMNS) + len(EMPLEADO_COLUMNS)
+        for row in frame.itertuples(index=False, name=None):
+            device = Device(*row[:len(DEVICE_COLUMNS)], equipment_type=row[employee_end])
+            for name, grouped in peripherals.items():
+                setattr(device, name, list(grouped.get(device.hardware_id, ())))
+            employee = Employee._make(row[len(DEVICE_COLUMNS):employee_end])
+            # Sin fila en usuarios: igual que en MySQL, el dispositivo queda sin empleado
+            if employee.nombre_completo is not None or employee.ciudad_usuario is not None:
+                device.employee = employee
+            records.append(device)
+        return records
+
+    @staticmethod
+    def _group(frame, hardware_ids, record):
+        """Agrupa las filas de un periférico (record: records.Monitor, ...) por HARDWARE_ID"""
+        frame = frame[frame['hardware_id'].isin(hardware_ids)]
+        grouped = {}
+        frame = frame[[column for column in PRINTER_COLUMNS if column in frame]]
+        for row in _none_for_missing(frame).itertuples(index=False, name=None):
+            grouped.setdefault(row[0], []).append(record._make(row[1:]))
+        return grouped
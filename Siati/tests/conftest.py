@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+
+# Los módulos de Siati se importan como scripts sueltos (import script, import records, ...)
+SIATI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SIATI_DIR)
+
+from benchmark import SQLiteDatabase, synthetic_tables  # noqa: E402
+
+
+TEMPLATE_PATH = os.path.join(SIATI_DIR, 'plantilla_inventario.xlsx')
+
+
+@pytest.fixture
+def ocs_tables():
+    """Tablas de OCS de una flota sintética de 60 equipos"""
+    return synthetic_tables(60)
+
+
+@pytest.fixture
+def ocs_db(ocs_tables):
+    """Base SQLite con las tablas de OCS, sin la tabla usuarios"""
+    db = SQLiteDatabase()
+    db.load_tables({name: rows for name, rows in ocs_tables.items() if name != 'usuarios'})
+    return db
+
+
+@pytest.fixture
+def full_db(ocs_tables):
+    """Base SQLite con las tablas de OCS, incluida usuarios"""
+    db = SQLiteDatabase()
+    db.load_tables(ocs_tables)
+    return db
@@ -0,0 +1,109 @@
+import io
+import json
+import threading
+import zipfile
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from acta_service import ActaService, RenderedActaCache, create_server
+from conftest import TEMPLATE_PATH
+from script import OCSInventoryToExcel
+
+
+@pytest.fixture
+def service(full_db):
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH)
+    generator.db = full_db
+    service = ActaService(generator, RenderedActaCache())
+    assert service.start()
+    return service
+
+
+@pytest.fixture
+def base_url(service):
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url):
+    try:
+        with urlopen(url) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as err:
+        return err.code, err.headers, err.read()
+
+
+def _touch(db, hardware_id):
+    with db.connection:
+        db.connection.execute("UPDATE hardware SET LASTDATE = '2030-01-01 00:00:00' WHERE ID = ?", (hardware_id,))
+
+
+def test_acta_is_rendered_once_and_then_served_from_the_cache(base_url, service):
+    status, headers, first = _get(f"{base_url}/actas/1")
+    assert status == 200
+    assert headers['Content-Type'].endswith('spreadsheetml.sheet')
+    assert zipfile.is_zipfile(io.BytesIO(first))
+
+    status, _, second = _get(f"{base_url}/actas/1")
+
+    assert status == 200
+    assert second == first
+    assert service.cache.stats()['aciertos'] == 1
+    assert service.cache.stats()['fallos'] == 1
+
+
+def test_changed_lastdate_renders_the_acta_again(base_url, service, full_db):
+    _get(f"{base_url}/actas/1")
+    _touch(full_db, 1)
+
+    status, _, _ = _get(f"{base_url}/actas/1")
+
+    assert status == 200
+    assert service.cache.stats()['aciertos'] == 0
+    assert service.cache.stats()['fallos'] == 2
+
+
+def test_city_zip_and_health(base_url, ocs_tables):
+    city = ocs_tables['usuarios'][0][5]
+    expected = sum(1 for row in ocs_tables['usuarios'] if row[5] == city)
+
+    status, headers, content = _get(f"{base_url}/actas/ciudad/{city}.zip")
+    assert status == 200
+    assert headers['Content-Type'] == 'application/zip'
+    assert len(zipfile.ZipFile(io.BytesIO(content)).namelist()) == expected
+
+    status, _, body = _get(f"{base_url}/salud")
+    assert status == 200
+    assert json.loads(body)['cache']['actas'] == expected
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/actas/999999', 404),
+    ('/otra/ruta', 404),
+    ('/actas/colaborador', 404),
+    ('/actas/1?formato=docx', 400),
+])
+def test_error_paths(base_url, path, status):
+    code, headers, body = _get(f"{base_url}{path}")
+
+    assert code == status
+    assert headers['Content-Type'].startswith('application/json')
+    assert 'error' in json.loads(body)
+
+
+def test_reassigned_device_renders_the_new_collaborator(base_url, service, full_db):
+    _get(f"{base_url}/actas/1")
+    with full_db.connection:
+        full_db.connection.execute("UPDATE usuarios SET NOMBRE = 'NUEVO COLABORADOR' WHERE HARDWARE_ID = 1")
+
+    status, headers, _ = _get(f"{base_url}/actas/1")
+
+    assert status == 200
+    assert 'NUEVO%20COLABORADOR' in headers['Content-Disposition']
+    assert service.cache.stats()['aciertos'] == 0
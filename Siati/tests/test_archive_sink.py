@@ -0,0 +1,74 @@
+import csv
+import hashlib
+import io
+import os
+import zipfile
+
+import pytest
+
+from archive_sink import MANIFEST_HEADERS, MANIFEST_NAME, ZipArchiveSink
+from conftest import TEMPLATE_PATH
+from device_filter import DeviceFilter
+from script import OCSInventoryToExcel, main
+
+
+def _generator(db, **options):
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH, **options)
+    generator.db = db
+    generator.connect_database = lambda: True
+    return generator
+
+
+def _manifest(archive):
+    text = archive.read(MANIFEST_NAME).decode('utf-8-sig')
+    return list(csv.reader(io.StringIO(text), delimiter=';'))
+
+
+def test_each_city_zip_holds_its_actas_and_manifest(full_db, ocs_tables, tmp_path):
+    generator = _generator(full_db)
+    generator.generate_all_excel_files(str(tmp_path), archive=True)
+
+    cities = {row[5] for row in ocs_tables['usuarios']}
+    archives = generator.last_run['archives']
+    assert {os.path.basename(path) for path in archives} <= {f"{city}.zip" for city in cities} | {'SinCiudad.zip'}
+    actas = 0
+    for path in archives:
+        with zipfile.ZipFile(path) as archive:
+            header, *rows = _manifest(archive)
+            assert header == MANIFEST_HEADERS
+            assert sorted(row[0] for row in rows) == sorted(set(archive.namelist()) - {MANIFEST_NAME})
+            for name, _, _, _, _, _, size, digest in rows:
+                content = archive.read(name)
+                assert int(size) == len(content)
+                assert digest == hashlib.sha256(content).hexdigest()
+            actas += len(rows)
+    assert actas == len(generator.last_run['created']) == 60
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_filtered_run_does_not_replace_the_city_zip(full_db, tmp_path):
+    _generator(full_db).generate_all_excel_files(str(tmp_path), archive=True)
+    before = {name: os.path.getmtime(tmp_path / name) for name in os.listdir(tmp_path)}
+
+    generator = _generator(full_db, device_filter=DeviceFilter(hardware_ids=[5]))
+    with pytest.raises(ValueError):
+        generator.generate_all_excel_files(str(tmp_path), archive=True)
+
+    assert {name: os.path.getmtime(tmp_path / name) for name in os.listdir(tmp_path)} == before
+
+
+def test_cli_rejects_zip_with_filters(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(['--zip', '--hardware-id', '5'])
+
+    assert exit_info.value.code == 2
+    assert '--zip' in capsys.readouterr().err
+
+
+def test_abort_removes_the_partial_zip(tmp_path):
+    sink = ZipArchiveSink(str(tmp_path))
+    sink.add('QUITO', 'acta.xlsx', b'contenido')
+
+    sink.abort()
+
+    assert os.listdir(tmp_path) == []
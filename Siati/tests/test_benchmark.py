@@ -0,0 +1,12 @@
+from benchmark import bench_pipeline
+from conftest import TEMPLATE_PATH
+
+
+def test_pipeline_times_render_acta_by_stage():
+    result = bench_pipeline(TEMPLATE_PATH, 8)
+
+    assert result['devices'] == 8
+    assert {'cell_writes', 'load_template', 'save'} <= set(result['render_stages'])
+    assert sum(result['render_stages'].values()) <= result['render_seconds']
+    assert result['total_seconds'] == result['extraction_seconds'] + result['render_seconds']
+    assert result['peak_rss_mb'] > 0 and result['peak_rss_children_mb'] >= 0
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from cell_mapping import DEFAULT_MAPPING, CellMapping
+from records import Device
+
+
+ACCESSORS = {'equipment_type': lambda device: 'DESKTOP'}
+
+
+@pytest.fixture
+def spec():
+    with open(DEFAULT_MAPPING, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def test_default_mapping_compiles(spec):
+    assert CellMapping(spec, ACCESSORS).header
+
+
+@pytest.mark.parametrize('path, field', [
+    (('header', 0), 'nombre_completoo'),
+    (('table', 'main', 'model'), 'dev_tpye'),
+    (('table', 'peripherals', 0, 'cells', 'serial'), 'port'),
+    (('blocks', 0, 'cells', 0), 'processor'),
+    (('sheets', 0, 'columns', 0), 'nombre'),
+])
+def test_unknown_fields_are_rejected_when_compiling(spec, path, field):
+    entry = spec
+    for key in path:
+        entry = entry[key]
+    entry['field'] = field
+
+    with pytest.raises(ValueError, match=field):
+        CellMapping(spec, ACCESSORS)
+
+
+def test_unknown_accessor_is_rejected(spec):
+    spec['table']['main']['description'] = {'accessor': 'tipo_equipo'}
+
+    with pytest.raises(ValueError, match='tipo_equipo'):
+        CellMapping(spec, ACCESSORS)
+
+
+def test_misspelled_device_attribute_fails():
+    device = Device('PC-01', 'Windows 10', 'Dell Inc.', 'OptiPlex', 'ABC123', 'Desktop', 7, None, 1)
+
+    assert device.nombre_completo is None
+    with pytest.raises(AttributeError):
+        device.dev_tpye
@@ -0,0 +1,73 @@
+import pytest
+
+from benchmark import SQLiteDatabase
+from conftest import TEMPLATE_PATH
+from device_filter import DeviceFilter
+from script import OCSInventoryToExcel, main
+
+
+@pytest.fixture
+def users_csv(tmp_path, ocs_tables):
+    """Users.csv con los empleados de la flota sintética (sin encabezado, separado por ';')"""
+    path = tmp_path / 'Users.csv'
+    lines = [f"{hardware_id};{ciudad};{empresa};AREA;{departamento};{cargo};{nombre};{correo}"
+             for hardware_id, empresa, departamento, nombre, cargo, ciudad, correo in ocs_tables['usuarios']]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8-sig')
+    return str(path)
+
+
+def _generate(db, employees, device_filter):
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH, employees=employees, device_filter=device_filter)
+    generator.db = db
+    generator.load_employee_directory()
+    return generator, generator.get_devices_data()
+
+
+def test_csv_directory_resolves_employee_filters_without_usuarios(ocs_db, ocs_tables, users_csv):
+    expected = {row[0] for row in ocs_tables['usuarios'] if row[5] == 'QUITO' and row[1] == 'SIATIADUANAS S.A.'}
+    assert expected
+
+    generator, devices = _generate(ocs_db, users_csv,
+                                   DeviceFilter(cities=['quito'], companies=['SiatiAduanas S.A.']))
+
+    assert {device.hardware_id for device in devices} == expected
+    assert all(device.ciudad_usuario == 'QUITO' for device in devices)
+    query, params = generator.devices_query()
+    assert 'usuarios' not in query
+
+
+def test_csv_directory_filters_by_name_department_and_email(ocs_db, ocs_tables, users_csv):
+    hardware_id, _, departamento, nombre, _, _, correo = ocs_tables['usuarios'][3]
+
+    _, by_email = _generate(ocs_db, users_csv, DeviceFilter(emails=[correo.upper()]))
+    _, by_name = _generate(ocs_db, users_csv, DeviceFilter(employee_names=[nombre.lower()],
+                                                           departments=[departamento]))
+
+    assert [device.hardware_id for device in by_email] == [hardware_id]
+    assert hardware_id in {device.hardware_id for device in by_name}
+
+
+def test_csv_directory_without_matches_returns_no_devices(ocs_db, users_csv):
+    _, devices = _generate(ocs_db, users_csv, DeviceFilter(cities=['LIMA']))
+
+    assert devices == []
+
+
+def test_usuarios_table_keeps_the_subquery(ocs_tables):
+    db = SQLiteDatabase()
+    db.load_tables(ocs_tables)
+    expected = {row[0] for row in ocs_tables['usuarios'] if row[5] == 'QUITO'}
+
+    generator, devices = _generate(db, 'usuarios', DeviceFilter(cities=['quito']))
+
+    assert {device.hardware_id for device in devices} == expected
+    query, params = generator.devices_query()
+    assert 'FROM usuarios WHERE UPPER(CIUDAD) IN' in query
+
+
+def test_cli_rejects_a_non_numeric_hardware_id(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(['--hardware-id', '5,abc'])
+
+    assert exit_info.value.code == 2
+    assert '--hardware-id' in capsys.readouterr().err
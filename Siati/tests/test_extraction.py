@@ -0,0 +1,23 @@
+import pytest
+
+from conftest import TEMPLATE_PATH
+from script import OCSInventoryToExcel
+
+
+def _extract(db, **options):
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH, **options)
+    generator.db = db
+    return generator.get_devices_data()
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_per_device_printers_match_bulk_without_a_query_per_device(full_db, concurrency):
+    bulk = _extract(full_db)
+    full_db.queries = 0
+
+    devices = _extract(full_db, bulk_extraction=False, extraction_concurrency=concurrency)
+
+    assert [device.to_dict() for device in devices] == [device.to_dict() for device in bulk]
+    assert any(device.printers for device in devices)
+    # Consulta principal, monitores, teclados, mouse y empleado por equipo, y un bloque de impresoras
+    assert full_db.queries == 1 + 4 * len(devices) + 1
@@ -0,0 +1,102 @@
+import pytest
+
+import extraction_cache
+from conftest import TEMPLATE_PATH
+from extraction_cache import ExtractionCache
+from records import Device
+from script import OCSInventoryToExcel
+
+
+def _devices(count, start=1):
+    return [Device(f'PC-{index}', 'Windows 10', 'Dell Inc.', 'OptiPlex', f'SN{index}', 'Desktop', index,
+                   '2025-01-01 08:00:00', 1) for index in range(start, start + count)]
+
+
+def _extract(db, cache_path, employees=None):
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH, cache_path=str(cache_path), employees=employees)
+    generator.db = db
+    generator.load_employee_directory()
+    devices = generator.get_devices_data()
+    generator.extraction_cache.close()
+    return generator, {device.hardware_id: device for device in devices}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(str(tmp_path / 'cache.sqlite'), ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_entry_expires_after_its_ttl(cache, monkeypatch):
+    cache.store('clave', 'huella', _devices(3))
+    assert cache.lookup('clave', 'huella') == 3
+    assert cache.load('clave') == _devices(3)
+
+    now = extraction_cache.time.time()
+    monkeypatch.setattr(extraction_cache.time, 'time', lambda: now + 61)
+
+    assert cache.lookup('clave', 'huella') is None
+    assert cache.load('clave') == []
+
+
+def test_changed_fingerprint_drops_the_entry(cache):
+    cache.store('clave', 'huella', _devices(3))
+
+    assert cache.lookup('clave', None) == 3
+    assert cache.lookup('clave', 'otra huella') is None
+    assert cache.lookup('clave', 'huella') is None
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.store('vieja', 'huella', _devices(50))
+    cache.store('usada', 'huella', _devices(50, 100))
+    cache.lookup('vieja', 'huella')
+    # Entra la usada más recientemente ('vieja') y la nueva, no las tres
+    size = cache.connection.execute("SELECT bytes FROM entries WHERE key = 'vieja'").fetchone()[0]
+    cache.max_bytes = size * 3 // 2
+
+    cache.store('nueva', 'huella', _devices(1, 200))
+
+    assert cache.lookup('usada', 'huella') is None
+    assert cache.lookup('vieja', 'huella') == 50
+    assert cache.lookup('nueva', 'huella') == 1
+
+
+def test_second_run_reads_the_cache(full_db, tmp_path):
+    _, first = _extract(full_db, tmp_path / 'cache.sqlite')
+    queries = full_db.queries
+
+    _, second = _extract(full_db, tmp_path / 'cache.sqlite')
+
+    assert second == first
+    # Solo la huella: hardware y usuarios
+    assert full_db.queries - queries == 2
+
+
+@pytest.mark.parametrize('employees', [None, 'usuarios'])
+def test_reassigned_device_in_usuarios_invalidates_the_entry(full_db, tmp_path, employees):
+    _, first = _extract(full_db, tmp_path / 'cache.sqlite', employees)
+    hardware_id = next(hardware_id for hardware_id, device in first.items() if device.employee is not None)
+
+    with full_db.connection:
+        full_db.connection.execute("UPDATE usuarios SET NOMBRE = 'NUEVO COLABORADOR' WHERE HARDWARE_ID = ?",
+                                   (hardware_id,))
+    _, second = _extract(full_db, tmp_path / 'cache.sqlite', employees)
+
+    assert second[hardware_id].nombre_completo == 'NUEVO COLABORADOR'
+
+
+def test_edited_users_csv_invalidates_the_entry(full_db, tmp_path, ocs_tables):
+    users_csv = tmp_path / 'Users.csv'
+    rows = [f"{hardware_id};{ciudad};{empresa};AREA;{departamento};{cargo};{nombre};{correo}"
+            for hardware_id, empresa, departamento, nombre, cargo, ciudad, correo in ocs_tables['usuarios']]
+    users_csv.write_text('\n'.join(rows) + '\n', encoding='utf-8-sig')
+    _extract(full_db, tmp_path / 'cache.sqlite', str(users_csv))
+
+    hardware_id = int(rows[0].split(';')[0])
+    rows[0] = rows[0].replace(rows[0].split(';')[6], 'NUEVO COLABORADOR')
+    users_csv.write_text('\n'.join(rows) + '\n', encoding='utf-8-sig')
+    _, second = _extract(full_db, tmp_path / 'cache.sqlite', str(users_csv))
+
+    assert second[hardware_id].nombre_completo == 'NUEVO COLABORADOR'
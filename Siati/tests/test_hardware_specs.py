@@ -0,0 +1,49 @@
+import os
+
+import ocs_dump
+from conftest import SIATI_DIR, TEMPLATE_PATH
+from hardware_specs import specs_from_dump
+from ocs_dump import OCSDumpSource
+from script import OCSInventoryToExcel
+
+
+DUMP = """INSERT INTO `hardware` (`ID`, `NAME`, `OSNAME`, `LASTDATE`, `CHECKSUM`, `PROCESSORT`, `MEMORY`) VALUES
+(7, 'PC-01', 'Windows 10', '2025-01-01 08:00:00', 1, 'Intel(R) Core(TM) i7-8700 CPU @ 3.20GHz [6 core(s) x86_64]', 16384);
+INSERT INTO `cpus` (`HARDWARE_ID`, `CORES`, `LOGICAL_CPUS`) VALUES (7, 6, 12);
+INSERT INTO `memories` (`HARDWARE_ID`, `CAPACITY`, `SPEED`) VALUES (7, 8192, '2666'), (7, 8192, '2666'), (7, 0, '');
+INSERT INTO `drives` (`HARDWARE_ID`, `TYPE`, `TOTAL`, `FREE`) VALUES
+(7, 'Hard Drive', 476164, 200000), (7, 'CD-Rom Drive', 600, 0), (8, 'Hard Drive', 1000, 10);
+INSERT INTO `videos` (`HARDWARE_ID`, `NAME`) VALUES (7, 'Intel(R) UHD Graphics 630'), (7, '0');
+"""
+
+
+def test_specs_from_dump_reduces_the_loaded_tables(tmp_path):
+    path = tmp_path / 'ocsweb.sql'
+    path.write_text(DUMP, encoding='utf-8')
+
+    specs = specs_from_dump(OCSDumpSource([str(path)]))
+
+    assert specs == {7: {'cpu': 'Intel(R) Core(TM) i7-8700 CPU @ 3.20GHz (6 núcleos, 12 hilos)',
+                         'ram': '16 GB (2 módulos en 3 ranuras, 2666 MHz)',
+                         'disk': '465 GB en 1 volumen (195 GB libres)',
+                         'gpu': 'Intel(R) UHD Graphics 630'}}
+
+
+def test_optional_dump_tables_are_read_in_the_same_pass(monkeypatch):
+    parsed = []
+    iter_dump_rows = ocs_dump.iter_dump_rows
+
+    def counted(path, tables):
+        parsed.append(os.path.basename(path))
+        return iter_dump_rows(path, tables)
+
+    monkeypatch.setattr(ocs_dump, 'iter_dump_rows', counted)
+
+    source = OCSDumpSource([os.path.join(SIATI_DIR, 'ocsweb.sql'), os.path.join(SIATI_DIR, 'usuarios.sql')])
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH, data_source=source, employees='usuarios',
+                                    include_software=True, include_specs=True, serial_check=True)
+    assert generator.connect_database()
+    blacklist = generator.load_serial_blacklist()
+
+    assert parsed == ['ocsweb.sql', 'usuarios.sql']
+    assert len(generator.software_inventory) and len(generator.hardware_specs) and blacklist
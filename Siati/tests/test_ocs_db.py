@@ -0,0 +1,39 @@
+import pytest
+from mysql.connector import errorcode, errors
+
+from ocs_db import OCSDatabase, is_transient
+
+
+@pytest.mark.parametrize('err', [
+    errors.OperationalError(msg='Lost connection to MySQL server', errno=errorcode.CR_SERVER_LOST),
+    errors.DatabaseError(msg='Deadlock found', errno=errorcode.ER_LOCK_DEADLOCK),
+    errors.PoolError('Failed getting connection; pool exhausted'),
+    errors.InterfaceError('Lost connection to MySQL server during query'),
+    errors.OperationalError('MySQL Connection not available'),
+])
+def test_lost_connections_locks_and_a_full_pool_are_retried(err):
+    assert is_transient(err)
+
+
+@pytest.mark.parametrize('err', [
+    errors.ProgrammingError(msg="Access denied for user 'ocs'", errno=errorcode.ER_ACCESS_DENIED_ERROR),
+    errors.OperationalError(msg='Unknown column in field list', errno=errorcode.ER_BAD_FIELD_ERROR),
+    errors.InterfaceError(msg='Failed parsing the packet', errno=errorcode.CR_MALFORMED_PACKET),
+    errors.InterfaceError('Use multi=True when executing multiple statements'),
+    errors.OperationalError('Failed processing format-parameters'),
+])
+def test_other_operational_and_interface_errors_fail_at_once(err):
+    assert not is_transient(err)
+
+
+def test_non_transient_error_is_not_retried():
+    db = OCSDatabase({}, retries=3, retry_delay=0)
+    calls = []
+
+    def operation(_):
+        calls.append(1)
+        raise errors.InterfaceError('Use multi=True when executing multiple statements')
+
+    with pytest.raises(errors.InterfaceError):
+        db._with_retry(operation, use_pool=False)
+    assert len(calls) == 1
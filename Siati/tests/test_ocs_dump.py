@@ -0,0 +1,53 @@
+from ocs_dump import OCSDumpSource
+
+
+PRINTERS = """CREATE TABLE `printers` (
+  `ID` int(11) NOT NULL,
+  `HARDWARE_ID` int(11) NOT NULL,
+  `NAME` varchar(255) DEFAULT NULL,
+  `DRIVER` varchar(255) DEFAULT NULL,
+  `PORT` varchar(255) DEFAULT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+INSERT INTO `printers` (`ID`, `HARDWARE_ID`, `NAME`, `DRIVER`, `PORT`) VALUES
+{rows};
+"""
+
+USUARIOS = """INSERT INTO `usuarios` (`HARDWARE_ID`, `EMPRESA`, `DEPARTAMENTO`, `NOMBRE`, `CARGO`, `CIUDAD`, `CORREO`) VALUES
+{rows};
+"""
+
+
+def _write(path, template, rows):
+    path.write_text(template.format(rows=',\n'.join(rows)), encoding='utf-8')
+    return str(path)
+
+
+def test_printers_in_ocsweb_and_printers_dump_are_not_duplicated(tmp_path):
+    rows = ["(1, 7, 'HP LaserJet M404', 'HP Universal Printing PCL 6', 'USB001')",
+            "(2, 7, 'Microsoft Print to PDF', 'Microsoft Print To PDF', 'PORTPROMPT:')"]
+    # En el volcado posterior OCS volvió a insertar las impresoras del equipo con otros ID
+    later = ["(5, 7, 'HP LaserJet M404', 'HP Universal Printing PCL 6', 'USB001')",
+             "(6, 7, 'Microsoft Print to PDF', 'Microsoft Print To PDF', 'PORTPROMPT:')",
+             "(7, 8, 'EPSON L3150', 'EPSON L3150 Series', 'USB002')"]
+    source = OCSDumpSource([_write(tmp_path / 'ocsweb.sql', PRINTERS, rows),
+                            _write(tmp_path / 'printers.sql', PRINTERS, later)])
+    source.load()
+
+    table = source.tables['printers']
+    assert table.size == 3
+    assert [table.value('ID', position) for position in table.rows_for(7)] == [1, 2]
+    assert [table.value('ID', position) for position in table.rows_for(8)] == [7]
+
+
+def test_usuarios_in_several_dumps_keep_the_first_row_and_add_the_rest(tmp_path):
+    first = ["(7, 'SIATIADUANAS S.A.', 'SISTEMAS', 'ANA PEREZ', 'ANALISTA', 'QUITO', 'aperez@siatigroup.com')"]
+    second = ["(7, 'SIATIADUANAS S.A.', 'SISTEMAS', 'ANA PEREZ', 'JEFE', 'QUITO', 'aperez@siatigroup.com')",
+              "(8, 'SIATIADUANAS S.A.', 'FINANCIERO', 'LUIS MORA', 'CONTADOR', 'QUITO', 'lmora@siatigroup.com')"]
+    source = OCSDumpSource([_write(tmp_path / 'ocsweb.sql', USUARIOS, first),
+                            _write(tmp_path / 'usuarios.sql', USUARIOS, second)])
+    source.load()
+
+    usuarios = source.tables['usuarios']
+    assert usuarios.size == 2
+    assert usuarios.data['CARGO'] == ['ANALISTA', 'CONTADOR']
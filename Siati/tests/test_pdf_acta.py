@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from cell_mapping import DEFAULT_MAPPING, CellMapping
+from pdf_acta import render_pdf, table_columns, table_rows
+from records import Device, Employee, Monitor
+
+
+def _device():
+    device = Device('PC-01', 'Windows 10', 'Dell Inc.', 'OptiPlex 7070', 'ABC123', 'Desktop', 7,
+                    '2025-01-01 08:00:00', 1)
+    device.monitors = [Monitor('Dell Inc.', 'DELL E1916H', 'CN-0001')]
+    device.keyboards = []
+    device.mice = []
+    device.printers = []
+    device.employee = Employee('SIATIADUANAS S.A.', 'SISTEMAS', 'ANA PEREZ', 'ANALISTA', 'QUITO')
+    return device
+
+
+@pytest.fixture
+def moved_mapping():
+    """Mapeo por defecto con la tabla y el departamento en otras celdas"""
+    with open(DEFAULT_MAPPING, encoding='utf-8') as handle:
+        spec = json.load(handle)
+    spec['table']['first_row'] = 40
+    spec['table']['max_rows'] = 5
+    for entry in spec['header']:
+        if entry.get('name') == 'departamento':
+            entry['cell'] = 'E8'
+    return CellMapping(spec, {'equipment_type': lambda device: 'DESKTOP'})
+
+
+def test_table_rows_follow_the_mapping(moved_mapping):
+    cells = dict(moved_mapping.build(_device(), datetime(2025, 1, 1)))
+
+    rows = table_rows(cells, moved_mapping)
+
+    assert [name for name, _ in table_columns(moved_mapping)] == [
+        'number', 'description', 'label', 'status', 'brand', 'model', 'serial', 'notes']
+    assert rows[0][:2] == ['1', 'DESKTOP']
+    assert rows[1][1] == 'MONITOR'
+    # Las filas fijas siguen a los periféricos; las del tope conservan el número de la plantilla
+    assert [row[1] for row in rows[2:]] == ['UPS', 'TELEFONO', 'BASE LAPTOP', 'MOCHILA']
+    assert [row[0] for row in rows[2:]] == ['3', '4', '5', '']
+    assert moved_mapping.named_cells['departamento'] == 'E8'
+    assert moved_mapping.named_cells['motivo_ingreso'] == 'H13'
+
+
+def test_render_pdf_reads_the_mapped_cells(moved_mapping):
+    pytest.importorskip('reportlab')
+    from io import BytesIO
+
+    buffer = BytesIO()
+    render_pdf(moved_mapping.build(_device(), datetime(2025, 1, 1)), buffer, moved_mapping)
+
+    assert buffer.getvalue().startswith(b'%PDF')
@@ -0,0 +1,130 @@
+import os
+import shutil
+
+import pytest
+
+from cell_mapping import DEFAULT_MAPPING
+from conftest import TEMPLATE_PATH
+from device_filter import DeviceFilter
+from records import Device
+from render_state import RenderStateStore
+from script import OCSInventoryToExcel
+
+
+def _run(db, output_folder, output_formats=('xlsx', 'pdf'), **options):
+    run_options = {key: options.pop(key) for key in ('incremental', 'dedup', 'workers') if key in options}
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH, output_formats=output_formats, **options)
+    generator.db = db
+    generator.connect_database = lambda: True
+    generator.generate_all_excel_files(str(output_folder), **run_options)
+    return generator.last_run
+
+
+@pytest.fixture
+def mapping_copy(tmp_path):
+    """Copia del mapeo por defecto que el test puede modificar"""
+    path = tmp_path / 'mapping.json'
+    shutil.copy(DEFAULT_MAPPING, path)
+    return path
+
+
+def _device(hardware_id):
+    return Device(f'PC-{hardware_id}', 'Windows 10', 'Dell Inc.', 'OptiPlex', f'SN{hardware_id}', 'Desktop',
+                  hardware_id, '2025-01-01 08:00:00', 1)
+
+
+@pytest.mark.parametrize('options', [{'incremental': True}, {'dedup': True}])
+def test_missing_secondary_format_is_generated_again(full_db, tmp_path, options):
+    first = _run(full_db, tmp_path, **options)
+    xlsx_path = first['created'][0]
+    pdf_path = os.path.splitext(xlsx_path)[0] + '.pdf'
+    assert os.path.exists(pdf_path)
+
+    os.remove(pdf_path)
+    second = _run(full_db, tmp_path, **options)
+
+    assert second['created'] == [xlsx_path]
+    assert os.path.exists(pdf_path)
+
+
+def test_filtered_run_with_a_new_mapping_does_not_mark_the_rest_as_current(full_db, tmp_path, mapping_copy):
+    output = tmp_path / 'actas'
+    first = _run(full_db, output, ('xlsx',), incremental=True, mapping_path=str(mapping_copy))
+    mapping_copy.write_text(mapping_copy.read_text(encoding='utf-8') + '\n', encoding='utf-8')
+
+    filtered = _run(full_db, output, ('xlsx',), incremental=True, mapping_path=str(mapping_copy),
+                    device_filter=DeviceFilter(hardware_ids=[1]))
+    full = _run(full_db, output, ('xlsx',), incremental=True, mapping_path=str(mapping_copy))
+
+    assert len(filtered['created']) == 1
+    assert len(full['created']) == len(first['created']) - 1
+    assert full['unchanged'] == 1
+
+
+def test_render_engine_is_part_of_the_signature(full_db, tmp_path):
+    first = _run(full_db, tmp_path, ('xlsx',), incremental=True)
+    second = _run(full_db, tmp_path, ('xlsx',), incremental=True, render_engine='openpyxl')
+
+    assert second['created'] == first['created']
+    assert second['unchanged'] == 0
+
+
+def test_failed_render_drops_its_state(tmp_path):
+    store = RenderStateStore(str(tmp_path / 'estado.sqlite'))
+    jobs = []
+    for hardware_id in (1, 2):
+        filepath = tmp_path / f'acta_{hardware_id}.xlsx'
+        filepath.write_bytes(b'acta')
+        jobs.append((_device(hardware_id), str(filepath)))
+    store.record(jobs, [filepath for _, filepath in jobs], 'A')
+
+    # Con la plantilla B el acta 2 falla: su fila vieja no debe pasar por vigente
+    store.record(jobs, [jobs[0][1]], 'B')
+    changed, unchanged = store.select_changed(jobs, 'B')
+    store.close()
+
+    assert changed == [jobs[1]]
+    assert unchanged == 1
+
+
+def test_single_acta_does_not_start_the_process_pool(full_db, tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("no se esperaba el pool de procesos para una sola acta")
+
+    monkeypatch.setattr('script.ProcessPoolExecutor', no_pool)
+    last_run = _run(full_db, tmp_path, ('xlsx',), workers=4, device_filter=DeviceFilter(hardware_ids=[1]))
+
+    assert len(last_run['created']) == 1
+
+
+def test_dedup_rewrites_only_actas_whose_content_changed(full_db, tmp_path):
+    first = _run(full_db, tmp_path, ('xlsx',), dedup=True)
+    mtimes = {path: os.stat(path).st_mtime_ns for path in first['created']}
+    full_db.connection.execute("UPDATE bios SET SMODEL = 'Latitude 5440' WHERE HARDWARE_ID = 1")
+
+    second = _run(full_db, tmp_path, ('xlsx',), dedup=True)
+
+    assert len(second['created']) == 1
+    assert second['identical'] == len(first['created']) - 1
+    rewritten = second['created'][0]
+    assert all(os.stat(path).st_mtime_ns == mtime for path, mtime in mtimes.items() if path != rewritten)
+
+
+def test_failed_write_keeps_the_previous_acta(full_db, tmp_path, monkeypatch):
+    filepath = _run(full_db, tmp_path, ('xlsx',))['created'][0]
+    with open(filepath, 'rb') as handle:
+        previous = handle.read()
+
+    def interrupted(self, output_format, writes, path, sheets=()):
+        with open(path, 'wb') as handle:
+            handle.write(previous[:100])
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(OCSInventoryToExcel, '_write_format', interrupted)
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH)
+    with pytest.raises(OSError):
+        generator.render_acta(_device(1), filepath)
+
+    with open(filepath, 'rb') as handle:
+        assert handle.read() == previous
+    assert not any(name.endswith('.tmp') for name in os.listdir(os.path.dirname(filepath)))
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from run_metrics import RunMetrics
+
+
+def test_stages_and_counters_from_several_threads_are_not_lost():
+    metrics = RunMetrics(enabled=True)
+
+    def request(_):
+        for _ in range(2000):
+            with metrics.stage('extraction'):
+                metrics.count('queries')
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(request, range(8)))
+
+    report = metrics.report()
+    assert report['stages']['extraction']['calls'] == 16000
+    assert report['counters']['queries'] == 16000
+
+
+def test_merge_adds_drained_worker_metrics():
+    worker = RunMetrics(enabled=True)
+    with worker.stage('render'):
+        worker.count('files_created', 3)
+    metrics = RunMetrics(enabled=True)
+
+    metrics.merge(worker.drain())
+    metrics.merge(worker.drain())
+
+    assert metrics.stages['render'][1] == 1
+    assert metrics.counters == {'files_created': 3}
+    assert worker.stages == {} and worker.counters == {}
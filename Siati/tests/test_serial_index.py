@@ -0,0 +1,55 @@
+from records import Device, Monitor
+from serial_index import BLACKLISTED, DUPLICATE, MOVED, SerialIndex
+
+
+def _device(hardware_id, serial, monitors=()):
+    device = Device(f'PC-{hardware_id}', 'Windows 10', 'Dell Inc.', 'OptiPlex', serial, 'Desktop', hardware_id,
+                    '2025-01-01 08:00:00', 1)
+    device.monitors = [Monitor('Dell', 'P2419H', monitor_serial) for monitor_serial in monitors]
+    return device
+
+
+def test_serial_on_several_devices_is_a_duplicate():
+    index = SerialIndex()
+    index.add([_device(1, 'abc123 '), _device(2, 'ABC123'), _device(3, 'XYZ')])
+
+    rows = index.report_rows()
+
+    assert [(row[0], row[1], row[2], row[4]) for row in rows] == [(DUPLICATE, 'ABC123', 'EQUIPO', 1),
+                                                                  (DUPLICATE, 'ABC123', 'EQUIPO', 2)]
+
+
+def test_blacklisted_serial_is_reported_but_not_counted_as_duplicate():
+    index = SerialIndex(blacklist=['To be filled by O.E.M.'])
+    index.add([_device(1, 'To be filled by O.E.M.'), _device(2, 'to be filled by o.e.m.'), _device(3, '')])
+
+    rows = index.report_rows()
+
+    assert [(row[0], row[4]) for row in rows] == [(BLACKLISTED, 1), (BLACKLISTED, 2)]
+    assert len(index) == 0
+
+
+def test_monitor_moved_to_another_device_since_the_previous_run(tmp_path):
+    path = str(tmp_path / 'seriales.sqlite')
+    before = SerialIndex()
+    before.add([_device(1, 'SN1', monitors=['MON-9']), _device(2, 'SN2')])
+    before.save(path)
+
+    after = SerialIndex()
+    after.add([_device(1, 'SN1'), _device(2, 'SN2', monitors=['MON-9'])])
+    rows = after.report_rows(SerialIndex.load_previous(path))
+
+    assert rows == [[MOVED, 'MON-9', 'MONITOR', 'P2419H', 2, 'PC-2', '', 1, 'PC-1', '']]
+
+
+def test_filtered_run_compares_with_devices_it_did_not_generate(tmp_path):
+    path = str(tmp_path / 'seriales.sqlite')
+    full = SerialIndex()
+    full.add([_device(1, 'SN1'), _device(2, 'SN2')])
+    full.save(path)
+
+    filtered = SerialIndex()
+    filtered.add([_device(2, 'SN1')])
+    rows = filtered.report_rows(SerialIndex.load_previous(path), hardware_ids={2})
+
+    assert [(row[0], row[4]) for row in rows if row[0] == DUPLICATE] == [(DUPLICATE, 1), (DUPLICATE, 2)]
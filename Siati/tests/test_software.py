@@ -0,0 +1,62 @@
+import pickle
+
+from conftest import TEMPLATE_PATH
+from records import Device
+from script import OCSInventoryToExcel
+from software import SoftwareInventory
+
+
+def _inventory():
+    inventory = SoftwareInventory()
+    for hardware_id in range(1, 201):
+        for index in range(50):
+            inventory.add(hardware_id, f'Programa {index}', f'{index}.0', 'Editor')
+    return inventory
+
+
+def _device(hardware_id):
+    return Device('PC-01', 'Windows 10', 'Dell Inc.', 'OptiPlex 7070', 'ABC123', 'Desktop', hardware_id,
+                  '2025-01-01 08:00:00', 1)
+
+
+def test_software_rows_are_built_only_when_the_sheet_is_rendered(monkeypatch):
+    inventory = _inventory()
+    devices = [_device(hardware_id) for hardware_id in (1, 2, 3)]
+    calls = []
+    for_device = inventory.for_device
+
+    def counted(hardware_id):
+        calls.append(hardware_id)
+        return for_device(hardware_id)
+    monkeypatch.setattr(inventory, 'for_device', counted)
+
+    inventory.attach(devices)
+    assert calls == []
+
+    [(title, rows)] = OCSInventoryToExcel(None, TEMPLATE_PATH).get_cell_mapping().build_sheets(devices[1])
+    assert calls == [2]
+    assert title == 'SOFTWARE'
+    assert rows[1] == ['Programa 0', '0.0', 'Editor']
+    assert len(rows) == 51
+
+
+def test_device_software_pickles_only_its_own_rows():
+    inventory = _inventory()
+    device = _device(7)
+    inventory.attach([device])
+
+    restored = pickle.loads(pickle.dumps(device))
+
+    assert list(restored.software) == inventory.for_device(7)
+    assert len(restored.software.inventory) == 50
+    assert restored.to_dict()['software'] == device.to_dict()['software']
+
+
+def test_license_rows_do_not_count_a_missing_version():
+    inventory = SoftwareInventory()
+    inventory.add(1, 'Office', '16.0', 'Microsoft')
+    inventory.add(2, 'Office', '', 'Microsoft')
+    inventory.add(3, 'Office', '15.0', '')
+    inventory.add(3, 'Visor', '', '')
+
+    assert inventory.license_rows() == [['Office', 'Microsoft', 3, 3, 2], ['Visor', '', 1, 1, 0]]
@@ -0,0 +1,49 @@
+import pytest
+
+from benchmark import SQLiteDatabase
+from conftest import TEMPLATE_PATH
+from ocs_dump import DUMP_COLUMNS
+from script import OCSInventoryToExcel, main
+from staging import StagedInventory
+
+
+pytest.importorskip('pyarrow')
+
+
+def _sql(value):
+    return 'NULL' if value is None else str(value) if isinstance(value, int) else "'%s'" % value.replace("'", "''")
+
+
+def _write_dump(path, tables):
+    """Volcado con un INSERT por tabla, como los de phpMyAdmin"""
+    with open(path, 'w', encoding='utf-8') as handle:
+        for name, rows in tables.items():
+            columns = ', '.join(f'`{column}`' for column in DUMP_COLUMNS[name])
+            values = ',\n'.join('(' + ', '.join(_sql(value) for value in row) + ')' for row in rows)
+            handle.write(f"INSERT INTO `{name}` ({columns}) VALUES\n{values};\n\n")
+    return str(path)
+
+
+def test_export_snapshot_from_database_round_trips(tmp_path, ocs_tables):
+    db = SQLiteDatabase()
+    db.load_tables(ocs_tables)
+    generator = OCSInventoryToExcel(None, TEMPLATE_PATH)
+    generator.db = db
+    generator.connect_database = lambda: True
+
+    staged = generator.export_snapshot(str(tmp_path / 'snapshot'))
+
+    restored = StagedInventory.from_snapshot(str(tmp_path / 'snapshot'))
+    assert len(restored.devices) == len(ocs_tables['hardware'])
+    assert ([device.to_dict() for device in restored.get_devices_data()]
+            == [device.to_dict() for device in staged.get_devices_data()])
+
+
+def test_save_snapshot_option_builds_the_snapshot_from_dumps(tmp_path, ocs_tables):
+    dump = _write_dump(tmp_path / 'ocsweb.sql', ocs_tables)
+    folder = tmp_path / 'snapshot'
+
+    assert main(['--dump', dump, '--save-snapshot', str(folder)]) == 0
+
+    restored = StagedInventory.from_snapshot(str(folder))
+    assert sorted(restored.devices['hardware_id']) == sorted(row[0] for row in ocs_tables['hardware'])
@@ -0,0 +1,15 @@
+from io import BytesIO
+
+from openpyxl import load_workbook
+
+from conftest import TEMPLATE_PATH
+from xlsx_template import get_template
+
+
+def test_control_characters_are_dropped_from_text_cells():
+    content = get_template(TEMPLATE_PATH).render_bytes([('D11', 'ACME\x01 Corp\x0b'), ('D12', 'Línea\t1\n2')])
+
+    sheet = load_workbook(BytesIO(content)).active
+
+    assert sheet['D11'].value == 'ACME Corp'
+    assert sheet['D12'].value == 'Línea\t1\n2'
@@ -0,0 +1,316 @@
+import os
+import re
+import zipfile
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+
+# Plantillas ya parseadas en este proceso: ruta absoluta -> (mtime, XlsxTemplate)
+_TEMPLATE_CACHE = {}
+
+_CELL_RE = re.compile(r'<c r="([A-Z]+)(\d+)"([^>]*?)(?:/>|>.*?</c>)', re.S)
+_ROW_RE = re.compile(r'<row [^>]*?r="(\d+)"[^>]*?(?:/>|>(.*?)</row>)', re.S)
+_STYLE_RE = re.compile(r'\ss="(\d+)"')
+_ACTIVE_TAB_RE = re.compile(r'<workbookView [^>]*?activeTab="(\d+)"')
+_SHEET_RE = re.compile(r'<sheet [^>]*?r:id="([^"]+)"')
+_SHEET_ID_RE = re.compile(r'<sheet [^>]*?sheetId="(\d+)"')
+_REL_ID_RE = re.compile(r'Id="rId(\d+)"')
+# Caracteres de control que XML no admite (los mismos que openpyxl.cell.cell.ILLEGAL_CHARACTERS_RE);
+# los textos de bios y monitores de OCS a veces los traen
+_ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+
+WORKSHEET_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+WORKSHEET_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+
+
+def get_template(template_path):
+    """
+    Devuelve la plantilla parseada, leyéndola del disco solo la primera vez
+    en cada proceso (o si el archivo cambió desde la última lectura)
+
+    Args:
+        template_path (str): Ruta de la plantilla Excel
+
+    Returns:
+        XlsxTemplate: Plantilla lista para generar actas
+    """
+    path = os.path.abspath(template_path)
+    mtime = os.path.getmtime(path)
+    cached = _TEMPLATE_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, XlsxTemplate(path))
+        _TEMPLATE_CACHE[path] = cached
+    return cached[1]
+
+
+def column_index(column):
+    """Convierte una letra de columna (A, B, ..., AA) en su índice numérico"""
+    index = 0
+    for char in column:
+        index = index * 26 + ord(char) - 64
+    return index
+
+
+def column_letter(index):
+    """Convierte un índice de columna (1, 2, ..., 27) en su letra (A, B, ..., AA)"""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class XlsxTemplate:
+    """
+    Plantilla xlsx cargada en memoria. Todas las partes del archivo (logo, estilos,
+    celdas combinadas, validaciones, etc.) se copian tal cual y solo se reescriben
+    las celdas de la hoja activa que cambian en cada acta.
+    """
+
+    def __init__(self, template_path):
+        """
+        Lee la plantilla y ubica cada celda de la hoja activa dentro de su XML
+
+        Args:
+            template_path (str): Ruta de la plantilla Excel
+        """
+        self.template_path = template_path
+        with zipfile.ZipFile(template_path) as archive:
+            self.parts = [(info.filename, archive.read(info.filename)) for info in archive.infolist()]
+
+        parts = dict(self.parts)
+        self.sheet_name = self._active_sheet_part(parts)
+        self.sheet_xml = parts[self.sheet_name].decode('utf-8')
+        self._index_cells()
+        # Títulos de hojas adicionales -> partes del libro ya modificadas para incluirlas
+        self._extra_parts = {}
+
+    def _active_sheet_part(self, parts):
+        """Obtiene el nombre de la parte XML de la hoja activa del libro"""
+        workbook_xml = parts['xl/workbook.xml'].decode('utf-8')
+        rels_xml = parts['xl/_rels/workbook.xml.rels'].decode('utf-8')
+
+        active = _ACTIVE_TAB_RE.search(workbook_xml)
+        active_tab = int(active.group(1)) if active else 0
+        rel_id = _SHEET_RE.findall(workbook_xml)[active_tab]
+
+        relationship = re.search(r'<Relationship [^>]*?Id="%s"[^>]*?/>' % re.escape(rel_id), rels_xml).group(0)
+        target = re.search(r'Target="([^"]+)"', relationship).group(1)
+        return target.lstrip('/') if target.startswith('/') else 'xl/' + target
+
+    def _index_cells(self):
+        """Registra la posición de cada fila y celda dentro de sheetData"""
+        xml = self.sheet_xml
+        data_start = xml.index('<sheetData')
+        data_end = xml.index('</sheetData>')
+
+        # fila -> (inicio de la fila, posición de cierre </row>, [(columna, inicio, fin)])
+        self.rows = {}
+        for row_match in _ROW_RE.finditer(xml, data_start, data_end):
+            row = int(row_match.group(1))
+            cells = []
+            body_start = row_match.start(2) if row_match.group(2) is not None else None
+            if body_start is not None:
+                for cell_match in _CELL_RE.finditer(xml, body_start, row_match.end(2)):
+                    cells.append((column_index(cell_match.group(1)), cell_match.start(), cell_match.end(),
+                                  cell_match.group(3)))
+                row_close = row_match.end(2)
+            else:
+                row_close = None
+            self.rows[row] = (row_match.start(), row_close, cells)
+
+        # coordenada -> (inicio, fin, estilo) de las celdas existentes
+        self.cells = {}
+        for row, (_, _, cells) in self.rows.items():
+            for column, start, end, attributes in cells:
+                style = _STYLE_RE.search(attributes)
+                self.cells[(row, column)] = (start, end, style.group(1) if style else None)
+        self.sheet_data_end = data_end
+
+    def render_sheet(self, writes):
+        """
+        Genera el XML de la hoja con los valores indicados
+
+        Args:
+            writes (list): Pares (coordenada, valor), p. ej. ('D11', 'JUAN PEREZ')
+
+        Returns:
+            str: XML completo de la hoja
+        """
+        values = {}
+        for coordinate, value in writes:
+            match = re.match(r'([A-Z]+)(\d+)$', coordinate)
+            values[(int(match.group(2)), column_index(match.group(1)))] = (coordinate, value)
+
+        # Reemplazos (inicio, fin, texto) ordenados por posición en el XML original
+        replacements = []
+        new_rows = {}
+        for (row, column), (coordinate, value) in values.items():
+            cell = self.cells.get((row, column))
+            if cell is not None:
+                start, end, style = cell
+                replacements.append((start, end, self._cell_xml(coordinate, value, style)))
+            elif row in self.rows and self.rows[row][1] is not None:
+                position = self._insert_position(row, column)
+                replacements.append((position, position, self._cell_xml(coordinate, value, None)))
+            else:
+                new_rows.setdefault(row, []).append((column, self._cell_xml(coordinate, value, None)))
+
+        for row, cells in new_rows.items():
+            cells_xml = ''.join(xml for _, xml in sorted(cells))
+            if row in self.rows:
+                # Fila vacía autocerrada (<row .../>): se reemplaza completa
+                start = self.rows[row][0]
+                end = self.sheet_xml.index('>', start) + 1
+                row_open = self.sheet_xml[start:end - 2] + '>'
+                replacements.append((start, end, f'{row_open}{cells_xml}</row>'))
+            else:
+                position = self._row_insert_position(row)
+                replacements.append((position, position, f'<row r="{row}">{cells_xml}</row>'))
+
+        replacements.sort(key=lambda item: (item[0], item[1]))
+        chunks = []
+        cursor = 0
+        for start, end, text in replacements:
+            chunks.append(self.sheet_xml[cursor:start])
+            chunks.append(text)
+            cursor = end
+        chunks.append(self.sheet_xml[cursor:])
+        return ''.join(chunks)
+
+    def _insert_position(self, row, column):
+        """Posición donde insertar una celda nueva manteniendo el orden de columnas"""
+        _, row_close, cells = self.rows[row]
+        for cell_column, start, _, _ in cells:
+            if cell_column > column:
+                return start
+        return row_close
+
+    def _row_insert_position(self, row):
+        """Posición donde insertar una fila nueva manteniendo el orden de filas"""
+        following = [start for existing, (start, _, _) in self.rows.items() if existing > row]
+        return min(following) if following else self.sheet_data_end
+
+    @staticmethod
+    def _cell_xml(coordinate, value, style):
+        """Construye el XML de una celda conservando su estilo"""
+        style_attr = f' s="{style}"' if style is not None else ''
+        if value is None or value == '':
+            return f'<c r="{coordinate}"{style_attr}/>'
+        if isinstance(value, bool):
+            return f'<c r="{coordinate}"{style_attr} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float)):
+            return f'<c r="{coordinate}"{style_attr} t="n"><v>{value}</v></c>'
+        text = escape(_ILLEGAL_CHARACTERS_RE.sub('', str(value)))
+        return f'<c r="{coordinate}"{style_attr} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def render_bytes(self, writes, sheets=()):
+        """
+        Genera el contenido del xlsx con los valores indicados
+
+        Args:
+            writes (list): Pares (coordenada, valor)
+            sheets (list): Hojas adicionales (título, filas)
+
+        Returns:
+            bytes: Archivo xlsx completo
+        """
+        buffer = BytesIO()
+        self.write(writes, buffer, sheets)
+        return buffer.getvalue()
+
+    def write(self, writes, target, sheets=()):
+        """
+        Escribe el xlsx con los valores indicados
+
+        Args:
+            writes (list): Pares (coordenada, valor)
+            target (str | file): Ruta o archivo binario de destino
+            sheets (list): Hojas adicionales (título, filas)
+        """
+        self.write_sheet(self.render_sheet(writes), target, sheets)
+
+    def write_sheet(self, sheet_xml, target, sheets=()):
+        """
+        Empaqueta el xlsx con la hoja activa ya generada por render_sheet
+
+        Args:
+            sheet_xml (str): XML de la hoja activa
+            target (str | file): Ruta o archivo binario de destino
+            sheets (list): Hojas adicionales (título, filas) que se agregan al final del libro
+        """
+        sheet_xml = sheet_xml.encode('utf-8')
+        parts, sheet_parts = self._parts_with_sheets(tuple(title for title, _ in sheets))
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+            for name, data in parts:
+                if name == self.sheet_name:
+                    data = sheet_xml
+                # Las imágenes ya vienen comprimidas: se guardan sin volver a comprimir
+                compress_type = zipfile.ZIP_STORED if name.startswith('xl/media/') else None
+                archive.writestr(name, data, compress_type=compress_type)
+            for name, (_, rows) in zip(sheet_parts, sheets):
+                archive.writestr(name, self._table_sheet_xml(rows).encode('utf-8'))
+
+    def _parts_with_sheets(self, titles):
+        """
+        Partes del libro con las hojas adicionales registradas en workbook.xml, sus
+        relaciones y [Content_Types].xml. Se calculan una vez por combinación de títulos.
+
+        Returns:
+            tuple: (partes, nombres de las partes de las hojas adicionales)
+        """
+        if not titles:
+            return self.parts, []
+        cached = self._extra_parts.get(titles)
+        if cached is not None:
+            return cached
+
+        parts = dict(self.parts)
+        workbook_xml = parts['xl/workbook.xml'].decode('utf-8')
+        rels_xml = parts['xl/_rels/workbook.xml.rels'].decode('utf-8')
+        types_xml = parts['[Content_Types].xml'].decode('utf-8')
+        sheet_id = max(int(value) for value in _SHEET_ID_RE.findall(workbook_xml))
+        rel_id = max(int(value) for value in _REL_ID_RE.findall(rels_xml))
+        number = 1
+        sheets_xml, rels, types, names = [], [], [], []
+        for title in titles:
+            while f'xl/worksheets/sheet{number}.xml' in parts or f'xl/worksheets/sheet{number}.xml' in names:
+                number += 1
+            name = f'xl/worksheets/sheet{number}.xml'
+            sheet_id += 1
+            rel_id += 1
+            names.append(name)
+            # Los nombres de hoja de Excel admiten hasta 31 caracteres
+            sheets_xml.append(f'<sheet name="{escape(title[:31], {chr(34): "&quot;"})}" sheetId="{sheet_id}" '
+                              f'state="visible" r:id="rId{rel_id}"/>')
+            rels.append(f'<Relationship Id="rId{rel_id}" Type="{WORKSHEET_TYPE}" '
+                        f'Target="worksheets/sheet{number}.xml"/>')
+            types.append(f'<Override PartName="/{name}" ContentType="{WORKSHEET_CONTENT_TYPE}"/>')
+
+        parts['xl/workbook.xml'] = workbook_xml.replace('</sheets>', ''.join(sheets_xml) + '</sheets>').encode()
+        parts['xl/_rels/workbook.xml.rels'] = rels_xml.replace(
+            '</Relationships>', ''.join(rels) + '</Relationships>').encode()
+        parts['[Content_Types].xml'] = types_xml.replace('</Types>', ''.join(types) + '</Types>').encode()
+        cached = ([(name, parts[name]) for name, _ in self.parts], names)
+        self._extra_parts[titles] = cached
+        return cached
+
+    def _table_sheet_xml(self, rows):
+        """XML de una hoja simple con una fila por elemento y los encabezados fijos arriba"""
+        widths = {}
+        rows_xml = []
+        for row_number, values in enumerate(rows, start=1):
+            cells = []
+            for column, value in enumerate(values, start=1):
+                coordinate = f'{column_letter(column)}{row_number}'
+                cells.append(self._cell_xml(coordinate, value, None))
+                widths[column] = max(widths.get(column, 10), min(len(str(value or '')) + 2, 80))
+            rows_xml.append(f'<row r="{row_number}">{"".join(cells)}</row>')
+        cols = ''.join(f'<col min="{column}" max="{column}" width="{width}" customWidth="1"/>'
+                       for column, width in sorted(widths.items()))
+        return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+                'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+                f'<cols>{cols}</cols><sheetData>{"".join(rows_xml)}</sheetData></worksheet>')